@@ -1,29 +1,230 @@
-from flask import Flask, send_from_directory
+from concurrent.futures import TimeoutError as RenderTimeout
+from flask import Flask, send_from_directory, redirect, abort, jsonify, request, Response, g
 import os
+import time
 
-app = Flask(__name__)
+from build_output import (build_path, private_path, current_version, is_valid_version, is_valid_dataset,
+                          dataset_builds_dir, list_datasets)
+from colt_store import STORE_FILENAME, FILTER_COLUMNS, connect, query_trips
+from render_service import CHARTS, RenderService, RenderBusy, RenderFailed, parse_params
+from serving_metrics import ServingMetrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+
+# Disable the built-in static route so /static/ follows the published build
+app = Flask(__name__, static_folder=None)
+
+# Optionally rebuild the dashboard in the background when the data or code changes
+rebuild_watcher = None
+# (not inside render worker processes, which re-import this module when run as a script)
+if os.environ.get('COLT_REBUILD_WATCH') == '1' and __name__ != '__mp_main__':
+    from rebuild_watcher import RebuildWatcher
+    rebuild_watcher = RebuildWatcher().start()
+
+# Renders charts with custom parameters in worker processes, started on first use
+render_service = RenderService()
+
+# Per-route request counts, latency and bytes, exposed at /metrics
+metrics = ServingMetrics()
+
+def render_cache_stats(cache):
+    """(hits, lookups) of the render service's memory or disk cache"""
+    stats = render_service.stats
+    disk_lookups = stats['disk_hits'] + stats['renders'] + stats['rejected']
+    if cache == 'memory':
+        return stats['memory_hits'], stats['memory_hits'] + stats['coalesced'] + disk_lookups
+    return stats['disk_hits'], disk_lookups
+
+metrics.add_cache('render_memory', lambda: render_cache_stats('memory'))
+metrics.add_cache('render_disk', lambda: render_cache_stats('disk'))
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_metrics(response):
+    """Record route, asset, status, latency and body size of every response"""
+    route = request.url_rule.rule if request.url_rule else '<unmatched>'
+    view_args = request.view_args or {}
+    asset = ''
+    if response.status_code < 400:
+        # Only existing files and charts, so arbitrary 404 paths do not add label values
+        asset = view_args.get('filename') or view_args.get('path') or ''
+        if 'chart' in view_args:
+            asset = f"{view_args['chart']}.png"
+        elif request.path.endswith('/') and response.status_code in (200, 304):
+            asset = 'colt_complete_dashboard.html'
+    if request.if_none_match or request.if_modified_since:
+        # Browser cache revalidation: a 304 means the cached copy was reused
+        metrics.count_cache('http_conditional', response.status_code == 304)
+    elapsed = time.perf_counter() - g.get('request_started', time.perf_counter())
+    metrics.observe(route, asset, response.status_code, elapsed, response.content_length or 0)
+    return response
+
+# Versioned URLs never change content, so browsers may cache them for a year
+VERSIONED_MAX_AGE = 365 * 24 * 3600
+
+def current_dir():
+    """Directory of the published build, falling back to the committed static folder"""
+    version = current_version()
+    return os.path.abspath(build_path(version)) if version else 'static'
 
 @app.route('/')
 def index():
     """Serve the main dashboard HTML file"""
+    version = current_version()
+    if version:
+        # Pin the whole view (iframes and images) to one build
+        return redirect(f'/v/{version}/')
     return send_from_directory('static', 'colt_complete_dashboard.html')
 
+@app.route('/v/<version>/')
+def versioned_index(version):
+    """Serve the dashboard of a specific build"""
+    return versioned_file(version, 'colt_complete_dashboard.html')
+
+@app.route('/v/<version>/<path:filename>')
+def versioned_file(version, filename, builds_dir=None):
+    """Serve a file from a specific build, kept available after newer builds are published"""
+    if not is_valid_version(version) or not os.path.isdir(build_path(version, builds_dir)):
+        abort(404)
+    return send_from_directory(os.path.abspath(build_path(version, builds_dir)), filename,
+                               max_age=VERSIONED_MAX_AGE)
+
+def dataset_dir(dataset):
+    """Builds directory of a batch-built dataset, or 404 if it was never published"""
+    if not is_valid_dataset(dataset) or not current_version(dataset_builds_dir(dataset)):
+        abort(404)
+    return dataset_builds_dir(dataset)
+
+@app.route('/datasets')
+def datasets():
+    """List the dashboards of all batch-built datasets"""
+    return jsonify([{
+        'dataset': name,
+        'version': current_version(dataset_builds_dir(name)),
+        'url': f'/d/{name}/',
+    } for name in list_datasets()])
+
+@app.route('/d/<dataset>/')
+def dataset_index(dataset):
+    """Redirect to the current build of a dataset's dashboard"""
+    version = current_version(dataset_dir(dataset))
+    if not version:
+        abort(404)
+    return redirect(f'/d/{dataset}/v/{version}/')
+
+@app.route('/d/<dataset>/v/<version>/')
+@app.route('/d/<dataset>/v/<version>/<path:filename>')
+def dataset_file(dataset, version, filename='colt_complete_dashboard.html'):
+    """Serve a file from a specific build of a dataset"""
+    return versioned_file(version, filename, builds_dir=dataset_dir(dataset))
+
 @app.route('/static/<path:path>')
 def serve_static(path):
-    """Serve static files from the static directory"""
-    return send_from_directory('static', path)
+    """Serve static files from the current build"""
+    return send_from_directory(current_dir(), path)
 
 @app.route('/<path:filename>')
 def serve_files_in_root(filename):
-    """Serve files from static directory when requested at root URL path"""
-    return send_from_directory('static', filename)
+    """Serve files from the current build when requested at root URL path"""
+    return send_from_directory(current_dir(), filename)
 
 @app.route('/health')
 def health():
     """Health check endpoint for Heroku"""
     return "OK"
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Request metrics of this process in the Prometheus text format"""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/rebuild/status')
+def rebuild_status():
+    """Report the served build and the state of the background rebuild watcher"""
+    return jsonify({
+        'current_version': current_version(),
+        'watching': rebuild_watcher is not None,
+        'status': rebuild_watcher.status if rebuild_watcher else None,
+        'last_build': rebuild_watcher.last_build if rebuild_watcher else None,
+        'failure': rebuild_watcher.failure if rebuild_watcher else None,
+    })
+
+def current_store(builds_dir=None):
+    """(version, analytical store path) of the current build, or (version, None) without a store"""
+    version = current_version(builds_dir)
+    store_path = os.path.abspath(os.path.join(private_path(version, builds_dir), STORE_FILENAME)) if version else None
+    return version, store_path if store_path and os.path.exists(store_path) else None
+
+@app.route('/api/query')
+def api_query():
+    """Count trips by leader, country, region and year from the current build's store.
+
+    Example: /api/query?leader=...&region=Europe&start=2005&end=2010&group_by=year
+    Filter parameters may be repeated to match any of several values; `dataset`
+    selects a batch-built dataset instead of the default build.
+    """
+    builds_dir = dataset_dir(request.args['dataset']) if request.args.get('dataset') else None
+    version, store_path = current_store(builds_dir)
+    if not store_path:
+        return jsonify({'error': 'No analytical store has been published yet'}), 503
+
+    filters = {name: request.args.getlist(name) for name in FILTER_COLUMNS}
+    group_by = [name for name in request.args.get('group_by', '').split(',') if name]
+    started = time.perf_counter()
+    try:
+        rows, table = query_trips(
+            connect(store_path, builds_dir), filters,
+            start=request.args.get('start', type=int),
+            end=request.args.get('end', type=int),
+            group_by=group_by,
+            limit=request.args.get('limit', 100, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'version': version,
+        'source': table,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+        'rows': rows,
+    })
+
+@app.route('/render/<chart>.png')
+def render_chart(chart):
+    """Render a static chart with custom parameters from the current build's data.
+
+    Example: /render/top_destinations.png?n=20&start=2000&end=2010&w=800
+    (add dataset=<name> to render from a batch-built dataset)
+    """
+    if chart not in CHARTS:
+        abort(404)
+    try:
+        params = parse_params(chart, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    builds_dir = dataset_dir(request.args['dataset']) if request.args.get('dataset') else None
+    version, store_path = current_store(builds_dir)
+    if not store_path:
+        return jsonify({'error': 'No analytical store has been published yet'}), 503
+
+    try:
+        png = render_service.render(store_path, chart, params)
+    except RenderBusy as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+    except RenderTimeout:
+        return jsonify({'error': 'Rendering timed out'}), 504
+    except RenderFailed as e:
+        return jsonify({'error': str(e)}), 500
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    response = Response(png, mimetype='image/png')
+    # The image only changes when a new build is published
+    response.headers['Cache-Control'] = 'public, max-age=3600'
+    response.headers['X-Build-Version'] = version
+    return response
+
 if __name__ == '__main__':
     # Get port from environment variable for Heroku compatibility
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port)
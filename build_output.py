@@ -0,0 +1,195 @@
+"""Versioned build output for the COLT dashboard.
+
+Every run of generate_visualizations.py writes into its own directory under
+builds/ and is only published once all artifacts are written. Publishing
+atomically replaces builds/current.json, which names the current and the
+previous build. app.py serves whatever that pointer names, so a half-written
+build is never visible and a rollback is just another pointer swap.
+
+Batch runs over several dataset files give each dataset its own namespace,
+builds/datasets/<name>/, with the same layout and its own pointer.
+
+Files of a build that must not be served over HTTP (the analytical store) go
+to private/<version>/ next to the build directories, outside of every
+served path, and are pruned together with their build.
+
+Usage:
+    python build_output.py status [dataset]
+    python build_output.py rollback [dataset]
+"""
+import json
+import os
+import re
+import shutil
+import sys
+from datetime import datetime
+
+BUILDS_DIR = os.environ.get('COLT_BUILDS_DIR', 'builds')
+POINTER_FILE = 'current.json'
+DATASETS_DIR = 'datasets'
+PRIVATE_DIR = 'private'
+
+# Written into every build: the source fingerprint it was generated from
+BUILD_INFO_FILE = 'build_info.json'
+
+# Number of published builds kept on disk (current and previous are always kept)
+KEEP_BUILDS = 5
+
+VERSION_PATTERN = re.compile(r'^\d{8}-\d{6}-\d+$')
+DATASET_PATTERN = re.compile(r'^[a-z0-9][a-z0-9-]{0,79}$')
+
+
+def build_path(version, builds_dir=None):
+    """Return the directory of a build version"""
+    return os.path.join(builds_dir or BUILDS_DIR, version)
+
+
+def private_path(version, builds_dir=None):
+    """Return the unserved directory of a build version"""
+    return os.path.join(builds_dir or BUILDS_DIR, PRIVATE_DIR, version)
+
+
+def is_valid_version(version):
+    """Check that a version string looks like one created by start_build"""
+    return bool(version) and VERSION_PATTERN.match(version) is not None
+
+
+def dataset_name(data_file):
+    """Namespace name of a dataset file, e.g. COLT_Primary.csv -> colt-primary"""
+    stem = os.path.splitext(os.path.basename(data_file))[0]
+    return re.sub(r'[^a-z0-9]+', '-', stem.lower()).strip('-')[:80] or 'dataset'
+
+
+def is_valid_dataset(name):
+    """Check that a dataset name looks like one created by dataset_name"""
+    return bool(name) and DATASET_PATTERN.match(name) is not None
+
+
+def dataset_builds_dir(name, builds_dir=None):
+    """Return the builds directory of a dataset namespace"""
+    return os.path.join(builds_dir or BUILDS_DIR, DATASETS_DIR, name)
+
+
+def list_datasets(builds_dir=None):
+    """Return the names of all dataset namespaces that have a published build"""
+    datasets_dir = os.path.join(builds_dir or BUILDS_DIR, DATASETS_DIR)
+    if not os.path.isdir(datasets_dir):
+        return []
+    return sorted(name for name in os.listdir(datasets_dir)
+                  if is_valid_dataset(name) and current_version(os.path.join(datasets_dir, name)))
+
+
+def start_build(builds_dir=None):
+    """Create a fresh directory for a new build and return (version, path)"""
+    builds_dir = builds_dir or BUILDS_DIR
+    os.makedirs(builds_dir, exist_ok=True)
+    version = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+    path = build_path(version, builds_dir)
+    os.makedirs(path)
+    os.makedirs(private_path(version, builds_dir))
+    return version, path
+
+
+def read_pointer(builds_dir=None):
+    """Return the pointer dict ({'current': ..., 'previous': ...}) or an empty one"""
+    pointer_path = os.path.join(builds_dir or BUILDS_DIR, POINTER_FILE)
+    try:
+        with open(pointer_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'current': None, 'previous': None}
+
+
+def write_pointer(current, previous, builds_dir=None):
+    """Atomically replace the pointer file"""
+    builds_dir = builds_dir or BUILDS_DIR
+    pointer_path = os.path.join(builds_dir, POINTER_FILE)
+    tmp_path = f"{pointer_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'current': current, 'previous': previous,
+                   'published_at': datetime.now().isoformat(timespec='seconds')}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, pointer_path)
+
+
+def current_version(builds_dir=None):
+    """Return the published build version, or None if nothing was published yet"""
+    version = read_pointer(builds_dir).get('current')
+    if is_valid_version(version) and os.path.isdir(build_path(version, builds_dir)):
+        return version
+    return None
+
+
+def publish_build(version, builds_dir=None):
+    """Make a finished build the current one, keeping the old one as previous"""
+    pointer = read_pointer(builds_dir)
+    previous = pointer.get('current')
+    if previous == version:
+        previous = pointer.get('previous')
+    write_pointer(version, previous, builds_dir)
+    prune_builds(builds_dir)
+    return previous
+
+
+def rollback(builds_dir=None):
+    """Swap the current and previous builds; returns the version now being served"""
+    pointer = read_pointer(builds_dir)
+    previous = pointer.get('previous')
+    if not is_valid_version(previous) or not os.path.isdir(build_path(previous, builds_dir)):
+        raise RuntimeError("No previous build available for rollback")
+    write_pointer(previous, pointer.get('current'), builds_dir)
+    return previous
+
+
+def write_build_info(path, info):
+    """Record how a build was produced (e.g. its source fingerprint)"""
+    with open(os.path.join(path, BUILD_INFO_FILE), 'w') as f:
+        json.dump(info, f)
+
+
+def read_build_info(version, builds_dir=None):
+    """Return the recorded info of a build, or an empty dict"""
+    try:
+        with open(os.path.join(build_path(version, builds_dir), BUILD_INFO_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def list_builds(builds_dir=None):
+    """Return all build versions on disk, oldest first"""
+    builds_dir = builds_dir or BUILDS_DIR
+    if not os.path.isdir(builds_dir):
+        return []
+    return sorted(name for name in os.listdir(builds_dir)
+                  if is_valid_version(name) and os.path.isdir(os.path.join(builds_dir, name)))
+
+
+def prune_builds(builds_dir=None, keep=KEEP_BUILDS):
+    """Delete old published builds beyond `keep`, never touching current/previous"""
+    pointer = read_pointer(builds_dir)
+    protected = {pointer.get('current'), pointer.get('previous')}
+    versions = list_builds(builds_dir)
+    published = [v for v in versions if v <= (pointer.get('current') or '')]
+    for version in published[:-keep] if keep else published:
+        if version not in protected:
+            shutil.rmtree(build_path(version, builds_dir), ignore_errors=True)
+            shutil.rmtree(private_path(version, builds_dir), ignore_errors=True)
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    builds_dir = dataset_builds_dir(sys.argv[2]) if len(sys.argv) > 2 else None
+    if command == 'status':
+        pointer = read_pointer(builds_dir)
+        print(f"Current build:  {pointer.get('current')}")
+        print(f"Previous build: {pointer.get('previous')}")
+        print(f"Builds on disk: {', '.join(list_builds(builds_dir)) or 'none'}")
+        if builds_dir is None:
+            print(f"Datasets:       {', '.join(list_datasets()) or 'none'}")
+    elif command == 'rollback':
+        print(f"Rolled back to build {rollback(builds_dir)}")
+    else:
+        print(__doc__)
+        sys.exit(1)
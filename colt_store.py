@@ -0,0 +1,137 @@
+"""Embedded SQLite store for ad-hoc questions about the COLT data.
+
+generate_visualizations.py materializes the cleaned trips and the main
+aggregates into colt.sqlite in each build's private directory (never served
+as a file), indexed on leader, country, region and year. app.py answers
+parameterized queries against the current build's database through
+query_trips().
+"""
+import sqlite3
+import threading
+
+import pandas as pd
+
+STORE_FILENAME = 'colt.sqlite'
+
+# Query parameter -> column; every one of these is indexed
+FILTER_COLUMNS = {
+    'leader': 'LeaderFullName',
+    'leader_country': 'LeaderCountryOrIGO',
+    'leader_region': 'LeaderRegion',
+    'country': 'CountryVisited',
+    'region': 'RegionVisited',
+    'year': 'TripYear',
+}
+
+TRIP_COLUMNS = list(FILTER_COLUMNS.values()) + ['TripDuration']
+
+# Country-level aggregate; covers any query that does not involve leader names
+DYAD_YEAR_COLUMNS = ['LeaderCountryOrIGO', 'LeaderRegion', 'CountryVisited', 'RegionVisited', 'TripYear']
+
+MAX_LIMIT = 10000
+
+
+def materialize(df, path):
+    """Write the cleaned trips and their aggregates into a fresh SQLite file"""
+    columns = [c for c in TRIP_COLUMNS if c in df.columns]
+    trips = df[columns].copy()
+    trips['TripYear'] = pd.to_numeric(trips['TripYear'], errors='coerce').astype('Int64')
+
+    conn = sqlite3.connect(path)
+    try:
+        # The file is private to an unpublished build, so durability is not needed yet
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        trips.to_sql('trips', conn, index=False, if_exists='replace', chunksize=50000)
+        for column in columns:
+            if column != 'TripDuration':
+                conn.execute(f'CREATE INDEX idx_trips_{column} ON trips ({column}, TripYear)')
+
+        group_columns = [c for c in DYAD_YEAR_COLUMNS if c in trips.columns]
+        dyad_year = (trips.groupby(group_columns, dropna=False)
+                     .agg(trips=('TripYear', 'size'),
+                          duration_sum=('TripDuration', 'sum'),
+                          duration_count=('TripDuration', 'count'))
+                     .reset_index())
+        dyad_year.to_sql('dyad_year', conn, index=False, if_exists='replace')
+        for column in group_columns:
+            if column != 'TripYear':
+                conn.execute(f'CREATE INDEX idx_dyad_year_{column} ON dyad_year ({column}, TripYear)')
+        conn.execute('CREATE INDEX idx_dyad_year_TripYear ON dyad_year (TripYear)')
+
+        conn.execute('ANALYZE')
+        conn.commit()
+    finally:
+        conn.close()
+
+
+_local = threading.local()
+
+
+def connect(path, namespace=None):
+    """Return a read-only connection to a store, reused per thread and per builds namespace.
+
+    Each thread keeps one connection per namespace (the default builds or a
+    dataset); once a new build is published the old store's connection is
+    closed, so pruned stores are not held open.
+    """
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    cached = connections.get(namespace)
+    if cached is not None and cached[0] == path:
+        return cached[1]
+    if cached is not None:
+        cached[1].close()
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    connections[namespace] = (path, conn)
+    return conn
+
+
+def query_trips(conn, filters=None, start=None, end=None, group_by=None, limit=100):
+    """Count trips matching the filters, grouped by the given query parameter names.
+
+    filters maps parameter names from FILTER_COLUMNS to lists of accepted values.
+    Returns (rows, table) where table is the table that answered the query.
+    """
+    filters = {k: v for k, v in (filters or {}).items() if v}
+    group_by = group_by or []
+    for name in list(filters) + list(group_by):
+        if name not in FILTER_COLUMNS:
+            raise ValueError(f"Unknown field '{name}', expected one of: {', '.join(FILTER_COLUMNS)}")
+    if start is not None and end is not None and int(start) > int(end):
+        raise ValueError("start must not be after end")
+    limit = max(1, min(int(limit), MAX_LIMIT))
+
+    used_columns = {FILTER_COLUMNS[name] for name in list(filters) + list(group_by)}
+    if used_columns <= set(DYAD_YEAR_COLUMNS):
+        table, count_expr = 'dyad_year', 'SUM(trips)'
+        duration_expr = 'SUM(duration_sum) / NULLIF(SUM(duration_count), 0)'
+    else:
+        table, count_expr = 'trips', 'COUNT(*)'
+        duration_expr = 'AVG(TripDuration)'
+
+    where, params = [], []
+    for name, values in filters.items():
+        where.append(f"{FILTER_COLUMNS[name]} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    if start is not None:
+        where.append('TripYear >= ?')
+        params.append(int(start))
+    if end is not None:
+        where.append('TripYear <= ?')
+        params.append(int(end))
+
+    select = [f'{FILTER_COLUMNS[name]} AS {name}' for name in group_by]
+    sql = f"SELECT {', '.join(select + [f'{count_expr} AS trips', f'{duration_expr} AS avg_duration'])} FROM {table}"
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    if group_by:
+        sql += ' GROUP BY ' + ', '.join(FILTER_COLUMNS[name] for name in group_by)
+        sql += ' ORDER BY trips DESC'
+    sql += ' LIMIT ?'
+    params.append(limit)
+
+    rows = [dict(row) for row in conn.execute(sql, params)]
+    return rows, table
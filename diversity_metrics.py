@@ -0,0 +1,99 @@
+"""Rolling-window diversity and concentration metrics for every leader country.
+
+Trips are first counted into a year x country x destination array. Each
+rolling window is kept as a running sum that adds the entering year and
+subtracts the leaving one, and all metrics are computed from that running
+sum:
+
+- Entropy: Shannon entropy (bits) of the destination distribution
+- HHI: Herfindahl concentration of destinations (1 = a single destination)
+- NewDestinationRate: share of the window's destinations first visited in the window
+  (windows starting at the first year of the data count every destination as new)
+- RegionalSpread: number of distinct regions visited
+"""
+import numpy as np
+import pandas as pd
+
+COUNTRY_COLUMN = 'LeaderCountryOrIGO'
+DESTINATION_COLUMN = 'CountryVisited'
+REGION_COLUMN = 'RegionVisited'
+YEAR_COLUMN = 'TripYear'
+
+DEFAULT_WINDOWS = (3, 5)
+
+
+def build_counts(df):
+    """Return (countries, destinations, years, counts[year, country, destination], destination regions)"""
+    trips = df[[COUNTRY_COLUMN, DESTINATION_COLUMN, YEAR_COLUMN]].dropna()
+    country_codes, countries = pd.factorize(trips[COUNTRY_COLUMN], sort=True)
+    destination_codes, destinations = pd.factorize(trips[DESTINATION_COLUMN], sort=True)
+    year_values = trips[YEAR_COLUMN].astype(int).values
+    first_year = year_values.min()
+    years = np.arange(first_year, year_values.max() + 1)
+
+    counts = np.zeros((len(years), len(countries), len(destinations)), dtype=np.int32)
+    np.add.at(counts, (year_values - first_year, country_codes, destination_codes), 1)
+
+    # Most common region recorded for each destination
+    if REGION_COLUMN in df.columns:
+        regions = (df[[DESTINATION_COLUMN, REGION_COLUMN]].dropna()
+                   .groupby(DESTINATION_COLUMN)[REGION_COLUMN]
+                   .agg(lambda r: r.value_counts().index[0]))
+        destination_regions = regions.reindex(destinations).fillna('Unknown').values
+    else:
+        destination_regions = np.full(len(destinations), 'Unknown', dtype=object)
+    return np.asarray(countries), np.asarray(destinations), years, counts, destination_regions
+
+
+def window_metrics(window_counts, new_destinations, region_matrix):
+    """Metrics for every country from one window's country x destination counts"""
+    trips = window_counts.sum(axis=1)
+    visited = window_counts > 0
+    unique = visited.sum(axis=1)
+    shares = np.divide(window_counts, trips[:, None], out=np.zeros(window_counts.shape),
+                       where=trips[:, None] > 0)
+    log_shares = np.log2(shares, out=np.zeros_like(shares), where=shares > 0)
+    return {
+        'Trips': trips,
+        'UniqueDestinations': unique,
+        'Entropy': -(shares * log_shares).sum(axis=1),
+        'HHI': (shares ** 2).sum(axis=1),
+        'NewDestinationRate': np.divide(new_destinations, unique, out=np.zeros(len(unique)),
+                                        where=unique > 0),
+        'RegionalSpread': ((visited.astype(np.int32) @ region_matrix) > 0).sum(axis=1),
+    }
+
+
+def compute_rolling_diversity(df, windows=DEFAULT_WINDOWS):
+    """Return a DataFrame of rolling diversity metrics per country, window and period"""
+    countries, destinations, years, counts, destination_regions = build_counts(df)
+    region_codes, _ = pd.factorize(destination_regions)
+    region_matrix = np.zeros((len(destinations), region_codes.max() + 1), dtype=np.int32)
+    region_matrix[np.arange(len(destinations)), region_codes] = 1
+
+    # Number of destinations each country visited for the first time, per year
+    ever_visited = np.cumsum(counts, axis=0) > 0
+    first_visits = ever_visited.copy()
+    first_visits[1:] &= ~ever_visited[:-1]
+    first_visit_counts = first_visits.sum(axis=2)
+
+    frames = []
+    for window in windows:
+        running = np.zeros(counts.shape[1:], dtype=np.int64)
+        running_new = np.zeros(counts.shape[1], dtype=np.int64)
+        for i, year in enumerate(years):
+            running += counts[i]
+            running_new += first_visit_counts[i]
+            if i >= window:
+                running -= counts[i - window]
+                running_new -= first_visit_counts[i - window]
+            if i < window - 1:
+                continue
+            metrics = window_metrics(running, running_new, region_matrix)
+            active = metrics['Trips'] > 0
+            frame = pd.DataFrame({name: values[active] for name, values in metrics.items()})
+            frame.insert(0, 'Country', countries[active])
+            frame.insert(0, 'Period', f"{year - window + 1}-{year}")
+            frame.insert(0, 'Window', window)
+            frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
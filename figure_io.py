@@ -0,0 +1,201 @@
+"""Serialization helpers for the plotly figures written by generate_visualizations.py.
+
+Trace arrays are stored as base64-encoded typed arrays using the smallest
+dtype that holds the values exactly (e.g. int16 years, uint8/uint16 counts)
+instead of decimal JSON text. A small decoder turns them back into
+JavaScript typed arrays before the figure is handed to Plotly.
+
+Figures with many traces can skip plotly's graph objects entirely: build
+plain trace dicts with scatter_trace() and wrap them with figure_dict(),
+which adds the resolved template the same way go.Figure would. Nothing is
+validated, so property names must be spelled out in full (e.g.
+title={'text': ..., 'font': {'size': 24}} instead of title_font_size).
+"""
+import base64
+import functools
+import json
+
+import numpy as np
+import plotly
+import plotly.io as pio
+from plotly.utils import PlotlyJSONEncoder
+
+# Pinned plotly.js build used by hand-written pages (matches the bundled plotly.py)
+PLOTLY_CDN_URL = 'https://cdn.plot.ly/plotly-2.20.0.min.js'
+
+# Arrays shorter than this are cheaper to keep as plain JSON lists
+MIN_ENCODE_LENGTH = 8
+
+# Candidate integer dtypes, smallest first (signed preferred at equal width)
+INTEGER_DTYPES = [
+    ('i1', np.int8), ('u1', np.uint8),
+    ('i2', np.int16), ('u2', np.uint16),
+    ('i4', np.int32), ('u4', np.uint32),
+]
+
+# JavaScript that converts {"dtype": ..., "bdata": ...} objects into typed arrays
+DECODE_JS = """
+    const TYPED_ARRAYS = {
+        i1: Int8Array, u1: Uint8Array, i2: Int16Array, u2: Uint16Array,
+        i4: Int32Array, u4: Uint32Array, f4: Float32Array, f8: Float64Array
+    };
+    function decodeTypedArrays(obj) {
+        if (Array.isArray(obj)) {
+            return obj.map(decodeTypedArrays);
+        }
+        if (obj && typeof obj === 'object') {
+            if (typeof obj.bdata === 'string' && TYPED_ARRAYS[obj.dtype]) {
+                const bin = atob(obj.bdata);
+                const bytes = new Uint8Array(bin.length);
+                for (let i = 0; i < bin.length; i++) {
+                    bytes[i] = bin.charCodeAt(i);
+                }
+                return new TYPED_ARRAYS[obj.dtype](bytes.buffer);
+            }
+            for (const key of Object.keys(obj)) {
+                obj[key] = decodeTypedArrays(obj[key]);
+            }
+        }
+        return obj;
+    }
+"""
+
+# JavaScript escaping of data values (country and leader names) inserted into page HTML
+ESCAPE_HTML_JS = """
+    function escapeHtml(text) {
+        return String(text).replace(/[&<>"']/g, c =>
+            ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c]));
+    }
+"""
+
+
+def smallest_dtype(values):
+    """Return (code, numpy dtype) of the smallest type that holds values exactly, or None"""
+    if values.dtype.kind == 'b' or values.dtype.kind not in 'iuf':
+        return None
+    if len(values) == 0:
+        return None
+    if values.dtype.kind == 'f':
+        finite = values[np.isfinite(values)]
+        if len(finite) != len(values) or not np.all(finite == np.round(finite)):
+            # Keep gaps and fractions as floats, narrowing to float32 when lossless
+            if np.array_equal(values.astype(np.float32).astype(values.dtype), values, equal_nan=True):
+                return 'f4', np.float32
+            return 'f8', np.float64
+    low, high = values.min(), values.max()
+    for code, dtype in INTEGER_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return code, dtype
+    return 'f8', np.float64
+
+
+def encode_array(values):
+    """Encode a 1-D numeric array as a typed-array dict, or return it unchanged"""
+    if isinstance(values, (str, bytes, dict)):
+        return values
+    try:
+        array = np.asarray(values)
+    except (TypeError, ValueError):
+        return values
+    if array.ndim != 1 or len(array) < MIN_ENCODE_LENGTH:
+        return values
+    fitted = smallest_dtype(array)
+    if fitted is None:
+        return values
+    code, dtype = fitted
+    # Typed arrays in the browser are little-endian
+    raw = array.astype(np.dtype(dtype).newbyteorder('<')).tobytes()
+    return {'dtype': code, 'bdata': base64.b64encode(raw).decode('ascii')}
+
+
+def encode_trace(trace):
+    """Encode every numeric array in a trace dict, including nested ones like marker.size"""
+    encoded = {}
+    for key, value in trace.items():
+        if isinstance(value, dict):
+            encoded[key] = encode_trace(value)
+        elif isinstance(value, (list, tuple, np.ndarray)):
+            encoded[key] = encode_array(value)
+        else:
+            encoded[key] = value
+    return encoded
+
+
+@functools.lru_cache(maxsize=None)
+def template_layout(name=None):
+    """A plotly template (default: the active one) as a plain dict, resolved once per process"""
+    return pio.templates[name or pio.templates.default].to_plotly_json()
+
+
+def scatter_trace(x, y, **properties):
+    """Plain scatter trace dict, without graph-object validation"""
+    return dict(type='scatter', x=x, y=y, **properties)
+
+
+def figure_dict(traces, layout=None, template=None):
+    """Plain figure dict for write_figure_html, with the template resolved like go.Figure"""
+    layout = dict(layout or {})
+    layout['template'] = template_layout(template)
+    return {'data': list(traces), 'layout': layout}
+
+
+def figure_to_dict(fig):
+    """Return a plain figure dict for a go.Figure or an already-built dict"""
+    if isinstance(fig, dict):
+        return fig
+    return fig.to_plotly_json()
+
+
+def encode_figure(fig):
+    """Return a figure dict whose trace arrays are stored as typed arrays"""
+    figure = figure_to_dict(fig)
+    return {
+        'data': [encode_trace(trace) for trace in figure.get('data', [])],
+        'layout': figure.get('layout', {}),
+    }
+
+
+def to_json(obj):
+    """Compact JSON dump that understands numpy and pandas values.
+
+    <, > and & are written as \\u escapes, so the JSON can be inlined into a
+    <script> block without a name closing the tag.
+    """
+    text = json.dumps(obj, cls=PlotlyJSONEncoder, separators=(',', ':'))
+    return text.replace('<', '\\u003c').replace('>', '\\u003e').replace('&', '\\u0026')
+
+
+@functools.lru_cache(maxsize=None)
+def plotly_js():
+    """The bundled plotly.js source, read once per process"""
+    return plotly.offline.get_plotlyjs()
+
+
+def write_figure_html(fig, path, typed_arrays=True, include_plotlyjs=True):
+    """Write a standalone HTML page for a figure, like fig.write_html but with typed arrays"""
+    figure = encode_figure(fig) if typed_arrays else figure_to_dict(fig)
+    layout = figure.get('layout', {})
+    height = f"{layout['height']}px" if layout.get('height') else '100%'
+    width = f"{layout['width']}px" if layout.get('width') else '100%'
+
+    if include_plotlyjs:
+        plotly_script = f'<script type="text/javascript">{plotly_js()}</script>'
+    else:
+        plotly_script = f'<script src="{PLOTLY_CDN_URL}"></script>'
+
+    html_content = f"""<html>
+<head><meta charset="utf-8" /></head>
+<body>
+    {plotly_script}
+    <div id="plotContainer" class="plotly-graph-div" style="height:{height}; width:{width};"></div>
+    <script type="text/javascript">
+        {DECODE_JS}
+        const figure = decodeTypedArrays({to_json({'data': figure['data'], 'layout': layout})});
+        Plotly.newPlot('plotContainer', figure.data, figure.layout, {{"responsive": true}});
+    </script>
+</body>
+</html>
+"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html_content)
@@ -1,28 +1,67 @@
+import io
 import os
+import re
+import sys
+import shutil
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from PIL import Image
 import seaborn as sns
 import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from tqdm.auto import tqdm
-import shutil
 import json
+from figure_io import (write_figure_html, encode_array, to_json, scatter_trace, figure_dict,
+                       DECODE_JS, ESCAPE_HTML_JS, PLOTLY_CDN_URL)
+from build_output import (start_build, publish_build, current_version, build_path, private_path,
+                          dataset_name, dataset_builds_dir, write_build_info, read_build_info)
+from rebuild_watcher import source_fingerprint
+from size_budget import check_build
+from colt_store import materialize, STORE_FILENAME
+from network_metrics import compute_network_metrics
+from diversity_metrics import compute_rolling_diversity
+from summit_detection import has_trip_dates, trip_intervals, find_gatherings, START_DATE_COLUMNS
+from sampling import stratified_sample
+from leader_index import build_leader_index, NORMALIZE_QUERY_JS, INDEX_FILENAME as LEADER_INDEX_FILENAME
+
+# Input CSV, overridable for the rebuild watcher and other dataset files
+DATA_FILE = os.environ.get('COLT_DATA_FILE', "Diplometrics_COLT_Travel_Dataset_Primary-HOGS-1990-2024_20250317.csv")
+
+# Loaded by load_data(); set by main() for the build being written
+df = None
+BUILD_VERSION, OUTPUT_DIR = None, None
 
-# Create static folder if it doesn't exist
-if not os.path.exists('static'):
-    os.makedirs('static')
+# Preview builds (--preview): sample fraction, chart resolution and output directory
+PREVIEW_FRACTION = 0.1
+PREVIEW_DPI = 72
+PREVIEW_DIR = os.environ.get('COLT_PREVIEW_DIR', 'preview')
+# Marks a directory as a preview, so the next preview may replace it
+PREVIEW_MARKER = '.colt_preview'
 
-# Load the CSV file
-print("Loading data...")
-df = pd.read_csv("Diplometrics_COLT_Travel_Dataset_Primary-HOGS-1990-2024_20250317.csv", 
-                 encoding='latin1', low_memory=False)
+def load_data(path=DATA_FILE):
+    global df
+    # Load the CSV file
+    print("Loading data...")
+    df = pd.read_csv(path, encoding='latin1', low_memory=False)
+    
+    # Fix the TripDuration column
+    print("Processing TripDuration data...")
+    df['TripDuration'] = pd.to_numeric(df['TripDuration'].replace('TBD', np.nan), errors='coerce')
+    print(f"Data loaded with {len(df)} rows and {len(df.columns)} columns")
+    return df
+
+def output_path(filename):
+    return os.path.join(OUTPUT_DIR, filename)
 
-# Fix the TripDuration column
-print("Processing TripDuration data...")
-df['TripDuration'] = pd.to_numeric(df['TripDuration'].replace('TBD', np.nan), errors='coerce')
-print(f"Data loaded with {len(df)} rows and {len(df.columns)} columns")
+# Store plotly trace arrays as base64 typed arrays instead of decimal JSON text
+ENCODE_TYPED_ARRAYS = True
+
+def encode_values(values):
+    values = np.asarray(values)
+    return encode_array(values) if ENCODE_TYPED_ARRAYS else values.tolist()
 
 # Set the tab20 color palette for all visualizations
 plt.rcParams['axes.prop_cycle'] = plt.cycler(color=plt.cm.tab20.colors)
@@ -30,16 +69,47 @@ plt.rcParams['axes.prop_cycle'] = plt.cycler(color=plt.cm.tab20.colors)
 # Create a list to track visualizations
 visualizations = []
 
+# Aggregates behind the static charts; golden_outputs.py checks the same functions
+
+def trips_per_year_counts(data):
+    """Trips per year, in year order"""
+    return data['TripYear'].value_counts().sort_index()
+
+def top_destination_counts(data, n=10):
+    """Visits received by the n most visited countries"""
+    return data['CountryVisited'].value_counts().head(n)
+
+def region_visit_counts(data):
+    """Visits received per region"""
+    return data['RegionVisited'].value_counts()
+
+def trip_duration_distribution(data, bins=30):
+    """(known durations, histogram counts, bin edges, mean, median) of the trip durations"""
+    durations = data['TripDuration'].dropna()
+    counts, edges = np.histogram(durations, bins=bins)
+    return durations, counts, edges, durations.mean(), durations.median()
+
+def region_flow_matrix(data):
+    """Trips from each leader region (rows) to each visited region (columns)"""
+    return pd.crosstab(data['LeaderRegion'], data['RegionVisited'])
+
+def top_leader_counts(data, n=15):
+    """Trips of the n most travelled leaders, labelled 'Name (Country)'"""
+    leader_full_info = data['LeaderFullName'] + ' (' + data['LeaderCountryOrIGO'] + ')'
+    return leader_full_info.value_counts().head(n)
+
 # 1. Trips per year over time with tab20 colors
-def plot_trips_per_year():
-    trips_per_year = df['TripYear'].value_counts().sort_index()
+def plot_trips_per_year(data=None, dpi=300, path=None):
+    data = df if data is None else data
+    trips_per_year = trips_per_year_counts(data)
     plt.figure(figsize=(14, 8))
     ax = trips_per_year.plot(kind='line', marker='o', linewidth=3, 
                         color=plt.cm.tab20.colors[0], markersize=8)
     # Add points with different color
     plt.scatter(trips_per_year.index, trips_per_year.values, 
                 color=plt.cm.tab20.colors[1], s=100, zorder=5)
-    plt.title('Diplomatic Travel Trends: Number of Head of Government Trips per Year (1990-2024)',
+    plt.title(f'Diplomatic Travel Trends: Number of Head of Government Trips per Year '
+              f'({int(trips_per_year.index.min())}-{int(trips_per_year.index.max())})',
               fontsize=18, fontweight='bold')
     plt.xlabel('Year', fontsize=14)
     plt.ylabel('Number of Trips', fontsize=14)
@@ -61,16 +131,17 @@ def plot_trips_per_year():
                 fontsize=12)
     
     plt.tight_layout()
-    plt.savefig('trips_per_year.png', dpi=300)
+    plt.savefig(path or output_path('trips_per_year.png'), dpi=dpi)
     plt.close()  # Close the figure
 visualizations.append(("Trips per year", plot_trips_per_year))
 
 # 2. Top 10 destination countries with custom tab20 colors
-def plot_top_destinations():
-    top_destinations = df['CountryVisited'].value_counts().head(10)
+def plot_top_destinations(data=None, n=10, dpi=300, path=None):
+    data = df if data is None else data
+    top_destinations = top_destination_counts(data, n)
     plt.figure(figsize=(14, 8))
     bars = plt.barh(top_destinations.index[::-1], top_destinations.values[::-1], 
-                    color=plt.cm.tab20.colors[:10])
+                    color=plt.cm.tab20.colors[:n])
     
     # Add value labels
     for i, bar in enumerate(bars):
@@ -78,19 +149,20 @@ def plot_top_destinations():
                 f'{top_destinations.values[::-1][i]:,}', 
                 va='center', fontsize=12, fontweight='bold')
     
-    plt.title('Top 10 Destinations for Head of Government Diplomatic Visits', 
+    plt.title(f'Top {n} Destinations for Head of Government Diplomatic Visits', 
               fontsize=18, fontweight='bold')
     plt.xlabel('Number of Visits', fontsize=14)
     plt.ylabel('Country', fontsize=14)
     plt.grid(True, alpha=0.3, axis='x')
     plt.tight_layout()
-    plt.savefig('top_destinations.png', dpi=300)
+    plt.savefig(path or output_path('top_destinations.png'), dpi=dpi)
     plt.close()  # Close the figure
 visualizations.append(("Top destinations", plot_top_destinations))
 
 # 3. Regional travel analysis with tab20 colors
-def plot_region_visits():
-    region_visits = df['RegionVisited'].value_counts()
+def plot_region_visits(data=None, dpi=300, path=None):
+    data = df if data is None else data
+    region_visits = region_visit_counts(data)
     plt.figure(figsize=(12, 10))
     
     # Create pie chart with tab20 colors
@@ -112,24 +184,24 @@ def plot_region_visits():
               fontsize=18, fontweight='bold')
     plt.axis('equal')
     plt.tight_layout()
-    plt.savefig('region_distribution.png', dpi=300)
+    plt.savefig(path or output_path('region_distribution.png'), dpi=dpi)
     plt.close()  # Close the figure
 visualizations.append(("Region visits", plot_region_visits))
 
 # 4. Trip duration distribution with tab20 colors
-def plot_trip_duration():
+def plot_trip_duration(data=None, dpi=300, path=None):
+    data = df if data is None else data
+    durations, _, edges, mean_dur, median_dur = trip_duration_distribution(data)
     plt.figure(figsize=(14, 8))
     
     # Create histogram - Fixed to avoid kde_kws parameter issue
-    ax = sns.histplot(df['TripDuration'].dropna(), bins=30, kde=False, 
+    ax = sns.histplot(durations, bins=edges, kde=False, 
                      color=plt.cm.tab20.colors[4])
     
     # Add separate KDE line with different color
-    sns.kdeplot(df['TripDuration'].dropna(), color=plt.cm.tab20.colors[5], linewidth=3)
+    sns.kdeplot(durations, color=plt.cm.tab20.colors[5], linewidth=3)
     
     # Add statistics to the plot
-    mean_dur = df['TripDuration'].mean()
-    median_dur = df['TripDuration'].median()
     
     plt.axvline(mean_dur, color=plt.cm.tab20.colors[6], linestyle='--', linewidth=2, 
                 label=f'Mean: {mean_dur:.1f} days')
@@ -143,14 +215,15 @@ def plot_trip_duration():
     plt.legend(fontsize=12)
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
-    plt.savefig('trip_duration.png', dpi=300)
+    plt.savefig(path or output_path('trip_duration.png'), dpi=dpi)
     plt.close()  # Close the figure
 visualizations.append(("Trip duration", plot_trip_duration))
 
 # 5. Heatmap of trips between regions with custom colormap
-def plot_region_heatmap():
-    if 'LeaderRegion' in df.columns and 'RegionVisited' in df.columns:
-        region_matrix = pd.crosstab(df['LeaderRegion'], df['RegionVisited'])
+def plot_region_heatmap(data=None, dpi=300, path=None):
+    data = df if data is None else data
+    if 'LeaderRegion' in data.columns and 'RegionVisited' in data.columns:
+        region_matrix = region_flow_matrix(data)
         
         # Create a custom colormap using tab20 colors
         from matplotlib.colors import LinearSegmentedColormap
@@ -170,21 +243,19 @@ def plot_region_heatmap():
         plt.xticks(rotation=45, ha='right', fontsize=12)
         plt.yticks(fontsize=12)
         plt.tight_layout()
-        plt.savefig('region_flow_heatmap.png', dpi=300)
+        plt.savefig(path or output_path('region_flow_heatmap.png'), dpi=dpi)
         plt.close()  # Close the figure
 visualizations.append(("Region heatmap", plot_region_heatmap))
 
 # 6. Top leaders by number of trips with tab20 colors
-def plot_top_leaders():
-    # Combine leader name and country
-    df['LeaderFullInfo'] = df['LeaderFullName'] + ' (' + df['LeaderCountryOrIGO'] + ')'
-    
-    # Get top 15 leaders by number of trips
-    top_leaders = df['LeaderFullInfo'].value_counts().head(15)
+def plot_top_leaders(data=None, n=15, dpi=300, path=None):
+    data = df if data is None else data
+    # Top n leaders by number of trips, labelled with their country
+    top_leaders = top_leader_counts(data, n)
     
     plt.figure(figsize=(14, 10))
     bars = plt.barh(top_leaders.index[::-1], top_leaders.values[::-1], 
-                   color=plt.cm.tab20c.colors[:15])
+                   color=plt.cm.tab20c.colors[:n])
     
     # Add value labels
     for i, bar in enumerate(bars):
@@ -192,102 +263,152 @@ def plot_top_leaders():
                 f'{top_leaders.values[::-1][i]:,}', 
                 va='center', fontsize=11, fontweight='bold')
     
-    plt.title('Top 15 Leaders by Number of Diplomatic Trips', 
+    plt.title(f'Top {n} Leaders by Number of Diplomatic Trips', 
               fontsize=18, fontweight='bold')
     plt.xlabel('Number of Trips', fontsize=14)
     plt.ylabel('Leader', fontsize=14)
     plt.grid(True, alpha=0.3, axis='x')
     plt.tight_layout()
-    plt.savefig('top_leaders.png', dpi=300)
+    plt.savefig(path or output_path('top_leaders.png'), dpi=dpi)
     plt.close()  # Close the figure
 visualizations.append(("Top leaders", plot_top_leaders))
 
+# 7. Small multiples: visits made and received per year for every country, grouped by region
+SPARKLINE_COLUMNS = 10
+SPARKLINE_ROW_INCHES = 0.55
+SPARKLINE_PALETTE_COLORS = 64
+
+def country_year_matrix(data, column, countries, years):
+    """Trips per country (rows) and year (columns) from one grouped count"""
+    counts = data.groupby([column, 'TripYear']).size().unstack(fill_value=0)
+    return counts.reindex(index=countries, columns=years, fill_value=0).values
+
+def country_sparkline_data(data):
+    """(region per country, years, visits made, visits received) with country x year matrices"""
+    trips = data.dropna(subset=['TripYear']).assign(TripYear=lambda d: d['TripYear'].astype(int))
+    years = np.arange(trips['TripYear'].min(), trips['TripYear'].max() + 1)
+
+    # Each country's region is the one it is most often recorded with, as visitor or host;
+    # countries never recorded with a region form their own "Unknown" group
+    pairs = pd.concat([
+        trips[['LeaderCountryOrIGO', 'LeaderRegion']].set_axis(['Country', 'Region'], axis=1),
+        trips[['CountryVisited', 'RegionVisited']].set_axis(['Country', 'Region'], axis=1)
+    ]).dropna(subset=['Country'])
+    regions = (pairs.dropna().value_counts().reset_index().drop_duplicates('Country')
+               .set_index('Country')['Region'])
+    countries = pd.Index(sorted(pairs['Country'].unique()), name='Country')
+    regions = regions.reindex(countries).fillna('Unknown')
+    made = country_year_matrix(trips, 'LeaderCountryOrIGO', countries, years)
+    received = country_year_matrix(trips, 'CountryVisited', countries, years)
+    return regions, years, made, received
+
+def plot_country_sparklines(data=None, dpi=300, path=None):
+    from matplotlib.collections import LineCollection
+    from matplotlib.lines import Line2D
+    data = df if data is None else data
+    regions, years, made, received = country_sparkline_data(data)
+    countries = regions.index
+
+    # Regions in alphabetical order, countries by total visits within each region
+    panels = pd.DataFrame({'Region': regions.values, 'Total': made.sum(axis=1) + received.sum(axis=1),
+                           'Position': np.arange(len(countries))})
+    panels = panels.sort_values(['Region', 'Total'], ascending=[True, False], kind='stable')
+
+    # Cell of every panel in grid units: one column wide, one row high, a header row per region
+    left = np.empty(len(countries))
+    top = np.empty(len(countries))
+    headers = []
+    row = 0.0
+    for region, positions in panels.groupby('Region', sort=False)['Position']:
+        headers.append((region, row))
+        row += 0.6
+        index = np.arange(len(positions))
+        left[positions.values] = index % SPARKLINE_COLUMNS
+        top[positions.values] = row + index // SPARKLINE_COLUMNS
+        row += -(-len(positions) // SPARKLINE_COLUMNS)
+
+    # All sparklines as two line collections, each series scaled to its country's peak
+    peak = np.maximum(np.maximum(made.max(axis=1), received.max(axis=1)), 1)
+    x = left[:, None] + 0.05 + (years - years[0]) / max(len(years) - 1, 1) * 0.9
+    baseline = top + 0.92
+    def segments(counts):
+        y = baseline[:, None] - counts / peak[:, None] * 0.6
+        return np.stack([x, y], axis=-1)
+
+    fig = plt.figure(figsize=(14, row * SPARKLINE_ROW_INCHES + 1.2))
+    ax = fig.add_axes([0.01, 0.01, 0.98, 1 - 1.2 / (row * SPARKLINE_ROW_INCHES + 1.2)])
+    ax.add_collection(LineCollection(np.stack([np.stack([x[:, 0], baseline], axis=-1),
+                                               np.stack([x[:, -1], baseline], axis=-1)], axis=1),
+                                     colors='#dddddd', linewidths=0.5))
+    ax.add_collection(LineCollection(segments(received), colors=[plt.cm.tab20.colors[2]], linewidths=0.8))
+    ax.add_collection(LineCollection(segments(made), colors=[plt.cm.tab20.colors[0]], linewidths=0.8))
+    for country, cell_left, cell_top, country_peak in zip(countries, left, top, peak):
+        label = country if len(country) <= 18 else country[:17] + '…'
+        ax.text(cell_left + 0.05, cell_top + 0.22, f"{label} ({country_peak})", fontsize=6, va='bottom')
+    for region, header_top in headers:
+        ax.text(0.05, header_top + 0.5, region, fontsize=11, fontweight='bold', va='bottom',
+                color=plt.cm.tab20.colors[0])
+    ax.set_xlim(0, SPARKLINE_COLUMNS)
+    ax.set_ylim(row, 0)
+    ax.axis('off')
+
+    fig.suptitle(f'Visits Made and Received per Year by Country ({years[0]}-{years[-1]})',
+                 fontsize=18, fontweight='bold', y=1 - 0.35 / (row * SPARKLINE_ROW_INCHES + 1.2))
+    fig.legend(handles=[Line2D([], [], color=plt.cm.tab20.colors[0], label='Visits made'),
+                        Line2D([], [], color=plt.cm.tab20.colors[2], label='Visits received')],
+               loc='upper right', ncol=2, fontsize=10, frameon=False)
+    # Line art in a few colors: a 64-color palette PNG is a quarter of the size
+    buffer = io.BytesIO()
+    plt.savefig(buffer, dpi=dpi)
+    plt.close()  # Close the figure
+    image = Image.open(buffer).convert('RGB').quantize(SPARKLINE_PALETTE_COLORS)
+    image.save(path or output_path('country_sparklines.png'), format='PNG', optimize=True)
+visualizations.append(("Country sparklines", plot_country_sparklines))
+
 # Create a comprehensive interactive visualization
-def create_comprehensive_interactive_viz():
-    print("Creating comprehensive interactive visualization...")
-    
+def yearly_counts(data, column, keys):
+    """Trips per year for each of `keys` in a column, as {key: (years, counts)}"""
+    counts = data[data[column].isin(keys)].groupby([column, 'TripYear']).size()
+    return {key: (group.index.get_level_values('TripYear').values, group.values)
+            for key, group in counts.groupby(level=0)}
+
+def comprehensive_groups(data):
+    """The three top-15 country groups of the comprehensive view with their yearly counts"""
     # Get top 15 countries by number of visits
-    top_visited_countries = df['CountryVisited'].value_counts().head(15).index.tolist()
+    top_visited_countries = data['CountryVisited'].value_counts().head(15).index.tolist()
     
     # Get top 15 countries by number of diplomatic trips
-    top_leader_countries = df['LeaderCountryOrIGO'].value_counts().head(15).index.tolist()
+    top_leader_countries = data['LeaderCountryOrIGO'].value_counts().head(15).index.tolist()
     
     # Get top 15 countries by number of countries visited
-    country_diversity = df.groupby('LeaderCountryOrIGO')['CountryVisited'].nunique().sort_values(ascending=False).head(15)
+    country_diversity = data.groupby('LeaderCountryOrIGO')['CountryVisited'].nunique().sort_values(ascending=False).head(15)
     diverse_countries = country_diversity.index.tolist()
     
-    # Create yearly counts for all countries
-    data_frames = []
-    
-    # Process visited countries
-    for country in tqdm(top_visited_countries, desc="Processing visited countries"):
-        country_data = df[df['CountryVisited'] == country].groupby('TripYear').size().reset_index(name='Trips')
-        country_data['Country'] = country
-        country_data['Type'] = 'Visited'
-        data_frames.append(country_data)
-    
-    # Process leader countries
-    for country in tqdm(top_leader_countries, desc="Processing leader countries"):
-        country_data = df[df['LeaderCountryOrIGO'] == country].groupby('TripYear').size().reset_index(name='Trips')
-        country_data['Country'] = country
-        country_data['Type'] = 'Visiting'
-        data_frames.append(country_data)
-    
-    # Process diverse countries
-    for country in tqdm(diverse_countries, desc="Processing diverse countries"):
-        country_data = df[df['LeaderCountryOrIGO'] == country].groupby('TripYear').size().reset_index(name='Trips')
-        country_data['Country'] = country
-        country_data['Type'] = 'Diverse'
-        data_frames.append(country_data)
-    
-    combined_df = pd.concat(data_frames)
-    
-    # Create the figure with tabs for different visualizations
-    fig = go.Figure()
-    
-    # Create three separate visualizations
-    
-    # 1. Top 15 Visited Countries - All visible by default
-    for country in top_visited_countries:
-        country_data = combined_df[(combined_df['Country'] == country) & (combined_df['Type'] == 'Visited')]
-        fig.add_trace(
-            go.Scatter(
-                x=country_data['TripYear'],
-                y=country_data['Trips'],
-                mode='lines+markers',
-                name=f"{country} (Visited)",
-                visible=True,  # Show all by default
-                line=dict(width=3)
-            )
-        )
+    # Yearly counts for each group of countries, one groupby per group
+    return [
+        (top_visited_countries, yearly_counts(data, 'CountryVisited', top_visited_countries), 'Visited'),
+        (top_leader_countries, yearly_counts(data, 'LeaderCountryOrIGO', top_leader_countries), 'Visiting'),
+        (diverse_countries, yearly_counts(data, 'LeaderCountryOrIGO', diverse_countries), 'Diverse'),
+    ]
+
+def create_comprehensive_interactive_viz():
+    print("Creating comprehensive interactive visualization...")
     
-    # 2. Top 15 Countries by Number of Diplomatic Trips
-    for country in top_leader_countries:
-        country_data = combined_df[(combined_df['Country'] == country) & (combined_df['Type'] == 'Visiting')]
-        fig.add_trace(
-            go.Scatter(
-                x=country_data['TripYear'],
-                y=country_data['Trips'],
-                mode='lines+markers',
-                name=f"{country} (Visiting)",
-                visible=False,  # Hide initially
-                line=dict(width=3)
-            )
-        )
+    groups = comprehensive_groups(df)
+    top_visited_countries, top_leader_countries = groups[0][0], groups[1][0]
     
-    # 3. Top 15 Countries by Diversity of Countries Visited
-    for country in diverse_countries:
-        country_data = combined_df[(combined_df['Country'] == country) & (combined_df['Type'] == 'Diverse')]
-        fig.add_trace(
-            go.Scatter(
-                x=country_data['TripYear'],
-                y=country_data['Trips'],
+    # Plain trace dicts: the first group is visible by default, the others are hidden initially
+    traces = []
+    for i, (countries, counts, label) in enumerate(groups):
+        for country in countries:
+            years, trips = counts.get(country, ([], []))
+            traces.append(scatter_trace(
+                years, trips,
                 mode='lines+markers',
-                name=f"{country} (Diverse)",
-                visible=False,  # Hide initially
+                name=f"{country} ({label})",
+                visible=(i == 0),
                 line=dict(width=3)
-            )
-        )
+            ))
     
     # Create buttons for category selection
     buttons = [
@@ -295,7 +416,7 @@ def create_comprehensive_interactive_viz():
             label="<b>Top 15 Visited Countries</b>",
             method="update",
             args=[
-                {"visible": [i < len(top_visited_countries) for i in range(len(fig.data))]},
+                {"visible": [i < len(top_visited_countries) for i in range(len(traces))]},
                 {"title": "Top 15 Most Visited Countries (1990-2024)"}
             ]
         ),
@@ -303,7 +424,7 @@ def create_comprehensive_interactive_viz():
             label="<b>Top 15 Visiting Countries</b>",
             method="update",
             args=[
-                {"visible": [len(top_visited_countries) <= i < len(top_visited_countries) + len(top_leader_countries) for i in range(len(fig.data))]},
+                {"visible": [len(top_visited_countries) <= i < len(top_visited_countries) + len(top_leader_countries) for i in range(len(traces))]},
                 {"title": "Top 15 Countries by Number of Diplomatic Trips (1990-2024)"}
             ]
         ),
@@ -311,19 +432,17 @@ def create_comprehensive_interactive_viz():
             label="<b>Top 15 Most Diverse Countries</b>",
             method="update",
             args=[
-                {"visible": [i >= len(top_visited_countries) + len(top_leader_countries) for i in range(len(fig.data))]},
+                {"visible": [i >= len(top_visited_countries) + len(top_leader_countries) for i in range(len(traces))]},
                 {"title": "Top 15 Countries by Diversity of Destinations (1990-2024)"}
             ]
         )
     ]
     
-    # Update layout with menus
-    fig.update_layout(
-        title="Top 15 Most Visited Countries (1990-2024)",
-        title_font_size=24,
-        xaxis_title="Year",
-        yaxis_title="Number of Trips",
-        template="plotly_white",
+    # Layout with menus
+    fig = figure_dict(traces, template="plotly_white", layout=dict(
+        title=dict(text="Top 15 Most Visited Countries (1990-2024)", font=dict(size=24)),
+        xaxis=dict(title=dict(text="Year")),
+        yaxis=dict(title=dict(text="Number of Trips")),
         height=700,
         width=1100,
         legend=dict(
@@ -359,14 +478,20 @@ def create_comprehensive_interactive_viz():
                 font=dict(size=16, color="royalblue")
             )
         ]
-    )
+    ))
     
     # Save the figure
-    fig.write_html("comprehensive_trips_viz.html")
+    write_figure_html(fig, output_path("comprehensive_trips_viz.html"), typed_arrays=ENCODE_TYPED_ARRAYS)
     return fig
 
 # Create an improved country-pair visualization with dyadic selection
-import json  # Add this at the top of your file if not already there
+def dyad_year_counts(data, visiting=None, visited=None):
+    """Trips per (visiting country, visited country, year), optionally for given countries only"""
+    if visiting is not None:
+        data = data[data['LeaderCountryOrIGO'].isin(visiting)]
+    if visited is not None:
+        data = data[data['CountryVisited'].isin(visited)]
+    return data.groupby(['LeaderCountryOrIGO', 'CountryVisited', 'TripYear']).size()
 
 def create_country_pair_viz():
     print("Creating improved country pair visualization for dyadic analysis...")
@@ -379,37 +504,20 @@ def create_country_pair_viz():
     top_visiting = df['LeaderCountryOrIGO'].value_counts().head(15).index.tolist()
     top_visited = df['CountryVisited'].value_counts().head(15).index.tolist()
     
-    # Create figure with subplot for dropdown controls
-    fig = make_subplots(rows=1, cols=1)
-    
     # Dictionary to store dyad data
     dyad_data = {}
     
-    # Process top dyads for initial display
+    # Process top dyads for initial display, from a single groupby over the 5 x 5 candidates
     print("Processing initial dyads...")
-    for visiting in tqdm(top_visiting[:5]):
+    pair_counts = dyad_year_counts(df, top_visiting[:5], top_visited[:5])
+    pair_groups = {key: group for key, group in pair_counts.groupby(level=[0, 1])}
+    for visiting in top_visiting[:5]:
         for visited in top_visited[:5]:
-            if visiting == visited:
+            if visiting == visited or (visiting, visited) not in pair_groups:
                 continue
-                
-            pair_df = df[(df['LeaderCountryOrIGO'] == visiting) & (df['CountryVisited'] == visited)]
-            if len(pair_df) > 0:
-                yearly = pair_df.groupby('TripYear').size().reset_index(name='Visits')
-                pair_name = f"{visiting} → {visited}"
-                
-                # Store data for this dyad
-                dyad_data[(visiting, visited)] = yearly
-                
-                # Add trace
-                fig.add_trace(
-                    go.Scatter(
-                        x=yearly['TripYear'],
-                        y=yearly['Visits'],
-                        mode='lines+markers',
-                        name=pair_name,
-                        line=dict(width=3)
-                    )
-                )
+            yearly = pair_groups[(visiting, visited)]
+            # Store data for this dyad
+            dyad_data[(visiting, visited)] = (yearly.index.get_level_values('TripYear').values, yearly.values)
     
     # Create HTML with JavaScript for dynamic dyad selection
     # This will allow for any visiting/visited country selection
@@ -418,7 +526,7 @@ def create_country_pair_viz():
     <html>
     <head>
         <title>Country Pair Analysis</title>
-        <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
+        <script src="{{ PLOTLY_CDN_URL }}"></script>
         <style>
             body {
                 font-family: Arial, sans-serif;
@@ -523,13 +631,18 @@ def create_country_pair_viz():
         </div>
         
         <script>
+            {{ DECODE_JS }}
+            
             // Store the data for pre-processed dyads
-            const dyadData = {
-                {{ DYAD_DATA }}
-            };
+            const dyadData = decodeTypedArrays({{ DYAD_DATA }});
             
             // Initial plot data
-            const initialData = {{ INITIAL_DATA }};
+            const initialData = decodeTypedArrays({{ INITIAL_DATA }});
+            
+            // Dyad values may be plain arrays, typed arrays or a single number
+            function asArray(values) {
+                return (Array.isArray(values) || ArrayBuffer.isView(values)) ? values : [values];
+            }
             
             // Create initial plot
             const layout = {
@@ -563,8 +676,8 @@ def create_country_pair_viz():
                 if (dyadData[pairKey]) {
                     // Update the plot with pre-computed data, ensuring x and y are arrays
                     const trace = {
-                        x: Array.isArray(dyadData[pairKey].x) ? dyadData[pairKey].x : [dyadData[pairKey].x],
-                        y: Array.isArray(dyadData[pairKey].y) ? dyadData[pairKey].y : [dyadData[pairKey].y],
+                        x: asArray(dyadData[pairKey].x),
+                        y: asArray(dyadData[pairKey].y),
                         mode: 'lines+markers',
                         name: `${visitingCountry} → ${visitedCountry}`,
                         line: { width: 3 }
@@ -632,64 +745,65 @@ def create_country_pair_viz():
                 top_pairs.append((visiting, visited))
     
     # Generate JavaScript data object for pre-computed dyads
-    dyad_js_data = ""
-    for (visiting, visited), data in dyad_data.items():
-        key = f"{visiting}_{visited}"        
-        x_values = json.dumps(data['TripYear'].tolist())
-        y_values = json.dumps(data['Visits'].tolist())
-        dyad_js_data += f'"{key}": {{ "x": {x_values}, "y": {y_values} }},\n'
+    dyad_js_data = {}
+    for (visiting, visited), (years, visits) in dyad_data.items():
+        key = f"{visiting}_{visited}"
+        dyad_js_data[key] = {
+            "x": encode_values(years),
+            "y": encode_values(visits)
+        }
     
     # Create initial data JSON for Plotly
-    initial_data = "["
-    for i, (visiting, visited) in enumerate(list(dyad_data.keys())[:5]):  # First 5 pairs
-        data = dyad_data[(visiting, visited)]
-        x_values = data['TripYear'].tolist()
-        y_values = data['Visits'].tolist()
-        
-        initial_data += f"""
-        {{
-            "x": {x_values},
-            "y": {y_values},
+    initial_data = []
+    for visiting, visited in list(dyad_data.keys())[:5]:  # First 5 pairs
+        years, visits = dyad_data[(visiting, visited)]
+        initial_data.append({
+            "x": encode_values(years),
+            "y": encode_values(visits),
             "mode": "lines+markers",
-            "name": "{visiting} → {visited}",
-            "line": {{ "width": 3 }}
-        }}{"," if i < 4 else ""}
-        """
-    initial_data += "]"
+            "name": f"{visiting} → {visited}",
+            "line": {"width": 3}
+        })
     
     # Replace placeholders
     html_content = html_template
     html_content = html_content.replace("{{ VISITING_OPTIONS }}", visiting_options)
     html_content = html_content.replace("{{ VISITED_OPTIONS }}", visited_options)
     html_content = html_content.replace("{{ PAIR_OPTIONS }}", pair_options)
-    html_content = html_content.replace("{{ DYAD_DATA }}", dyad_js_data)
-    html_content = html_content.replace("{{ INITIAL_DATA }}", initial_data)
+    html_content = html_content.replace("{{ PLOTLY_CDN_URL }}", PLOTLY_CDN_URL)
+    html_content = html_content.replace("{{ DECODE_JS }}", DECODE_JS)
+    html_content = html_content.replace("{{ DYAD_DATA }}", to_json(dyad_js_data))
+    html_content = html_content.replace("{{ INITIAL_DATA }}", to_json(initial_data))
     
-    # Write HTML to file - FIXED: Save to static directory
-    with open("static/country_pair_viz.html", "w") as f:
+    # Write HTML to file in the build directory
+    with open(output_path("country_pair_viz.html"), "w", encoding="utf-8") as f:
         f.write(html_content)
     
     print("Dynamic country pair visualization created")
-    return fig
+    return initial_data
 
 # Create leader timeline visualization
-def create_leader_timeline():
-    print("Creating leader timeline visualization...")
-    
-    # Get top 15 leaders by number of trips
-    df['LeaderFullInfo'] = df['LeaderFullName'] + ' (' + df['LeaderCountryOrIGO'] + ')'
-    top_leaders = df['LeaderFullInfo'].value_counts().head(15)
+def leader_timeline_data(data, n=15):
+    """Trips per year of the top n leaders as [TripYear, Trips, Leader] rows"""
+    # Get top n leaders by number of trips
+    leader_full_info = data['LeaderFullName'] + ' (' + data['LeaderCountryOrIGO'] + ')'
+    top_leaders = leader_full_info.value_counts().head(n)
     
     leader_data = []
     
     # Process data for each top leader
     for leader in tqdm(top_leaders.index, desc="Processing leaders"):
-        leader_df = df[df['LeaderFullInfo'] == leader]
+        leader_df = data[leader_full_info == leader]
         yearly_data = leader_df.groupby('TripYear').size().reset_index(name='Trips')
         yearly_data['Leader'] = leader
         leader_data.append(yearly_data)
     
-    combined_leaders = pd.concat(leader_data)
+    return pd.concat(leader_data)
+
+def create_leader_timeline():
+    print("Creating leader timeline visualization...")
+    
+    combined_leaders = leader_timeline_data(df)
     
     # Create interactive figure
     fig = px.line(
@@ -713,19 +827,321 @@ def create_leader_timeline():
     )
     
     # Save the figure
-    fig.write_html("leader_timeline_viz.html")
+    write_figure_html(fig, output_path("leader_timeline_viz.html"), typed_arrays=ENCODE_TYPED_ARRAYS)
     return fig
 
-# Create diplomatic diversity visualization
-def create_diversity_viz():
-    print("Creating diplomatic diversity visualization...")
+# Create searchable timeline for every leader
+def create_leader_search_viz():
+    print("Creating leader search visualization...")
+    
+    # Prefix/trigram search index and yearly series for all leaders, loaded by the page on demand
+    leader_index = build_leader_index(df)
+    with open(output_path(LEADER_INDEX_FILENAME), "w", encoding="utf-8") as f:
+        f.write(to_json(leader_index))
+    
+    html_template = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <title>Leader Search</title>
+        <script src="{{ PLOTLY_CDN_URL }}"></script>
+        <style>
+            body {
+                font-family: Arial, sans-serif;
+                margin: 20px;
+                background-color: #f5f5f5;
+            }
+            .container {
+                max-width: 1200px;
+                margin: 0 auto;
+                background-color: white;
+                padding: 20px;
+                border-radius: 8px;
+                box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+            }
+            h1 {
+                color: #333;
+                text-align: center;
+            }
+            .control-panel {
+                position: relative;
+                padding: 15px;
+                background-color: #eef6ff;
+                border-radius: 5px;
+                margin-bottom: 20px;
+            }
+            .control-panel label {
+                font-weight: bold;
+                color: #0066cc;
+            }
+            #leaderQuery {
+                width: 100%;
+                box-sizing: border-box;
+                padding: 8px;
+                margin-top: 5px;
+                border-radius: 4px;
+                border: 1px solid #ccc;
+                font-size: 1em;
+            }
+            #suggestions {
+                position: absolute;
+                left: 15px;
+                right: 15px;
+                background: white;
+                border: 1px solid #ccc;
+                border-top: none;
+                max-height: 300px;
+                overflow-y: auto;
+                z-index: 10;
+            }
+            .suggestion {
+                padding: 6px 10px;
+                cursor: pointer;
+            }
+            .suggestion:hover, .suggestion.active {
+                background-color: #eef6ff;
+            }
+            .suggestion .trips {
+                float: right;
+                color: #666;
+            }
+            #searchStats {
+                color: #666;
+                font-size: 0.85em;
+                margin-top: 5px;
+            }
+            .chip {
+                display: inline-block;
+                padding: 4px 10px;
+                margin: 5px 5px 0 0;
+                background-color: #0066cc;
+                color: white;
+                border-radius: 12px;
+                cursor: pointer;
+            }
+            #plotContainer {
+                height: 600px;
+            }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1>Leader Search</h1>
+            <div class="description">
+                Search any of the leaders in the dataset by name or country and add them to the chart.
+                Click a selected leader to remove it.
+            </div>
+            
+            <div class="control-panel">
+                <label for="leaderQuery">Find a leader:</label>
+                <input id="leaderQuery" type="text" autocomplete="off" placeholder="Loading leader index..." disabled>
+                <div id="suggestions"></div>
+                <div id="searchStats"></div>
+                <div id="selectedLeaders"></div>
+            </div>
+            
+            <div id="plotContainer"></div>
+        </div>
+        
+        <script>
+            {{ DECODE_JS }}
+            {{ ESCAPE_HTML_JS }}
+            {{ NORMALIZE_QUERY_JS }}
+            
+            const MAX_SUGGESTIONS = 15;
+            let index = null;
+            let selected = [];
+            let activeSuggestion = 0;
+            let suggestions = [];
+            
+            function lowerBound(sorted, key) {
+                let lo = 0, hi = sorted.length;
+                while (lo < hi) {
+                    const mid = (lo + hi) >> 1;
+                    if (sorted[mid] < key) lo = mid + 1; else hi = mid;
+                }
+                return lo;
+            }
+            
+            function postings(offsets, ids, k) {
+                return ids.slice(offsets[k], offsets[k + 1]);
+            }
+            
+            function trigramHits(text) {
+                const grams = new Set();
+                for (let i = 0; i + 3 <= text.length; i++) grams.add(text.slice(i, i + 3));
+                const hits = new Map();
+                for (const gram of grams) {
+                    const k = lowerBound(index.trigrams, gram);
+                    if (index.trigrams[k] !== gram) continue;
+                    for (const id of postings(index.trigramOffsets, index.trigramIds, k)) {
+                        hits.set(id, (hits.get(id) || 0) + 1);
+                    }
+                }
+                return [hits, grams.size];
+            }
+            
+            function wordMatches(word) {
+                const matches = new Map();
+                if (word.length < 3) {
+                    // Short words: every token starting with the word (binary search over sorted tokens)
+                    for (let k = lowerBound(index.tokens, word); k < index.tokens.length && index.tokens[k].startsWith(word); k++) {
+                        for (const id of postings(index.tokenOffsets, index.tokenIds, k)) matches.set(id, 2);
+                    }
+                } else {
+                    // Longer words: candidates share every trigram, then the substring is verified
+                    const [hits, total] = trigramHits(word);
+                    for (const [id, count] of hits) {
+                        const text = index.search[id];
+                        if (count === total && text.includes(word)) {
+                            matches.set(id, (' ' + text).includes(' ' + word) ? 2 : 1);
+                        }
+                    }
+                }
+                return matches;
+            }
+            
+            function searchLeaders(query) {
+                const q = normalizeQuery(query);
+                if (!q) return [];
+                // Every word of the query has to match; word-start matches score higher
+                let scores = null;
+                for (const word of q.split(' ')) {
+                    const matches = wordMatches(word);
+                    const combined = new Map();
+                    for (const [id, score] of matches) {
+                        if (scores === null || scores.has(id)) combined.set(id, (scores ? scores.get(id) : 0) + score);
+                    }
+                    scores = combined;
+                }
+                // Too few exact hits: fall back to fuzzy trigram similarity (typos, missing letters)
+                if (scores.size < MAX_SUGGESTIONS && q.length >= 3) {
+                    const [hits, total] = trigramHits(q);
+                    for (const [id, count] of hits) {
+                        if (!scores.has(id) && count >= 0.6 * total) scores.set(id, count / total - 1);
+                    }
+                }
+                // Leader ids are ordered by total trips, so ties favour the most active leaders
+                return Array.from(scores.keys()).sort((a, b) => (scores.get(b) - scores.get(a)) || (a - b));
+            }
+            
+            function leaderSeries(id) {
+                const start = index.series.offsets[id], end = index.series.offsets[id + 1];
+                return { x: index.series.years.slice(start, end), y: index.series.trips.slice(start, end) };
+            }
+            
+            function leaderLabel(id) {
+                return escapeHtml(`${index.leaders.name[id]} (${index.leaders.country[id]})`);
+            }
+            
+            function renderSuggestions() {
+                document.getElementById('suggestions').innerHTML = suggestions.slice(0, MAX_SUGGESTIONS).map((id, i) =>
+                    `<div class="suggestion${i === activeSuggestion ? ' active' : ''}" onmousedown="addLeader(${id})">` +
+                    `${leaderLabel(id)}<span class="trips">${index.leaders.trips[id]} trips</span></div>`
+                ).join('');
+            }
+            
+            function onQuery() {
+                const started = performance.now();
+                suggestions = searchLeaders(document.getElementById('leaderQuery').value);
+                const elapsed = performance.now() - started;
+                activeSuggestion = 0;
+                renderSuggestions();
+                document.getElementById('searchStats').textContent = document.getElementById('leaderQuery').value
+                    ? `${suggestions.length} matches in ${elapsed.toFixed(1)} ms` : '';
+            }
+            
+            function onKey(event) {
+                const shown = Math.min(suggestions.length, MAX_SUGGESTIONS);
+                if (event.key === 'ArrowDown' && shown) {
+                    activeSuggestion = (activeSuggestion + 1) % shown;
+                } else if (event.key === 'ArrowUp' && shown) {
+                    activeSuggestion = (activeSuggestion + shown - 1) % shown;
+                } else if (event.key === 'Enter' && shown) {
+                    addLeader(suggestions[activeSuggestion]);
+                    return;
+                } else {
+                    return;
+                }
+                event.preventDefault();
+                renderSuggestions();
+            }
+            
+            function addLeader(id) {
+                if (id === undefined) return;
+                if (!selected.includes(id)) selected.push(id);
+                document.getElementById('leaderQuery').value = '';
+                suggestions = [];
+                renderSuggestions();
+                document.getElementById('searchStats').textContent = '';
+                renderPlot();
+            }
+            
+            function removeLeader(id) {
+                selected = selected.filter(s => s !== id);
+                renderPlot();
+            }
+            
+            function renderPlot() {
+                document.getElementById('selectedLeaders').innerHTML = selected.map(id =>
+                    `<span class="chip" onclick="removeLeader(${id})">${leaderLabel(id)} ✕</span>`
+                ).join('');
+                const traces = selected.map(id => Object.assign(leaderSeries(id), {
+                    mode: 'lines+markers',
+                    name: `${index.leaders.name[id]} (${index.leaders.country[id]})`,
+                    line: { width: 3 }
+                }));
+                Plotly.react('plotContainer', traces, {
+                    title: 'Diplomatic Activity of Selected Leaders Over Time',
+                    xaxis: { title: 'Year' },
+                    yaxis: { title: 'Number of Trips' },
+                    hovermode: 'closest',
+                    template: 'plotly_white'
+                });
+            }
+            
+            fetch('{{ LEADER_INDEX_FILE }}')
+                .then(response => response.json())
+                .then(data => {
+                    index = decodeTypedArrays(data);
+                    const input = document.getElementById('leaderQuery');
+                    input.disabled = false;
+                    input.placeholder = `Search ${index.leaders.name.length.toLocaleString()} leaders by name or country...`;
+                    input.addEventListener('input', onQuery);
+                    input.addEventListener('keydown', onKey);
+                    input.addEventListener('blur', () => { suggestions = []; renderSuggestions(); });
+                    // Start with the five most active leaders
+                    selected = [0, 1, 2, 3, 4].filter(id => id < index.leaders.name.length);
+                    renderPlot();
+                });
+        </script>
+    </body>
+    </html>
+    """
+    
+    html_content = html_template
+    html_content = html_content.replace("{{ PLOTLY_CDN_URL }}", PLOTLY_CDN_URL)
+    html_content = html_content.replace("{{ DECODE_JS }}", DECODE_JS)
+    html_content = html_content.replace("{{ ESCAPE_HTML_JS }}", ESCAPE_HTML_JS)
+    html_content = html_content.replace("{{ NORMALIZE_QUERY_JS }}", NORMALIZE_QUERY_JS)
+    html_content = html_content.replace("{{ LEADER_INDEX_FILE }}", LEADER_INDEX_FILENAME)
+    
+    with open(output_path("leader_search_viz.html"), "w", encoding="utf-8") as f:
+        f.write(html_content)
     
+    print(f"Leader search visualization created ({len(leader_index['search'])} leaders indexed)")
+    return leader_index
+
+# Create diplomatic diversity visualization
+def compute_yearly_diversity(data=None):
     # Calculate diversity metrics by year and country
+    data = df if data is None else data
     yearly_diversity = []
     
     # Process data by year
-    for year in tqdm(sorted(df['TripYear'].unique()), desc="Processing years"):
-        year_df = df[df['TripYear'] == year]
+    for year in tqdm(sorted(data['TripYear'].unique()), desc="Processing years"):
+        year_df = data[data['TripYear'] == year]
         
         # Calculate for each country
         for country in year_df['LeaderCountryOrIGO'].unique():
@@ -749,7 +1165,12 @@ def create_diversity_viz():
                 'AvgDuration': avg_duration
             })
     
-    diversity_df = pd.DataFrame(yearly_diversity)
+    return pd.DataFrame(yearly_diversity)
+
+def create_diversity_viz():
+    print("Creating diplomatic diversity visualization...")
+    
+    diversity_df = compute_yearly_diversity(df)
 
     # Get top 15 countries by total unique destinations
     country_totals = diversity_df.groupby('Country')['UniqueDestinations'].sum().sort_values(ascending=False).head(15)
@@ -784,58 +1205,1000 @@ def create_diversity_viz():
     )
     
     # Save the figure
-    fig.write_html("diversity_viz.html")
+    write_figure_html(fig, output_path("diversity_viz.html"), typed_arrays=ENCODE_TYPED_ARRAYS)
     return fig
 
-# Create a comprehensive dashboard HTML
-def create_complete_dashboard():
-    print("Creating comprehensive dashboard HTML...")
-    html_content = """
+# Create WebGL diversity bubble chart covering every country
+DIVERSITY_COLOR_BINS = 8
+DIVERSITY_SIZE_MAX = 40
+
+def create_diversity_gl_viz():
+    print("Creating all-country diplomatic diversity visualization...")
+    
+    diversity_df = compute_yearly_diversity(df)
+    countries = sorted(diversity_df['Country'].unique())
+    country_index = {country: i for i, country in enumerate(countries)}
+    
+    # Per-country attributes used by the client-side sort and filter controls
+    regions = df.groupby('LeaderCountryOrIGO')['LeaderRegion'].agg(
+        lambda r: r.value_counts().index[0] if r.notna().any() else 'Unknown'
+    ) if 'LeaderRegion' in df.columns else pd.Series(dtype=object)
+    country_regions = regions.reindex(countries).fillna('Unknown')
+    region_names = sorted(set(country_regions))
+    totals = diversity_df.groupby('Country').agg(
+        TotalTrips=('TotalTrips', 'sum'), UniqueDestinations=('UniqueDestinations', 'sum')
+    ).reindex(countries)
+    
+    # Marker sizes are precomputed in pixels (area proportional to trips, like px.scatter)
+    sizes = np.sqrt(diversity_df['TotalTrips'] / diversity_df['TotalTrips'].max()) * DIVERSITY_SIZE_MAX
+    sizes = np.maximum(np.round(sizes), 2).astype(np.uint8)
+    
+    # Color bins over unique destinations with integer edges at quantiles
+    destinations = diversity_df['UniqueDestinations'].values
+    quantiles = np.ceil(np.quantile(destinations, np.linspace(0, 1, DIVERSITY_COLOR_BINS + 1)[:-1]))
+    edges = np.unique(np.append(quantiles, destinations.max() + 1)).astype(int)
+    bins = np.clip(np.searchsorted(edges, destinations, side='right') - 1, 0, len(edges) - 2)
+    bin_labels = []
+    for low, high in zip(edges[:-1], edges[1:] - 1):
+        bin_labels.append(str(low) if low == high else f"{low}-{high}")
+    
+    gl_data = {
+        "countries": countries,
+        "regions": region_names,
+        "countryRegion": encode_values(country_regions.map(region_names.index).values),
+        "countryTrips": encode_values(totals['TotalTrips'].values),
+        "countryDestinations": encode_values(totals['UniqueDestinations'].values),
+        "year": encode_values(diversity_df['Year'].astype(int).values),
+        "country": encode_values(diversity_df['Country'].map(country_index).values),
+        "size": encode_values(sizes.values),
+        "colorBin": encode_values(bins.astype(np.uint8)),
+        "binLabels": bin_labels,
+        "trips": encode_values(diversity_df['TotalTrips'].values),
+        "destinations": encode_values(diversity_df['UniqueDestinations'].values),
+        "avgDuration": encode_values(diversity_df['AvgDuration'].values.astype(np.float32))
+    }
+    
+    html_template = """
     <!DOCTYPE html>
     <html>
     <head>
-        <title>COLT Dataset Analysis Dashboard</title>
+        <meta charset="utf-8">
+        <title>Diplomatic Diversity of All Countries</title>
+        <script src="{{ PLOTLY_CDN_URL }}"></script>
         <style>
             body {
                 font-family: Arial, sans-serif;
+                margin: 20px;
+                background-color: #f5f5f5;
+            }
+            .container {
                 max-width: 1200px;
                 margin: 0 auto;
+                background-color: white;
                 padding: 20px;
-                background-color: #f5f5f5;
-            }
-            h1, h2, h3 {
-                color: #333;
+                border-radius: 8px;
+                box-shadow: 0 2px 5px rgba(0,0,0,0.1);
             }
             h1 {
+                color: #333;
                 text-align: center;
-                padding: 20px 0;
-                border-bottom: 2px solid #ddd;
             }
-            .section {
-                background: white;
-                padding: 20px;
-                margin: 20px 0;
-                border-radius: 8px;
-                box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+            .control-panel {
+                display: flex;
+                justify-content: space-around;
+                align-items: center;
+                padding: 15px;
+                background-color: #eef6ff;
+                border-radius: 5px;
+                margin-bottom: 20px;
             }
-            .viz-container {
-                margin-top: 30px;
+            .selector-group {
+                display: flex;
+                flex-direction: column;
+                margin: 0 10px;
             }
-            .img-container {
-                margin: 20px 0;
-                text-align: center;
+            .selector-group label {
+                font-weight: bold;
+                margin-bottom: 5px;
+                color: #0066cc;
             }
-            .img-container img {
-                max-width: 100%;
-                height: auto;
+            select, input {
+                padding: 8px;
                 border-radius: 4px;
-                box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+                border: 1px solid #ccc;
+                min-width: 150px;
             }
-            iframe {
-                width: 100%;
-                height: 700px;
-                border: none;
-                margin: 20px 0;
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1>Diplomatic Diversity of All Countries</h1>
+            <div class="description">
+                Every country and year in one WebGL chart: bubble size shows total trips and color the number
+                of unique destinations. Sorting and filtering only reorder the rows; the data is never reloaded.
+            </div>
+            
+            <div class="control-panel">
+                <div class="selector-group">
+                    <label for="sortSelect">Sort countries by:</label>
+                    <select id="sortSelect" onchange="updateView()">
+                        <option value="destinations">Total unique destinations</option>
+                        <option value="trips">Total trips</option>
+                        <option value="name">Name</option>
+                        <option value="region">Region</option>
+                    </select>
+                </div>
+                <div class="selector-group">
+                    <label for="regionSelect">Region:</label>
+                    <select id="regionSelect" onchange="updateView()">
+                        <option value="-1">All regions</option>
+                    </select>
+                </div>
+                <div class="selector-group">
+                    <label for="minTrips">Minimum total trips:</label>
+                    <input id="minTrips" type="number" min="0" value="0" onchange="updateView()">
+                </div>
+                <div class="selector-group">
+                    <label for="nameFilter">Country name contains:</label>
+                    <input id="nameFilter" type="text" oninput="updateView()">
+                </div>
+            </div>
+            
+            <div id="plotContainer"></div>
+        </div>
+        
+        <script>
+            {{ DECODE_JS }}
+            {{ ESCAPE_HTML_JS }}
+            
+            const gl = decodeTypedArrays({{ GL_DATA }});
+            const ROW_HEIGHT = 14;
+            
+            document.getElementById('regionSelect').innerHTML += gl.regions
+                .map((r, i) => `<option value="${i}">${escapeHtml(r)}</option>`).join('');
+            
+            // Hover text is built once; filtering only picks points by index
+            const hoverText = Array.from(gl.year.keys()).map(i =>
+                `${gl.countries[gl.country[i]]}, ${gl.year[i]}<br>Trips: ${gl.trips[i]}` +
+                `<br>Unique destinations: ${gl.destinations[i]}` +
+                `<br>Avg duration: ${isNaN(gl.avgDuration[i]) ? 'n/a' : gl.avgDuration[i].toFixed(1)} days`
+            );
+            
+            function rowOrder() {
+                const region = parseInt(document.getElementById('regionSelect').value);
+                const minTrips = parseInt(document.getElementById('minTrips').value) || 0;
+                const nameFilter = document.getElementById('nameFilter').value.toLowerCase();
+                const rows = Array.from(gl.countries.keys()).filter(c =>
+                    (region < 0 || gl.countryRegion[c] === region) &&
+                    gl.countryTrips[c] >= minTrips &&
+                    (!nameFilter || gl.countries[c].toLowerCase().includes(nameFilter))
+                );
+                const sort = document.getElementById('sortSelect').value;
+                const comparators = {
+                    destinations: (a, b) => gl.countryDestinations[a] - gl.countryDestinations[b],
+                    trips: (a, b) => gl.countryTrips[a] - gl.countryTrips[b],
+                    name: (a, b) => gl.countries[b].localeCompare(gl.countries[a]),
+                    region: (a, b) => (gl.countryRegion[b] - gl.countryRegion[a]) || gl.countries[b].localeCompare(gl.countries[a])
+                };
+                // Rows are drawn bottom-up, so the first row in sort order ends at the top
+                return rows.sort(comparators[sort]);
+            }
+            
+            function updateView() {
+                const rows = rowOrder();
+                const position = new Int16Array(gl.countries.length).fill(-1);
+                rows.forEach((c, i) => { position[c] = i; });
+                
+                const points = [];
+                for (let i = 0; i < gl.country.length; i++) {
+                    if (position[gl.country[i]] >= 0) points.push(i);
+                }
+                const x = new Int16Array(points.length), y = new Int16Array(points.length);
+                const size = new Uint8Array(points.length), color = new Uint8Array(points.length);
+                const text = new Array(points.length);
+                points.forEach((p, j) => {
+                    x[j] = gl.year[p];
+                    y[j] = position[gl.country[p]];
+                    size[j] = gl.size[p];
+                    color[j] = gl.colorBin[p];
+                    text[j] = hoverText[p];
+                });
+                
+                const trace = {
+                    type: 'scattergl',
+                    mode: 'markers',
+                    x: x,
+                    y: y,
+                    text: text,
+                    hoverinfo: 'text',
+                    marker: {
+                        size: size,
+                        color: color,
+                        colorscale: 'Viridis',
+                        cmin: 0,
+                        cmax: Math.max(gl.binLabels.length - 1, 1),
+                        opacity: 0.8,
+                        colorbar: {
+                            title: 'Unique Destinations',
+                            tickvals: gl.binLabels.map((_, i) => i),
+                            ticktext: gl.binLabels
+                        }
+                    }
+                };
+                Plotly.react('plotContainer', [trace], {
+                    title: `Diplomatic Diversity: ${rows.length} Countries`,
+                    xaxis: { title: 'Year' },
+                    yaxis: {
+                        title: 'Country',
+                        tickvals: rows.map((_, i) => i),
+                        ticktext: rows.map(c => gl.countries[c]),
+                        range: [-1, rows.length],
+                        automargin: true
+                    },
+                    height: Math.max(500, rows.length * ROW_HEIGHT + 150),
+                    hovermode: 'closest',
+                    template: 'plotly_white'
+                });
+            }
+            
+            updateView();
+        </script>
+    </body>
+    </html>
+    """
+    
+    html_content = html_template
+    html_content = html_content.replace("{{ PLOTLY_CDN_URL }}", PLOTLY_CDN_URL)
+    html_content = html_content.replace("{{ DECODE_JS }}", DECODE_JS)
+    html_content = html_content.replace("{{ ESCAPE_HTML_JS }}", ESCAPE_HTML_JS)
+    html_content = html_content.replace("{{ GL_DATA }}", to_json(gl_data))
+    
+    with open(output_path("diversity_all_viz.html"), "w", encoding="utf-8") as f:
+        f.write(html_content)
+    
+    print(f"All-country diversity visualization created ({len(diversity_df)} points)")
+    return diversity_df
+
+# Create rolling-window diversity and concentration visualization
+def create_rolling_diversity_viz():
+    print("Creating rolling diversity visualization...")
+    
+    # 3- and 5-year windows for every leader country, updated incrementally per year
+    metrics = compute_rolling_diversity(df, windows=(3, 5))
+    countries = sorted(metrics['Country'].unique())
+    country_index = {country: i for i, country in enumerate(countries)}
+    
+    diversity_data = {}
+    for window, window_df in metrics.groupby('Window'):
+        periods = []
+        for period, period_df in window_df.groupby('Period', sort=True):
+            periods.append({
+                "period": period,
+                "country": encode_values(period_df['Country'].map(country_index).values),
+                "Trips": encode_values(period_df['Trips'].values),
+                "UniqueDestinations": encode_values(period_df['UniqueDestinations'].values),
+                "Entropy": encode_values(period_df['Entropy'].values.astype(np.float32)),
+                "HHI": encode_values(period_df['HHI'].values.astype(np.float32)),
+                "NewDestinationRate": encode_values(period_df['NewDestinationRate'].values.astype(np.float32)),
+                "RegionalSpread": encode_values(period_df['RegionalSpread'].values)
+            })
+        diversity_data[str(window)] = periods
+    
+    html_template = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>Rolling Diplomatic Diversity</title>
+        <script src="{{ PLOTLY_CDN_URL }}"></script>
+        <style>
+            body {
+                font-family: Arial, sans-serif;
+                margin: 20px;
+                background-color: #f5f5f5;
+            }
+            .container {
+                max-width: 1200px;
+                margin: 0 auto;
+                background-color: white;
+                padding: 20px;
+                border-radius: 8px;
+                box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+            }
+            h1 {
+                color: #333;
+                text-align: center;
+            }
+            .control-panel {
+                display: flex;
+                justify-content: space-around;
+                align-items: center;
+                padding: 15px;
+                background-color: #eef6ff;
+                border-radius: 5px;
+                margin-bottom: 20px;
+            }
+            .selector-group {
+                display: flex;
+                flex-direction: column;
+                margin: 0 10px;
+            }
+            .selector-group label {
+                font-weight: bold;
+                margin-bottom: 5px;
+                color: #0066cc;
+            }
+            select {
+                padding: 8px;
+                border-radius: 4px;
+                border: 1px solid #ccc;
+                min-width: 150px;
+            }
+            #plotContainer {
+                height: 400px;
+            }
+            .table-container {
+                max-height: 500px;
+                overflow-y: auto;
+            }
+            table {
+                width: 100%;
+                border-collapse: collapse;
+                font-size: 0.9em;
+            }
+            th, td {
+                padding: 6px 10px;
+                border-bottom: 1px solid #ddd;
+                text-align: right;
+            }
+            th {
+                position: sticky;
+                top: 0;
+                cursor: pointer;
+                background-color: #eef6ff;
+                color: #0066cc;
+            }
+            th:first-child, td:first-child {
+                text-align: left;
+            }
+            tr.selected {
+                background-color: #fff3cd;
+            }
+            tbody tr {
+                cursor: pointer;
+            }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1>Rolling Diplomatic Diversity</h1>
+            <div class="description">
+                Destination entropy (bits), Herfindahl concentration (HHI), the share of destinations visited for
+                the first time and the number of regions visited, for every country over rolling windows.
+                Click a column header to sort and a row to plot that country over time.
+            </div>
+            
+            <div class="control-panel">
+                <div class="selector-group">
+                    <label for="windowSelect">Window:</label>
+                    <select id="windowSelect" onchange="populatePeriods()">
+                        <option value="3">3-year rolling</option>
+                        <option value="5">5-year rolling</option>
+                    </select>
+                </div>
+                <div class="selector-group">
+                    <label for="periodSelect">Period:</label>
+                    <select id="periodSelect" onchange="renderTable()"></select>
+                </div>
+                <div class="selector-group">
+                    <label for="metricSelect">Plot metric:</label>
+                    <select id="metricSelect" onchange="renderSeries()">
+                        <option value="Entropy">Destination entropy</option>
+                        <option value="HHI">Herfindahl concentration</option>
+                        <option value="NewDestinationRate">New-destination rate</option>
+                        <option value="RegionalSpread">Regional spread</option>
+                        <option value="UniqueDestinations">Unique destinations</option>
+                        <option value="Trips">Trips</option>
+                    </select>
+                </div>
+            </div>
+            
+            <div id="plotContainer"></div>
+            <div class="table-container">
+                <table>
+                    <thead id="tableHead"></thead>
+                    <tbody id="tableBody"></tbody>
+                </table>
+            </div>
+        </div>
+        
+        <script>
+            {{ DECODE_JS }}
+            {{ ESCAPE_HTML_JS }}
+            
+            const countries = {{ COUNTRIES }};
+            const diversityData = decodeTypedArrays({{ DIVERSITY_DATA }});
+            const columns = ['Trips', 'UniqueDestinations', 'Entropy', 'HHI', 'NewDestinationRate', 'RegionalSpread'];
+            const decimals = { Entropy: 2, HHI: 3, NewDestinationRate: 2 };
+            let sortColumn = 'Entropy';
+            let sortDescending = true;
+            let selectedCountries = [];
+            
+            function currentPeriods() {
+                return diversityData[document.getElementById('windowSelect').value];
+            }
+            
+            function populatePeriods() {
+                const periods = currentPeriods();
+                const select = document.getElementById('periodSelect');
+                select.innerHTML = periods.map((p, i) => `<option value="${i}">${p.period}</option>`).join('');
+                select.value = periods.length - 1;
+                renderTable();
+                renderSeries();
+            }
+            
+            function sortBy(column) {
+                sortDescending = column === sortColumn ? !sortDescending : true;
+                sortColumn = column;
+                renderTable();
+            }
+            
+            function renderTable() {
+                const data = currentPeriods()[document.getElementById('periodSelect').value];
+                // Sort an index permutation over the period's arrays
+                const order = Array.from(data.country.keys());
+                if (sortColumn === 'Country') {
+                    order.sort((a, b) => countries[data.country[a]].localeCompare(countries[data.country[b]]));
+                } else {
+                    order.sort((a, b) => data[sortColumn][a] - data[sortColumn][b]);
+                }
+                if (sortDescending) {
+                    order.reverse();
+                }
+                
+                document.getElementById('tableHead').innerHTML = '<tr>' +
+                    ['Country'].concat(columns).map(c =>
+                        `<th onclick="sortBy('${c}')">${c}${c === sortColumn ? (sortDescending ? ' ▼' : ' ▲') : ''}</th>`
+                    ).join('') + '</tr>';
+                document.getElementById('tableBody').innerHTML = order.map(i => {
+                    const name = countries[data.country[i]];
+                    const cells = columns.map(c => `<td>${decimals[c] ? data[c][i].toFixed(decimals[c]) : data[c][i]}</td>`);
+                    const selected = selectedCountries.includes(name) ? ' class="selected"' : '';
+                    return `<tr${selected} onclick="toggleCountry(${data.country[i]})"><td>${escapeHtml(name)}</td>${cells.join('')}</tr>`;
+                }).join('');
+            }
+            
+            function toggleCountry(index) {
+                const name = countries[index];
+                selectedCountries = selectedCountries.includes(name)
+                    ? selectedCountries.filter(c => c !== name)
+                    : selectedCountries.concat([name]);
+                renderTable();
+                renderSeries();
+            }
+            
+            function renderSeries() {
+                const metric = document.getElementById('metricSelect').value;
+                const periods = currentPeriods();
+                const traces = selectedCountries.map(name => {
+                    const index = countries.indexOf(name);
+                    const x = [], y = [];
+                    for (const p of periods) {
+                        const position = p.country.indexOf(index);
+                        if (position >= 0) {
+                            x.push(p.period);
+                            y.push(p[metric][position]);
+                        }
+                    }
+                    return { x: x, y: y, mode: 'lines+markers', name: name, line: { width: 3 } };
+                });
+                Plotly.react('plotContainer', traces, {
+                    title: selectedCountries.length ? `${metric} over rolling windows` : 'Select countries in the table to compare them',
+                    xaxis: { title: 'Window' },
+                    yaxis: { title: metric },
+                    template: 'plotly_white'
+                });
+            }
+            
+            populatePeriods();
+        </script>
+    </body>
+    </html>
+    """
+    
+    html_content = html_template
+    html_content = html_content.replace("{{ PLOTLY_CDN_URL }}", PLOTLY_CDN_URL)
+    html_content = html_content.replace("{{ DECODE_JS }}", DECODE_JS)
+    html_content = html_content.replace("{{ ESCAPE_HTML_JS }}", ESCAPE_HTML_JS)
+    html_content = html_content.replace("{{ COUNTRIES }}", to_json(countries))
+    html_content = html_content.replace("{{ DIVERSITY_DATA }}", to_json(diversity_data))
+    
+    with open(output_path("rolling_diversity_viz.html"), "w", encoding="utf-8") as f:
+        f.write(html_content)
+    
+    print("Rolling diversity visualization created")
+    return metrics
+
+# Create diplomatic network ranking visualization
+def create_network_viz():
+    print("Creating diplomatic network visualization...")
+    
+    # Yearly graphs plus 5-year rolling windows, computed on sparse adjacency matrices
+    metrics = compute_network_metrics(df, windows=(1, 5))
+    countries = sorted(metrics['Country'].unique())
+    country_index = {country: i for i, country in enumerate(countries)}
+    
+    network_data = {}
+    for window, window_df in metrics.groupby('Window'):
+        periods = []
+        for period, period_df in window_df.groupby('Period', sort=True):
+            periods.append({
+                "period": period,
+                "country": encode_values(period_df['Country'].map(country_index).values),
+                "OutDegree": encode_values(period_df['OutDegree'].values),
+                "InDegree": encode_values(period_df['InDegree'].values),
+                # Single precision is plenty for ranking and hover labels
+                "Reciprocity": encode_values(period_df['Reciprocity'].values.astype(np.float32)),
+                "PageRank": encode_values(period_df['PageRank'].values.astype(np.float32)),
+                "Community": encode_values(period_df['Community'].values)
+            })
+        network_data[str(window)] = periods
+    
+    html_template = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>Diplomatic Network Rankings</title>
+        <script src="{{ PLOTLY_CDN_URL }}"></script>
+        <style>
+            body {
+                font-family: Arial, sans-serif;
+                margin: 20px;
+                background-color: #f5f5f5;
+            }
+            .container {
+                max-width: 1200px;
+                margin: 0 auto;
+                background-color: white;
+                padding: 20px;
+                border-radius: 8px;
+                box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+            }
+            h1 {
+                color: #333;
+                text-align: center;
+            }
+            .control-panel {
+                display: flex;
+                justify-content: space-around;
+                align-items: center;
+                padding: 15px;
+                background-color: #eef6ff;
+                border-radius: 5px;
+                margin-bottom: 20px;
+            }
+            .selector-group {
+                display: flex;
+                flex-direction: column;
+                margin: 0 10px;
+            }
+            .selector-group label {
+                font-weight: bold;
+                margin-bottom: 5px;
+                color: #0066cc;
+            }
+            select {
+                padding: 8px;
+                border-radius: 4px;
+                border: 1px solid #ccc;
+                min-width: 150px;
+            }
+            #plotContainer {
+                height: 600px;
+            }
+            table {
+                width: 100%;
+                border-collapse: collapse;
+                margin-top: 20px;
+                font-size: 0.9em;
+            }
+            th, td {
+                padding: 6px 10px;
+                border-bottom: 1px solid #ddd;
+                text-align: right;
+            }
+            th {
+                cursor: pointer;
+                background-color: #eef6ff;
+                color: #0066cc;
+            }
+            th:first-child, td:first-child {
+                text-align: left;
+            }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1>Diplomatic Network Rankings</h1>
+            <div class="description">
+                Weighted in/out degree, reciprocity (share of a country's visits that were returned),
+                PageRank centrality and community clusters of the country visit network, per year or
+                over 5-year rolling windows. Click a column header to sort the table.
+            </div>
+            
+            <div class="control-panel">
+                <div class="selector-group">
+                    <label for="windowSelect">Window:</label>
+                    <select id="windowSelect" onchange="populatePeriods()">
+                        <option value="1">Single year</option>
+                        <option value="5">5-year rolling</option>
+                    </select>
+                </div>
+                <div class="selector-group">
+                    <label for="periodSelect">Period:</label>
+                    <select id="periodSelect" onchange="updateView()"></select>
+                </div>
+                <div class="selector-group">
+                    <label for="metricSelect">Rank by:</label>
+                    <select id="metricSelect" onchange="sortBy(this.value)">
+                        <option value="PageRank">PageRank centrality</option>
+                        <option value="InDegree">Visits received (in-degree)</option>
+                        <option value="OutDegree">Visits made (out-degree)</option>
+                        <option value="Reciprocity">Reciprocity</option>
+                    </select>
+                </div>
+                <div class="selector-group">
+                    <label for="topSelect">Show:</label>
+                    <select id="topSelect" onchange="updateView()">
+                        <option value="15">Top 15</option>
+                        <option value="30">Top 30</option>
+                        <option value="0">All countries</option>
+                    </select>
+                </div>
+            </div>
+            
+            <div id="plotContainer"></div>
+            <table id="rankingTable"></table>
+        </div>
+        
+        <script>
+            {{ DECODE_JS }}
+            {{ ESCAPE_HTML_JS }}
+            
+            const countries = {{ COUNTRIES }};
+            const networkData = decodeTypedArrays({{ NETWORK_DATA }});
+            const columns = ['PageRank', 'InDegree', 'OutDegree', 'Reciprocity', 'Community'];
+            let sortMetric = 'PageRank';
+            
+            function populatePeriods() {
+                const periods = networkData[document.getElementById('windowSelect').value];
+                const select = document.getElementById('periodSelect');
+                select.innerHTML = periods.map((p, i) => `<option value="${i}">${p.period}</option>`).join('');
+                select.value = periods.length - 1;
+                updateView();
+            }
+            
+            function sortBy(metric) {
+                sortMetric = metric;
+                if (metric !== 'Community') {
+                    document.getElementById('metricSelect').value = metric;
+                }
+                updateView();
+            }
+            
+            function updateView() {
+                const periods = networkData[document.getElementById('windowSelect').value];
+                const data = periods[document.getElementById('periodSelect').value];
+                const top = parseInt(document.getElementById('topSelect').value);
+                
+                // Sort an index permutation; the data arrays themselves are never copied
+                const order = Array.from(data.country.keys());
+                order.sort((a, b) => data[sortMetric][b] - data[sortMetric][a]);
+                const shown = top > 0 ? order.slice(0, top) : order;
+                
+                const barMetric = sortMetric === 'Community' ? 'PageRank' : sortMetric;
+                const trace = {
+                    type: 'bar',
+                    orientation: 'h',
+                    x: shown.map(i => data[barMetric][i]).reverse(),
+                    y: shown.map(i => countries[data.country[i]]).reverse(),
+                    marker: { color: shown.map(i => data.Community[i]).reverse(), colorscale: 'Portland' },
+                    hovertemplate: '%{y}: %{x}<extra></extra>'
+                };
+                Plotly.react('plotContainer', [trace], {
+                    title: `${barMetric} ranking, ${data.period} (color = community)`,
+                    margin: { l: 180 },
+                    height: Math.max(600, shown.length * 18),
+                    template: 'plotly_white'
+                });
+                
+                let rows = '<tr><th>Country</th>' +
+                    columns.map(c => `<th onclick="sortBy('${c}')">${c}</th>`).join('') + '</tr>';
+                for (const i of shown) {
+                    rows += `<tr><td>${escapeHtml(countries[data.country[i]])}</td>` +
+                        `<td>${data.PageRank[i].toFixed(4)}</td><td>${data.InDegree[i]}</td>` +
+                        `<td>${data.OutDegree[i]}</td><td>${data.Reciprocity[i].toFixed(2)}</td>` +
+                        `<td>${data.Community[i]}</td></tr>`;
+                }
+                document.getElementById('rankingTable').innerHTML = rows;
+            }
+            
+            populatePeriods();
+        </script>
+    </body>
+    </html>
+    """
+    
+    html_content = html_template
+    html_content = html_content.replace("{{ PLOTLY_CDN_URL }}", PLOTLY_CDN_URL)
+    html_content = html_content.replace("{{ DECODE_JS }}", DECODE_JS)
+    html_content = html_content.replace("{{ ESCAPE_HTML_JS }}", ESCAPE_HTML_JS)
+    html_content = html_content.replace("{{ COUNTRIES }}", to_json(countries))
+    html_content = html_content.replace("{{ NETWORK_DATA }}", to_json(network_data))
+    
+    with open(output_path("network_viz.html"), "w", encoding="utf-8") as f:
+        f.write(html_content)
+    
+    print("Diplomatic network visualization created")
+    return metrics
+
+# Summits: the largest gatherings of leaders in the same country at the same time
+SUMMIT_MIN_LEADERS = 3
+SUMMITS_PER_YEAR = 25
+
+def create_summits_viz():
+    print("Creating summits visualization...")
+    if not has_trip_dates(df):
+        # Some COLT exports have no trip dates; the dashboard then leaves the view out
+        print(f"Skipping summits view: no trip start date column (expected one of {', '.join(START_DATE_COLUMNS)})")
+        return None
+    
+    # Sweep-line over per-destination interval indexes of the trip dates
+    intervals = trip_intervals(df)
+    if intervals.empty:
+        # Without any year the page would have nothing to select, so leave the view out
+        print("Skipping summits view: no trips with a valid start date")
+        return None
+    gatherings = find_gatherings(intervals, min_leaders=SUMMIT_MIN_LEADERS)
+    print(f"{len(intervals)} dated trips, {len(gatherings)} gatherings of {SUMMIT_MIN_LEADERS}+ leaders")
+    
+    years = sorted(set(intervals['Year'].unique()))
+    per_year = gatherings.groupby('Year')
+    largest = per_year['Leaders'].max().reindex(years, fill_value=0)
+    counts = per_year.size().reindex(years, fill_value=0)
+    
+    # Largest gatherings of every year (gatherings are already sorted by size)
+    by_year = {}
+    for year, year_df in per_year:
+        by_year[str(year)] = [
+            [row.Destination, row.Start.strftime('%Y-%m-%d'), row.End.strftime('%Y-%m-%d'),
+             row.Leaders, row.Countries,
+             [f"{name} ({country})" for name, country in zip(row.LeaderNames, row.LeaderCountries)]]
+            for row in year_df.head(SUMMITS_PER_YEAR).itertuples()
+        ]
+    
+    summit_data = {
+        "years": encode_values(np.array(years)),
+        "largest": encode_values(largest.values),
+        "gatherings": encode_values(counts.values),
+        "byYear": by_year
+    }
+    
+    html_template = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>Summits of Leaders</title>
+        <script src="{{ PLOTLY_CDN_URL }}"></script>
+        <style>
+            body {
+                font-family: Arial, sans-serif;
+                margin: 20px;
+                background-color: #f5f5f5;
+            }
+            .container {
+                max-width: 1200px;
+                margin: 0 auto;
+                background-color: white;
+                padding: 20px;
+                border-radius: 8px;
+                box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+            }
+            h1 {
+                color: #333;
+                text-align: center;
+            }
+            .control-panel {
+                display: flex;
+                justify-content: space-around;
+                align-items: center;
+                padding: 15px;
+                background-color: #eef6ff;
+                border-radius: 5px;
+                margin-bottom: 20px;
+            }
+            .selector-group {
+                display: flex;
+                flex-direction: column;
+                margin: 0 10px;
+            }
+            .selector-group label {
+                font-weight: bold;
+                margin-bottom: 5px;
+                color: #0066cc;
+            }
+            select {
+                padding: 8px;
+                border-radius: 4px;
+                border: 1px solid #ccc;
+                min-width: 150px;
+            }
+            #plotContainer {
+                height: 450px;
+            }
+            table {
+                width: 100%;
+                border-collapse: collapse;
+                margin-top: 20px;
+                font-size: 0.9em;
+            }
+            th, td {
+                padding: 6px 10px;
+                border-bottom: 1px solid #ddd;
+                text-align: left;
+                vertical-align: top;
+            }
+            th {
+                background-color: #eef6ff;
+                color: #0066cc;
+            }
+            td.number {
+                text-align: right;
+            }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1>Summits of Leaders</h1>
+            <div class="description">
+                Gatherings of {{ MIN_LEADERS }} or more leaders who were in the same country on the same days,
+                based on trip start dates and durations. Bars show the largest gathering of each year; the line
+                counts all such gatherings. Click a bar or pick a year to list its largest gatherings.
+            </div>
+            
+            <div class="control-panel">
+                <div class="selector-group">
+                    <label for="yearSelect">Year:</label>
+                    <select id="yearSelect" onchange="showYear(this.value)"></select>
+                </div>
+            </div>
+            
+            <div id="plotContainer"></div>
+            <table id="summitTable"></table>
+        </div>
+        
+        <script>
+            {{ DECODE_JS }}
+            {{ ESCAPE_HTML_JS }}
+            
+            const summitData = decodeTypedArrays({{ SUMMIT_DATA }});
+            const years = Array.from(summitData.years);
+            
+            function showYear(year) {
+                document.getElementById('yearSelect').value = year;
+                const rows = summitData.byYear[year] || [];
+                let html = '<tr><th>Dates</th><th>Host country</th><th>Leaders</th><th>Countries</th><th>Present</th></tr>';
+                for (const [destination, start, end, leaders, countries, names] of rows) {
+                    html += `<tr><td>${start === end ? start : start + ' to ' + end}</td>` +
+                        `<td>${escapeHtml(destination)}</td><td class="number">${leaders}</td>` +
+                        `<td class="number">${countries}</td><td>${names.map(escapeHtml).join('<br>')}</td></tr>`;
+                }
+                if (!rows.length) {
+                    html += `<tr><td colspan="5">No gatherings of {{ MIN_LEADERS }} or more leaders in ${year}</td></tr>`;
+                }
+                document.getElementById('summitTable').innerHTML = html;
+            }
+            
+            const select = document.getElementById('yearSelect');
+            select.innerHTML = years.map(y => `<option value="${y}">${y}</option>`).join('');
+            
+            Plotly.newPlot('plotContainer', [
+                {
+                    type: 'bar',
+                    x: years,
+                    y: Array.from(summitData.largest),
+                    name: 'Largest gathering (leaders)',
+                    marker: { color: '#1f77b4' }
+                },
+                {
+                    type: 'scatter',
+                    mode: 'lines+markers',
+                    x: years,
+                    y: Array.from(summitData.gatherings),
+                    name: 'Gatherings of {{ MIN_LEADERS }}+ leaders',
+                    yaxis: 'y2',
+                    line: { color: '#ff7f0e', width: 3 }
+                }
+            ], {
+                title: 'Largest gatherings of leaders by year',
+                xaxis: { title: 'Year' },
+                yaxis: { title: 'Leaders present' },
+                yaxis2: { title: 'Gatherings', overlaying: 'y', side: 'right' },
+                legend: { orientation: 'h', y: -0.2 },
+                template: 'plotly_white'
+            });
+            
+            document.getElementById('plotContainer').on('plotly_click', event => showYear(event.points[0].x));
+            
+            // Start with the year of the largest gathering
+            const largest = Array.from(summitData.largest);
+            showYear(years[largest.indexOf(Math.max(...largest))]);
+        </script>
+    </body>
+    </html>
+    """
+    
+    html_content = html_template
+    html_content = html_content.replace("{{ PLOTLY_CDN_URL }}", PLOTLY_CDN_URL)
+    html_content = html_content.replace("{{ DECODE_JS }}", DECODE_JS)
+    html_content = html_content.replace("{{ ESCAPE_HTML_JS }}", ESCAPE_HTML_JS)
+    html_content = html_content.replace("{{ MIN_LEADERS }}", str(SUMMIT_MIN_LEADERS))
+    html_content = html_content.replace("{{ SUMMIT_DATA }}", to_json(summit_data))
+    
+    with open(output_path("summits_viz.html"), "w", encoding="utf-8") as f:
+        f.write(html_content)
+    
+    print("Summits visualization created")
+    return gatherings
+
+# Create a comprehensive dashboard HTML
+def create_complete_dashboard():
+    print("Creating comprehensive dashboard HTML...")
+    html_content = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>COLT Dataset Analysis Dashboard</title>
+        <style>
+            body {
+                font-family: Arial, sans-serif;
+                max-width: 1200px;
+                margin: 0 auto;
+                padding: 20px;
+                background-color: #f5f5f5;
+            }
+            h1, h2, h3 {
+                color: #333;
+            }
+            h1 {
+                text-align: center;
+                padding: 20px 0;
+                border-bottom: 2px solid #ddd;
+            }
+            .section {
+                background: white;
+                padding: 20px;
+                margin: 20px 0;
+                border-radius: 8px;
+                box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+            }
+            .viz-container {
+                margin-top: 30px;
+            }
+            .img-container {
+                margin: 20px 0;
+                text-align: center;
+            }
+            .img-container img {
+                max-width: 100%;
+                height: auto;
+                border-radius: 4px;
+                box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+            }
+            iframe {
+                width: 100%;
+                height: 700px;
+                border: none;
+                margin: 20px 0;
                 border-radius: 4px;
                 box-shadow: 0 2px 5px rgba(0,0,0,0.1);
             }
@@ -933,7 +2296,11 @@ def create_complete_dashboard():
                 <button class="tab" onclick="openTab(event, 'tab-comprehensive')">Top Countries & Leaders</button>
                 <button class="tab" onclick="openTab(event, 'tab-country-pairs')">Country Pair Analysis</button>
                 <button class="tab" onclick="openTab(event, 'tab-leader-timeline')">Leader Timeline</button>
+                <button class="tab" onclick="openTab(event, 'tab-leader-search')">Leader Search</button>
                 <button class="tab" onclick="openTab(event, 'tab-diversity')">Diplomatic Diversity</button>
+                <button class="tab" onclick="openTab(event, 'tab-rolling-diversity')">Diversity Trends</button>
+                <button class="tab" onclick="openTab(event, 'tab-network')">Diplomatic Network</button>
+                <!-- view: summits_viz.html --><button class="tab" onclick="openTab(event, 'tab-summits')">Summits</button><!-- /view -->
             </div>
             
             <div id="tab-static" class="tab-content">
@@ -988,6 +2355,14 @@ def create_complete_dashboard():
                         </div>
                         <p>This heatmap shows the flow of diplomatic travel between different regions, highlighting the most active regional relationships.</p>
                     </div>
+                    
+                    <div class="grid-item">
+                        <h4>Visits by Country</h4>
+                        <div class="img-container">
+                            <img src="country_sparklines.png" alt="Country sparklines">
+                        </div>
+                        <p>One sparkline per country of the visits its leaders made and the visits it received each year, grouped by region. Each panel is scaled to its own peak, shown in parentheses.</p>
+                    </div>
                 </div>
             </div>
             
@@ -1009,11 +2384,39 @@ def create_complete_dashboard():
                 <iframe src="leader_timeline_viz.html"></iframe>
             </div>
             
+            <div id="tab-leader-search" class="tab-content">
+                <h3>Leader Search</h3>
+                <p>Search any leader in the dataset, not just the most active ones, by name or country and compare their diplomatic activity over time.</p>
+                <iframe src="leader_search_viz.html"></iframe>
+            </div>
+            
             <div id="tab-diversity" class="tab-content">
                 <h3>Diplomatic Diversity Visualization</h3>
                 <p>This bubble chart visualization shows the diversity of diplomatic travel for top countries, with bubble size representing total trips and color representing the number of unique destinations visited.</p>
                 <iframe src="diversity_viz.html"></iframe>
+                <p>The chart below covers every country and year. It is rendered with WebGL and can be sorted and filtered by region, activity and name.</p>
+                <iframe src="diversity_all_viz.html"></iframe>
+            </div>
+            
+            <div id="tab-rolling-diversity" class="tab-content">
+                <h3>Diversity and Concentration Trends</h3>
+                <p>This view covers every country over 3- and 5-year rolling windows: how evenly its visits spread across destinations (entropy and Herfindahl concentration), how many destinations were visited for the first time, and how many regions were reached. Sort the table by any metric and select countries to compare them over time.</p>
+                <iframe src="rolling_diversity_viz.html"></iframe>
+            </div>
+            
+            <div id="tab-network" class="tab-content">
+                <h3>Diplomatic Network Rankings</h3>
+                <p>This view ranks countries by their position in the network of diplomatic visits: visits made and received, how often visits are reciprocated, PageRank centrality and community clusters, for single years and 5-year rolling windows.</p>
+                <iframe src="network_viz.html"></iframe>
+            </div>
+            
+            <!-- view: summits_viz.html -->
+            <div id="tab-summits" class="tab-content">
+                <h3>Summits of Leaders</h3>
+                <p>This view finds leaders who were in the same country at the same time, from trip dates and durations, and lists the largest gatherings of each year.</p>
+                <iframe src="summits_viz.html"></iframe>
             </div>
+            <!-- /view -->
         </div>
         
         <div class="section">
@@ -1037,51 +2440,216 @@ def create_complete_dashboard():
     </html>
     """
     
-    with open("colt_complete_dashboard.html", "w") as f:
+    # Optional views that were skipped for this dataset are left out of the dashboard
+    html_content = re.sub(r'<!-- view: (\S+) -->(.*?)<!-- /view -->',
+                          lambda m: m.group(2) if os.path.exists(output_path(m.group(1))) else '',
+                          html_content, flags=re.S)
+    
+    with open(output_path("colt_complete_dashboard.html"), "w") as f:
         f.write(html_content)
     
     print("Complete dashboard created: colt_complete_dashboard.html")
 
-# Execute all static visualizations
-print("Creating static visualizations...")
-for name, viz_func in tqdm(visualizations, desc="Creating static visualizations"):
-    print(f"\nGenerating {name} visualization...")
-    try:
-        viz_func()
-        print(f"✓ Successfully generated {name} visualization")
-    except Exception as e:
-        print(f"✗ Error generating {name} visualization: {str(e)}")
-
-# Create interactive Plotly visualizations
-print("\nCreating interactive visualizations...")
 interactive_figs = [
     ("Comprehensive Trips Visualization", create_comprehensive_interactive_viz),
     ("Country Pair Visualization", create_country_pair_viz),
     ("Leader Timeline Visualization", create_leader_timeline),
-    ("Diplomatic Diversity Visualization", create_diversity_viz)
+    ("Leader Search Visualization", create_leader_search_viz),
+    ("Diplomatic Diversity Visualization", create_diversity_viz),
+    ("All-Country Diversity Visualization", create_diversity_gl_viz),
+    ("Rolling Diversity Visualization", create_rolling_diversity_viz),
+    ("Diplomatic Network Visualization", create_network_viz),
+    ("Summits Visualization", create_summits_viz)
 ]
 
-for name, viz_func in tqdm(interactive_figs, desc="Creating interactive visualizations"):
-    print(f"\nGenerating {name}...")
+def generate_all(dpi=300):
+    """Write every static and interactive visualization and the dashboard; returns the failed ones"""
+    failed = []
+    
+    # Execute all static visualizations
+    print("Creating static visualizations...")
+    for name, viz_func in tqdm(visualizations, desc="Creating static visualizations"):
+        print(f"\nGenerating {name} visualization...")
+        try:
+            viz_func(dpi=dpi)
+            print(f"✓ Successfully generated {name} visualization")
+        except Exception as e:
+            print(f"✗ Error generating {name} visualization: {str(e)}")
+            failed.append(name)
+    
+    # Create interactive Plotly visualizations
+    print("\nCreating interactive visualizations...")
+    for name, viz_func in tqdm(interactive_figs, desc="Creating interactive visualizations"):
+        print(f"\nGenerating {name}...")
+        try:
+            fig = viz_func()
+            print(f"✓ Successfully generated {name}")
+        except Exception as e:
+            print(f"✗ Error generating {name}: {str(e)}")
+            print(f"Error details: {str(e)}")
+            failed.append(name)
+    
+    # Create the comprehensive dashboard
+    create_complete_dashboard()
+    return failed
+
+def build_dataset(data_file=DATA_FILE, builds_dir=None, accept_growth=False):
+    """Generate and publish the dashboard of one dataset file; returns the failed steps"""
+    global BUILD_VERSION, OUTPUT_DIR
+    load_data(data_file)
+    
+    # Every run writes into its own versioned build directory under builds/
+    BUILD_VERSION, OUTPUT_DIR = start_build(builds_dir)
+    print(f"Writing build {BUILD_VERSION} to {OUTPUT_DIR}")
+    write_build_info(OUTPUT_DIR, {'data_file': os.path.abspath(data_file),
+                                  'fingerprint': source_fingerprint(data_file)})
+    failed = []
+    
+    # Materialize the cleaned data and main aggregates for ad-hoc queries
+    print("Materializing analytical store...")
     try:
-        fig = viz_func()
-        print(f"✓ Successfully generated {name}")
+        # Kept in the build's private directory, which is never served as a file
+        materialize(df, os.path.join(private_path(BUILD_VERSION, builds_dir), STORE_FILENAME))
+        print(f"✓ Successfully wrote {STORE_FILENAME}")
     except Exception as e:
-        print(f"✗ Error generating {name}: {str(e)}")
-        print(f"Error details: {str(e)}")
+        print(f"✗ Error writing {STORE_FILENAME}: {str(e)}")
+        failed.append("Analytical store")
+    
+    failed += generate_all()
+    
+    # Size report against the published build; exceeding a budget blocks publishing
+    print("\nChecking artifact sizes...")
+    previous_version = current_version(builds_dir)
+    if check_build(OUTPUT_DIR, build_path(previous_version, builds_dir) if previous_version else None,
+                   accept_growth=accept_growth):
+        failed.append("Size budget")
+    
+    # Publish the finished build by swapping the current-build pointer
+    if failed:
+        print(f"\nBuild {BUILD_VERSION} not published, failed visualizations: {', '.join(failed)}")
+    else:
+        previous = publish_build(BUILD_VERSION, builds_dir)
+        print(f"\nPublished build {BUILD_VERSION} (previous: {previous})")
+    return failed
 
-# Create the comprehensive dashboard
-create_complete_dashboard()
+def prepare_preview(preview_dir):
+    """Empty the preview directory, refusing to clear anything that is not a previous preview"""
+    if os.path.isdir(preview_dir) and os.listdir(preview_dir):
+        if not os.path.isfile(os.path.join(preview_dir, PREVIEW_MARKER)):
+            raise RuntimeError(f"{preview_dir} is not empty and is not a previous preview")
+        shutil.rmtree(preview_dir)
+    os.makedirs(preview_dir, exist_ok=True)
+    open(os.path.join(preview_dir, PREVIEW_MARKER), 'w').close()
 
-# Move all visualization files to the static folder
-print("\nMoving visualization files to static folder...")
-for file in os.listdir():
-    if file.endswith('.png') or file.endswith('.html'):
-        try:
-            shutil.move(file, os.path.join('static', file))
-            print(f"Moved {file} to static folder")
-        except Exception as e:
-            print(f"Error moving {file}: {str(e)}")
+def build_preview(data_file=DATA_FILE, fraction=PREVIEW_FRACTION, preview_dir=PREVIEW_DIR):
+    """Build all charts from a stratified sample at preview DPI; the output is never published"""
+    global BUILD_VERSION, OUTPUT_DIR, df
+    full = load_data(data_file)
+    df = stratified_sample(full, fraction)
+    print(f"Previewing a stratified sample of {len(df)} of {len(full)} trips at {PREVIEW_DPI} dpi")
+    
+    # Not a versioned build: each preview replaces the previous one
+    BUILD_VERSION, OUTPUT_DIR = 'preview', preview_dir
+    try:
+        prepare_preview(OUTPUT_DIR)
+    except RuntimeError as e:
+        print(f"✗ {str(e)}")
+        return ["Preview output"]
+    failed = generate_all(dpi=PREVIEW_DPI)
+    
+    print(f"\nPreview written to {output_path('colt_complete_dashboard.html')} (not published)")
+    if failed:
+        print(f"Failed visualizations: {', '.join(failed)}")
+    return failed
+
+def is_unchanged(data_file, builds_dir):
+    """True if the published build of a dataset was made from the same data and code"""
+    version = current_version(builds_dir)
+    if not version:
+        return False
+    return read_build_info(version, builds_dir).get('fingerprint') == source_fingerprint(data_file)
+
+def build_batch(data_files, jobs=1, force=False, accept_growth=False):
+    """Build several dataset files in one run, each into builds/datasets/<name>/.
+    
+    Libraries and plotly.js are loaded once per process, and datasets whose
+    data and code are unchanged since their published build are skipped.
+    Returns {dataset name: failed steps, or None if skipped}.
+    """
+    targets = {}
+    for data_file in data_files:
+        name = dataset_name(data_file)
+        if name in targets:
+            raise ValueError(f"{data_file} and {targets[name]} map to the same dataset name '{name}'")
+        targets[name] = data_file
+    
+    results = {}
+    pending = []
+    for name, data_file in targets.items():
+        if not force and is_unchanged(data_file, dataset_builds_dir(name)):
+            print(f"Skipping {name}: unchanged since build {current_version(dataset_builds_dir(name))}")
+            results[name] = None
+        else:
+            pending.append(name)
+    
+    if jobs > 1 and len(pending) > 1:
+        # One pool for the whole batch; each worker process builds several datasets
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending)), mp_context=context) as pool:
+            futures = {name: pool.submit(build_dataset, targets[name], dataset_builds_dir(name), accept_growth)
+                       for name in pending}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print(f"✗ Error building {name}: {str(e)}")
+                    results[name] = ["Build"]
+    else:
+        for name in pending:
+            print(f"\n=== Dataset {name} ({targets[name]}) ===")
+            results[name] = build_dataset(targets[name], dataset_builds_dir(name), accept_growth)
+    
+    print("\nBatch summary:")
+    for name, failed in results.items():
+        status = 'skipped (unchanged)' if failed is None else (f"failed: {', '.join(failed)}" if failed else 'published')
+        print(f"  {name}: {status}")
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the COLT dashboard")
+    parser.add_argument('data_files', nargs='*',
+                        help="dataset files to build in one batch, each into builds/datasets/<name>/ "
+                             "(default: build COLT_DATA_FILE into builds/)")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="number of worker processes for a batch")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild datasets whose data and code are unchanged")
+    parser.add_argument('--accept-growth', action='store_true',
+                        help="publish even if the first view grew more than max_growth_percent "
+                             "(the new build becomes the size baseline)")
+    parser.add_argument('--preview', nargs='?', type=float, const=PREVIEW_FRACTION, metavar='FRACTION',
+                        help=f"quick unpublished build from a stratified sample (default fraction "
+                             f"{PREVIEW_FRACTION}) at {PREVIEW_DPI} dpi, written to {PREVIEW_DIR}/")
+    args = parser.parse_args(argv)
+    
+    if args.preview is not None:
+        if len(args.data_files) > 1:
+            parser.error("--preview builds a single dataset file")
+        if not 0 < args.preview <= 1:
+            parser.error("--preview fraction must be in (0, 1]")
+        return 1 if build_preview(args.data_files[0] if args.data_files else DATA_FILE, args.preview) else 0
+    
+    if args.data_files:
+        results = build_batch(args.data_files, jobs=args.jobs, force=args.force,
+                              accept_growth=args.accept_growth)
+        failed = any(results.values())
+    else:
+        failed = build_dataset(DATA_FILE, accept_growth=args.accept_growth)
+    
+    print("\nAnalysis complete! All visualizations created from the Country and Organization Leader Travel (COLT) dataset")
+    print("Frederick S. Pardee Institute for International Futures at the University of Denver")
+    return 1 if failed else 0
 
-print("\nAnalysis complete! All visualizations created from the Country and Organization Leader Travel (COLT) dataset")
-print("Frederick S. Pardee Institute for International Futures at the University of Denver")
+if __name__ == '__main__':
+    # Non-zero exit status tells the rebuild watcher that nothing was published
+    sys.exit(main())
@@ -0,0 +1,368 @@
+"""Golden-output equivalence harness for the chart pipeline.
+
+Before an aggregation in generate_visualizations.py (or one of the metric
+modules) is reworked for speed, capture the data behind every chart as
+golden files; after the change, check that the new code reproduces them:
+
+    python golden_outputs.py capture            # before the change
+    python golden_outputs.py check              # after the change
+
+Each aggregate in AGGREGATES (value counts, crosstabs, dyad series,
+diversity and network tables, ...) is written as a canonical CSV (floats
+with 17 significant digits, so they round-trip exactly) or, for JSON
+documents, as canonical JSON, under golden/<dataset>/ next to a
+manifest.json. Only the tables behind the charts are kept, limited to the
+rows a chart shows. check first compares a per-column summary of the
+loaded input (input_summary.csv) with the captured one, so a regenerated
+synthetic file that parses to the same trips passes even if its bytes
+differ; then it compares columns, row order and values exactly; float
+columns may differ within the per-aggregate tolerance in TOLERANCES or the
+--rtol/--atol given on the command line. Aggregates computed inline in a
+chart function should be moved into a function used by both the chart and
+AGGREGATES before they are optimized.
+
+Datasets are the real COLT file (COLT_DATA_FILE, or --data) when it is
+present, and a seeded synthetic dataset of the same schema (--synthetic N
+...). The goldens of the default synthetic dataset are committed, so check
+works on a fresh clone; --large adds a 100,000-trip synthetic dataset to
+verify changes at a scale the real data does not reach yet.
+
+Usage:
+    python golden_outputs.py capture|check [--data FILE ...] [--synthetic N ...] [--large]
+                                           [--only NAME ...] [--dir golden] [--rtol R] [--atol A]
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import generate_visualizations as gv
+from build_output import dataset_name
+from diversity_metrics import compute_rolling_diversity
+from leader_index import build_leader_index
+from network_metrics import compute_network_metrics
+from summit_detection import find_gatherings, trip_intervals
+
+GOLDEN_DIR = 'golden'
+MANIFEST_FILE = 'manifest.json'
+INPUT_SUMMARY_FILE = 'input_summary.csv'
+DEFAULT_SYNTHETIC_SIZES = (20000,)
+LARGE_SYNTHETIC_SIZE = 100000
+
+# Iterative or float-summing aggregates may change in the last bits when reordered
+TOLERANCES = {
+    'network_metrics': {'rtol': 1e-9, 'atol': 1e-12},
+    'rolling_diversity': {'rtol': 1e-9, 'atol': 1e-12},
+}
+INPUT_TOLERANCE = {'rtol': 1e-9, 'atol': 1e-12}
+
+REGIONS = ('Africa', 'Americas', 'Asia', 'Europe', 'Middle East', 'Oceania')
+IGOS = ('United Nations', 'European Union', 'African Union', 'NATO')
+
+
+def trip_duration_summary(data):
+    durations, _, _, mean, median = gv.trip_duration_distribution(data)
+    return pd.Series({'count': len(durations), 'mean': mean, 'median': median})
+
+
+def trip_duration_histogram(data):
+    _, counts, edges, _, _ = gv.trip_duration_distribution(data)
+    return pd.DataFrame({'Left': edges[:-1], 'Right': edges[1:], 'Trips': counts})
+
+
+def comprehensive_series(data):
+    rows = []
+    for countries, counts, label in gv.comprehensive_groups(data):
+        for rank, country in enumerate(countries):
+            years, trips = counts.get(country, ([], []))
+            rows.extend((label, rank, country, year, count) for year, count in zip(years, trips))
+    return pd.DataFrame(rows, columns=['Group', 'Rank', 'Country', 'TripYear', 'Trips'])
+
+
+def dyad_series(data):
+    # The country pair view embeds the dyads of the top 5 visiting and visited countries
+    top_visiting = data['LeaderCountryOrIGO'].value_counts().head(5).index
+    top_visited = data['CountryVisited'].value_counts().head(5).index
+    return gv.dyad_year_counts(data, top_visiting, top_visited).rename('Trips')
+
+
+def sparkline_series(data):
+    regions, years, made, received = gv.country_sparkline_data(data)
+    return pd.DataFrame({
+        'Country': np.repeat(regions.index.values, len(years)),
+        'Region': np.repeat(regions.values, len(years)),
+        'TripYear': np.tile(years, len(regions)),
+        'Made': made.ravel(),
+        'Received': received.ravel(),
+    })
+
+
+def summit_gatherings(data):
+    gatherings = find_gatherings(trip_intervals(data), min_leaders=gv.SUMMIT_MIN_LEADERS)
+    return gatherings.assign(LeaderNames=gatherings['LeaderNames'].str.join('|'),
+                             LeaderCountries=gatherings['LeaderCountries'].str.join('|'))
+
+
+# name -> function of the cleaned trips DataFrame returning a Series, DataFrame or JSON document
+AGGREGATES = {
+    'trips_per_year': gv.trips_per_year_counts,
+    'top_destinations': gv.top_destination_counts,
+    'region_visits': gv.region_visit_counts,
+    'trip_duration_summary': trip_duration_summary,
+    'trip_duration_histogram': trip_duration_histogram,
+    'region_flow': gv.region_flow_matrix,
+    'top_leaders': gv.top_leader_counts,
+    'country_sparklines': sparkline_series,
+    'comprehensive_series': comprehensive_series,
+    'dyad_series': dyad_series,
+    'leader_timeline': gv.leader_timeline_data,
+    'leader_index': build_leader_index,
+    'yearly_diversity': gv.compute_yearly_diversity,
+    'rolling_diversity': compute_rolling_diversity,
+    'network_metrics': lambda data: compute_network_metrics(data, windows=(1, 5)),
+    'summit_gatherings': summit_gatherings,
+}
+
+
+def synthetic_dataset(rows, seed=0):
+    """A seeded synthetic trips table with the COLT schema and realistic skew"""
+    rng = np.random.default_rng(seed)
+    n_countries = 180
+    countries = np.array([f"Country{i:03d}" for i in range(n_countries)] + list(IGOS))
+    regions = np.array([REGIONS[i % len(REGIONS)] for i in range(n_countries)] + ['Europe'] * len(IGOS))
+
+    # A few countries travel and host far more than the rest
+    weights = 1 / np.arange(1, len(countries) + 1) ** 0.8
+    visiting = rng.choice(len(countries), rows, p=weights / weights.sum())
+    host_weights = weights[:n_countries][rng.permutation(n_countries)]
+    visited = rng.choice(n_countries, rows, p=host_weights / host_weights.sum())
+
+    years = rng.integers(1990, 2025, rows)
+    starts = pd.to_datetime(years.astype(str), format='%Y') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D')
+    # Five-year terms, staggered by country, with a few leaders (head of state, government, ...) per term
+    term = (years - 1990 + visiting % 5) // 5
+    leaders = visiting * 100 + term * 3 + rng.integers(0, 3, rows)
+    durations = rng.geometric(0.35, rows).astype(object)
+    durations[rng.random(rows) < 0.02] = 'TBD'
+
+    return pd.DataFrame({
+        'LeaderFullName': [f"Leader {i}" for i in leaders],
+        'LeaderCountryOrIGO': countries[visiting],
+        'LeaderRegion': regions[visiting],
+        'CountryVisited': countries[visited],
+        'RegionVisited': regions[visited],
+        'TripYear': years,
+        'TripStartDate': starts.strftime('%m/%d/%Y'),
+        'TripDuration': durations,
+    })
+
+
+def input_summary(data):
+    """Non-null and distinct values, range and (numeric) sum of every column of the loaded trips"""
+    rows = []
+    for column in data.columns:
+        values = data[column].dropna()
+        numeric = pd.api.types.is_numeric_dtype(values)
+        ordered = values if numeric else values.astype(str)
+        rows.append({
+            'Column': column,
+            'Values': len(values),
+            'Unique': values.nunique(),
+            'Min': str(ordered.min()) if len(values) else '',
+            'Max': str(ordered.max()) if len(values) else '',
+            'Sum': float(values.sum()) if numeric else np.nan,
+        })
+    return pd.DataFrame(rows)
+
+
+def datasets(data_files, synthetic_sizes):
+    """Yield (name, data file) for each dataset, writing synthetic ones to temporary files"""
+    for data_file in data_files:
+        yield dataset_name(data_file), data_file
+    if synthetic_sizes:
+        tmp_dir = tempfile.mkdtemp(prefix='colt-golden-')
+        try:
+            for rows in synthetic_sizes:
+                path = os.path.join(tmp_dir, f'synthetic-{rows}.csv')
+                synthetic_dataset(rows).to_csv(path, index=False)
+                yield f'synthetic-{rows}', path
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def to_canonical(value):
+    """Canonical text of an aggregate and its kind ('csv' or 'json')"""
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        frame = value.to_frame() if isinstance(value, pd.Series) else value
+        if not isinstance(frame.index, pd.RangeIndex):
+            frame = frame.reset_index()
+        frame.columns = [str(column) for column in frame.columns]
+        return frame.to_csv(index=False, float_format='%.17g', lineterminator='\n'), 'csv'
+    return gv.to_json(value) if not isinstance(value, str) else value, 'json'
+
+
+def read_canonical(text, kind):
+    if kind == 'csv':
+        return pd.read_csv(io.StringIO(text), keep_default_na=False, na_values=[''], low_memory=False)
+    return json.loads(text)
+
+
+def compare(expected, actual, kind, rtol=0, atol=0):
+    """Return a list of differences between a golden aggregate and a new one (both canonical)"""
+    if kind == 'json':
+        return [] if expected == actual else ["JSON document differs"]
+    if list(expected.columns) != list(actual.columns):
+        return [f"columns {list(actual.columns)} != golden {list(expected.columns)}"]
+    if len(expected) != len(actual):
+        return [f"{len(actual)} rows != golden {len(expected)}"]
+
+    differences = []
+    for column in expected.columns:
+        old, new = expected[column], actual[column]
+        if pd.api.types.is_numeric_dtype(old) and pd.api.types.is_numeric_dtype(new):
+            old_values, new_values = old.values.astype(float), new.values.astype(float)
+            equal = np.isclose(new_values, old_values, rtol=rtol, atol=atol, equal_nan=True)
+            if not equal.all():
+                with np.errstate(invalid='ignore'):
+                    error = np.nanmax(np.abs(new_values - old_values))
+                rows = np.flatnonzero(~equal)
+                differences.append(f"{column}: {len(rows)} values differ (max abs error {error:.3g}), "
+                                   f"first at rows {rows[:5].tolist()}")
+        else:
+            equal = (old.astype(str).values == new.astype(str).values)
+            if not equal.all():
+                rows = np.flatnonzero(~equal)
+                differences.append(f"{column}: {len(rows)} values differ, first at row {rows[0]}: "
+                                   f"{new.iloc[rows[0]]!r} != golden {old.iloc[rows[0]]!r}")
+    return differences
+
+
+def compute(data, names):
+    """Yield (name, canonical text, kind, seconds) for each aggregate"""
+    for name in names:
+        started = time.perf_counter()
+        value = AGGREGATES[name](data)
+        seconds = time.perf_counter() - started
+        text, kind = to_canonical(value)
+        yield name, text, kind, seconds
+
+
+def capture(name, data_file, names, golden_dir):
+    """Write the golden files of a dataset (aggregates not in `names` are kept)"""
+    data = gv.load_data(data_file)
+    out_dir = os.path.join(golden_dir, name)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    manifest = {'aggregates': {}}
+    if os.path.isfile(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    manifest.pop('fingerprint', None)
+    manifest.update({'rows': len(data), 'pandas': pd.__version__, 'numpy': np.__version__})
+    with open(os.path.join(out_dir, INPUT_SUMMARY_FILE), 'w', encoding='utf-8', newline='\n') as f:
+        f.write(to_canonical(input_summary(data))[0])
+
+    for aggregate, text, kind, seconds in compute(data, names):
+        with open(os.path.join(out_dir, f'{aggregate}.{kind}'), 'w', encoding='utf-8', newline='\n') as f:
+            f.write(text)
+        manifest['aggregates'][aggregate] = {'kind': kind, 'sha256': hashlib.sha256(text.encode()).hexdigest(),
+                                             'seconds': round(seconds, 4)}
+        print(f"✓ {name}/{aggregate}.{kind} ({seconds * 1000:.1f} ms)")
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+
+def check(name, data_file, names, golden_dir, rtol=None, atol=None):
+    """Compare the current aggregates with the golden files; returns the failed aggregates"""
+    out_dir = os.path.join(golden_dir, name)
+    try:
+        with open(os.path.join(out_dir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        with open(os.path.join(out_dir, INPUT_SUMMARY_FILE), encoding='utf-8') as f:
+            expected_input = read_canonical(f.read(), 'csv')
+    except OSError:
+        print(f"✗ No golden files for {name} in {out_dir}; run capture first")
+        return [name]
+
+    # The aggregates are only comparable if the input parses to the same trips
+    data = gv.load_data(data_file)
+    actual_input = read_canonical(to_canonical(input_summary(data))[0], 'csv')
+    differences = compare(expected_input, actual_input, 'csv', **INPUT_TOLERANCE)
+    if differences:
+        print(f"✗ {data_file} differs from the data the {name} golden files were captured from")
+        for difference in differences:
+            print(f"    {difference}")
+        return [name]
+    failed = []
+    for aggregate, text, kind, seconds in compute(data, names):
+        golden = manifest['aggregates'].get(aggregate)
+        if golden is None:
+            print(f"✗ {name}/{aggregate}: no golden file")
+            failed.append(aggregate)
+            continue
+        timing = f"{seconds * 1000:.1f} ms, golden {golden['seconds'] * 1000:.1f} ms"
+        if hashlib.sha256(text.encode()).hexdigest() == golden['sha256']:
+            print(f"✓ {name}/{aggregate}: identical ({timing})")
+            continue
+        with open(os.path.join(out_dir, f"{aggregate}.{golden['kind']}"), encoding='utf-8') as f:
+            expected = read_canonical(f.read(), golden['kind'])
+        tolerance = dict(TOLERANCES.get(aggregate, {}))
+        tolerance.update({key: value for key, value in (('rtol', rtol), ('atol', atol)) if value is not None})
+        differences = compare(expected, read_canonical(text, kind), kind, **tolerance)
+        if differences:
+            print(f"✗ {name}/{aggregate}: differs ({timing})")
+            for difference in differences:
+                print(f"    {difference}")
+            failed.append(aggregate)
+        else:
+            print(f"✓ {name}/{aggregate}: equal within rtol={tolerance.get('rtol', 0)}, "
+                  f"atol={tolerance.get('atol', 0)} ({timing})")
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Capture or check golden outputs of the chart aggregates")
+    parser.add_argument('command', choices=['capture', 'check'])
+    parser.add_argument('--data', nargs='*', default=None,
+                        help="real dataset files (default: COLT_DATA_FILE when it exists)")
+    parser.add_argument('--synthetic', nargs='*', type=int, default=list(DEFAULT_SYNTHETIC_SIZES),
+                        help="sizes of the synthetic datasets (none to skip)")
+    parser.add_argument('--large', action='store_true',
+                        help=f"also use a synthetic dataset of {LARGE_SYNTHETIC_SIZE:,} trips")
+    parser.add_argument('--only', nargs='*', choices=sorted(AGGREGATES), default=None,
+                        help="aggregates to capture or check (default: all)")
+    parser.add_argument('--dir', default=GOLDEN_DIR, help="golden file directory")
+    parser.add_argument('--rtol', type=float, default=None, help="relative tolerance for float columns")
+    parser.add_argument('--atol', type=float, default=None, help="absolute tolerance for float columns")
+    args = parser.parse_args(argv)
+
+    data_files = args.data if args.data is not None else [f for f in [gv.DATA_FILE] if os.path.isfile(f)]
+    names = args.only or list(AGGREGATES)
+    synthetic_sizes = args.synthetic + ([LARGE_SYNTHETIC_SIZE] if args.large else [])
+    failed = []
+    for name, data_file in datasets(data_files, synthetic_sizes):
+        print(f"\n=== {name} ===")
+        if args.command == 'capture':
+            capture(name, data_file, names, args.dir)
+        else:
+            failed += [f"{name}/{aggregate}"
+                       for aggregate in check(name, data_file, names, args.dir, args.rtol, args.atol)]
+
+    if args.command == 'check':
+        if failed:
+            print(f"\n✗ {len(failed)} aggregates differ from the golden files: {', '.join(failed)}")
+        else:
+            print("\n✓ All aggregates match the golden files")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Search index and yearly trip series for every leader in the COLT data.
+
+build_leader_index() is run at generation time and produces a compact JSON
+document that leader_search_viz.html loads once:
+
+- leaders: name, country and total trips, sorted by trips (most active first)
+- search: normalized "name country" strings used to verify matches
+- tokens / token postings: sorted word list for prefix lookups (binary search)
+- trigrams / trigram postings: leader ids containing each character trigram
+- series: per-leader (year, trips) pairs in CSR layout (offsets into years/trips)
+
+Postings and series are stored as typed arrays via figure_io.encode_array.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+from figure_io import encode_array
+
+NAME_COLUMN = 'LeaderFullName'
+COUNTRY_COLUMN = 'LeaderCountryOrIGO'
+YEAR_COLUMN = 'TripYear'
+
+INDEX_FILENAME = 'leader_index.json'
+
+
+def normalize(text):
+    """Lowercase, strip accents and reduce everything but letters and digits to single spaces"""
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(ch for ch in text if not unicodedata.category(ch).startswith('M')).lower()
+    return re.sub(r'[^a-z0-9]+', ' ', text).strip()
+
+
+# The same normalization for queries typed into the search page; both sides
+# strip every combining mark (Unicode category M) so queries match the index
+NORMALIZE_QUERY_JS = """
+    function normalizeQuery(text) {
+        return text.normalize('NFKD').replace(/\\p{M}/gu, '').toLowerCase()
+            .replace(/[^a-z0-9]+/g, ' ').trim();
+    }
+"""
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _postings(mapping, keys):
+    """CSR-encode {key: [ids]} for the given key order as (offsets, ids)"""
+    offsets = [0]
+    ids = []
+    for key in keys:
+        ids.extend(sorted(mapping[key]))
+        offsets.append(len(ids))
+    return encode_array(np.array(offsets)), encode_array(np.array(ids))
+
+
+def build_leader_index(df):
+    """Build the leader search index document from the trips DataFrame"""
+    trips = df[[NAME_COLUMN, COUNTRY_COLUMN, YEAR_COLUMN]].dropna()
+    yearly = (trips.groupby([NAME_COLUMN, COUNTRY_COLUMN, YEAR_COLUMN]).size()
+              .rename('Trips').reset_index())
+    totals = (yearly.groupby([NAME_COLUMN, COUNTRY_COLUMN])['Trips'].sum()
+              .sort_values(ascending=False, kind='stable'))
+
+    leader_ids = {key: i for i, key in enumerate(totals.index)}
+    yearly['LeaderId'] = [leader_ids[key] for key in zip(yearly[NAME_COLUMN], yearly[COUNTRY_COLUMN])]
+    yearly = yearly.sort_values(['LeaderId', YEAR_COLUMN])
+    counts = np.bincount(yearly['LeaderId'].values, minlength=len(leader_ids))
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    search = []
+    token_map = defaultdict(set)
+    trigram_map = defaultdict(set)
+    for i, (name, country) in enumerate(totals.index):
+        text = normalize(f"{name} {country}")
+        search.append(text)
+        for token in text.split():
+            token_map[token].add(i)
+        for trigram in trigrams(text):
+            trigram_map[trigram].add(i)
+
+    tokens = sorted(token_map)
+    trigram_keys = sorted(trigram_map)
+    token_offsets, token_ids = _postings(token_map, tokens)
+    trigram_offsets, trigram_ids = _postings(trigram_map, trigram_keys)
+
+    return {
+        'leaders': {
+            'name': [name for name, _ in totals.index],
+            'country': [country for _, country in totals.index],
+            'trips': encode_array(totals.values),
+        },
+        'search': search,
+        'tokens': tokens,
+        'tokenOffsets': token_offsets,
+        'tokenIds': token_ids,
+        'trigrams': trigram_keys,
+        'trigramOffsets': trigram_offsets,
+        'trigramIds': trigram_ids,
+        'series': {
+            'offsets': encode_array(offsets),
+            'years': encode_array(yearly[YEAR_COLUMN].astype(int).values),
+            'trips': encode_array(yearly['Trips'].values),
+        },
+    }
@@ -0,0 +1,346 @@
+"""Load test for the COLT dashboard: how many dashboard views per second can one dyno serve?
+
+The asset graph of a view is discovered by parsing the dashboard page and
+every iframe page it embeds (images, iframes, scripts, stylesheets and
+fetch()ed data files on the same host). Each simulated user then replays
+views like a browser: the page first, then its assets over a few parallel
+keep-alive connections. Every user plays a series of sessions: the
+first view of a session starts with an empty cache (a new visitor), later
+views reuse fresh cached assets (Cache-Control max-age) and revalidate the
+rest with If-None-Match / If-Modified-Since.
+
+Each --config is a command that starts the app on {port}; configurations are
+started one after the other on the same build and reported side by side:
+
+    python load_test.py
+    python load_test.py --users 20 --duration 30 \\
+        --config "flask=python app.py" \\
+        --config "gunicorn-4=gunicorn -w 4 -b 127.0.0.1:{port} app:app"
+    python load_test.py --url http://127.0.0.1:5000   # an already running server
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import re
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+from size_budget import page_urls
+
+DEFAULT_CONFIGS = ['gunicorn-2=gunicorn -w 2 -b 127.0.0.1:{port} app:app']
+
+# Parallel connections a browser opens per host
+BROWSER_CONNECTIONS = 6
+
+STARTUP_TIMEOUT = 60
+
+REDIRECTS = (301, 302, 303, 307, 308)
+
+
+class Client:
+    """Keep-alive HTTP connections to one server, one per thread"""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.local = threading.local()
+
+    def get(self, path, headers=None):
+        """GET a path; returns (status, headers, body, seconds)"""
+        for attempt in (0, 1):
+            conn = getattr(self.local, 'conn', None)
+            if conn is None:
+                conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path, headers=headers or {})
+                response = conn.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                self.local.conn = None
+                if attempt:
+                    raise
+                continue
+            if response.getheader('Connection', '').lower() == 'close':
+                conn.close()
+                self.local.conn = None
+            return response.status, dict(response.getheaders()), body, time.perf_counter() - started
+
+
+def resolve(client, path, limit=5):
+    """Follow redirects; returns (final path, body)"""
+    for _ in range(limit):
+        status, headers, body, _ = client.get(path)
+        if status in REDIRECTS:
+            path = urlsplit(urljoin(path, headers['Location'])).path
+            continue
+        if status != 200:
+            raise RuntimeError(f"GET {path} returned {status}")
+        return path, body
+    raise RuntimeError(f"Too many redirects from {path}")
+
+
+def discover_assets(client, entry='/'):
+    """Return (dashboard path, [asset paths], [external URLs]) of one dashboard view"""
+    dashboard, body = resolve(client, entry)
+    assets, external = [], []
+    seen = {dashboard}
+    queue = [(dashboard, body)]
+    while queue:
+        page, body = queue.pop(0)
+        pages, urls = page_urls(body.decode('utf-8', errors='replace'))
+        for url in pages + urls:
+            absolute = urljoin(page, url)
+            if urlsplit(absolute).netloc:
+                if absolute not in external:
+                    external.append(absolute)
+                continue
+            path = urlsplit(absolute).path
+            if path in seen:
+                continue
+            seen.add(path)
+            assets.append(path)
+            if url in pages:
+                status, _, page_body, _ = client.get(path)
+                if status == 200:
+                    queue.append((path, page_body))
+    return dashboard, assets, external
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(q / 100 * len(sorted_values)) - 1)]
+
+
+class User(threading.Thread):
+    """One simulated browser replaying dashboard views until the deadline"""
+
+    def __init__(self, client, entry, assets, deadline, results, connections, views_per_session):
+        super().__init__(daemon=True)
+        self.views_per_session = views_per_session
+        self.client = client
+        self.entry = entry
+        self.assets = assets
+        self.deadline = deadline
+        self.results = results
+        self.pool = ThreadPoolExecutor(max_workers=connections)
+        # path -> (validator headers, fresh until)
+        self.cache = {}
+
+    def fetch(self, path):
+        cached = self.cache.get(path)
+        if cached and cached[1] > time.time():
+            return None
+        status, headers, body, seconds = self.client.get(path, cached[0] if cached else None)
+        validators = {}
+        if headers.get('ETag'):
+            validators['If-None-Match'] = headers['ETag']
+        if headers.get('Last-Modified'):
+            validators['If-Modified-Since'] = headers['Last-Modified']
+        max_age = re.search(r'max-age=(\d+)', headers.get('Cache-Control', ''))
+        fresh_until = time.time() + int(max_age.group(1)) if max_age else 0
+        if validators or fresh_until:
+            self.cache[path] = (validators, fresh_until)
+        return status, len(body), seconds, headers
+
+    def view(self):
+        started = time.perf_counter()
+        requests = []
+        path = self.entry
+        # The entry page (and the redirect to the current build), then all assets in parallel
+        for _ in range(5):
+            result = self.fetch(path)
+            if result is None:
+                break
+            requests.append(result[:3])
+            if result[0] not in REDIRECTS:
+                break
+            path = urlsplit(urljoin(path, result[3]['Location'])).path
+        requests.extend(r[:3] for r in self.pool.map(self.fetch, self.assets) if r)
+        return time.perf_counter() - started, requests
+
+    def run(self):
+        try:
+            views = 0
+            while time.time() < self.deadline:
+                if views % self.views_per_session == 0:
+                    self.cache = {}
+                cold = not self.cache
+                seconds, requests = self.view()
+                self.results.append((cold, seconds, requests))
+                views += 1
+        finally:
+            self.pool.shutdown()
+
+
+def run_load(client, entry, assets, users, duration, connections, views_per_session):
+    """Replay concurrent sessions for `duration` seconds; returns the summary dict"""
+    results = []
+    started = time.perf_counter()
+    deadline = time.time() + duration
+    threads = [User(client, entry, assets, deadline, results, connections, views_per_session)
+               for _ in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    view_times = sorted(seconds for _, seconds, _ in results)
+    requests = [r for _, _, view_requests in results for r in view_requests]
+    request_times = sorted(seconds for _, _, seconds in requests)
+    total_bytes = sum(size for _, size, _ in requests)
+    errors = sum(1 for status, _, _ in requests if status >= 400)
+
+    def mean_bytes(cold):
+        sizes = [sum(size for _, size, _ in view_requests)
+                 for is_cold, _, view_requests in results if is_cold == cold]
+        return sum(sizes) / len(sizes) if sizes else 0
+    return {
+        'views': len(results),
+        'views_per_second': len(results) / elapsed,
+        'requests': len(requests),
+        'requests_per_second': len(requests) / elapsed,
+        'errors': errors,
+        'view_p50_ms': percentile(view_times, 50) * 1000,
+        'view_p95_ms': percentile(view_times, 95) * 1000,
+        'view_p99_ms': percentile(view_times, 99) * 1000,
+        'request_p50_ms': percentile(request_times, 50) * 1000,
+        'request_p95_ms': percentile(request_times, 95) * 1000,
+        'request_p99_ms': percentile(request_times, 99) * 1000,
+        'bytes_per_view': total_bytes / len(results) if results else 0,
+        'bytes_per_cold_view': mean_bytes(True),
+        'bytes_per_warm_view': mean_bytes(False),
+        'megabytes_per_second': total_bytes / elapsed / 1024 ** 2,
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(command, port):
+    """Start a server command and wait until /health answers"""
+    env = dict(os.environ, PORT=str(port))
+    process = subprocess.Popen(shlex.split(command.format(port=port)), env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"'{command}' exited with status {process.returncode}")
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+        try:
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return process
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            conn.close()
+        # Not up yet, or answering with an error while it starts
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"'{command}' did not answer on port {port}")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def measure(name, host, port, args):
+    client = Client(host, port)
+    dashboard, assets, external = discover_assets(client, args.entry)
+    print(f"\n[{name}] {dashboard}: {len(assets)} assets per view"
+          + (f", {len(external)} external (not loaded)" if external else ''))
+    # Unmeasured warm-up so lazy initialisation is not part of the numbers
+    run_load(client, args.entry, assets, 1, args.warmup, args.connections, args.views_per_session)
+    summary = run_load(client, args.entry, assets, args.users, args.duration, args.connections,
+                       args.views_per_session)
+    summary.update(name=name, assets=len(assets))
+    return summary
+
+
+def print_table(summaries):
+    columns = [
+        ('config', 'name', '{}'),
+        ('views/s', 'views_per_second', '{:.1f}'),
+        ('req/s', 'requests_per_second', '{:.0f}'),
+        ('view p50', 'view_p50_ms', '{:.0f} ms'),
+        ('view p95', 'view_p95_ms', '{:.0f} ms'),
+        ('view p99', 'view_p99_ms', '{:.0f} ms'),
+        ('req p50', 'request_p50_ms', '{:.1f} ms'),
+        ('req p95', 'request_p95_ms', '{:.1f} ms'),
+        ('req p99', 'request_p99_ms', '{:.1f} ms'),
+        ('KB/view', 'bytes_per_view', '{:.0f}'),
+        ('KB/cold', 'bytes_per_cold_view', '{:.0f}'),
+        ('KB/warm', 'bytes_per_warm_view', '{:.0f}'),
+        ('errors', 'errors', '{}'),
+    ]
+    rows = [[fmt.format(summary[key] / 1024 if key.startswith('bytes') else summary[key])
+             for _, key, fmt in columns] for summary in summaries]
+    widths = [max(len(title), *(len(row[i]) for row in rows)) for i, (title, _, _) in enumerate(columns)]
+    print()
+    print('  '.join(title.rjust(width) for (title, _, _), width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(value.rjust(width) for value, width in zip(row, widths)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the COLT dashboard",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog=__doc__)
+    parser.add_argument('--config', action='append', metavar='NAME=COMMAND',
+                        help="server command to start on {port}; may be repeated")
+    parser.add_argument('--url', help="test an already running server instead of starting one")
+    parser.add_argument('--entry', default='/', help="path of the dashboard (default: /)")
+    parser.add_argument('--users', type=int, default=10, help="concurrent simulated users")
+    parser.add_argument('--duration', type=float, default=20, help="seconds to measure per config")
+    parser.add_argument('--warmup', type=float, default=2, help="seconds of unmeasured warm-up")
+    parser.add_argument('--connections', type=int, default=BROWSER_CONNECTIONS,
+                        help="parallel connections per user")
+    parser.add_argument('--views-per-session', type=int, default=3,
+                        help="views before a user starts over with an empty cache (1: every view is cold)")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    summaries = []
+    if args.url:
+        target = urlsplit(args.url)
+        summaries.append(measure(args.url, target.hostname, target.port or 80, args))
+    else:
+        for config in args.config or DEFAULT_CONFIGS:
+            name, _, command = config.partition('=')
+            if not command:
+                name, command = config, config
+            port = free_port()
+            process = start_server(command, port)
+            try:
+                summaries.append(measure(name, '127.0.0.1', port, args))
+            finally:
+                stop_server(process)
+
+    print_table(summaries)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summaries, f, indent=2)
+    return 1 if any(summary['errors'] for summary in summaries) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Network metrics over the country x country visit graph.
+
+The graph is built from the same columns create_country_pair_viz uses
+(LeaderCountryOrIGO -> CountryVisited, per TripYear) as one sparse adjacency
+matrix per year. Rolling windows are maintained by adding the entering year
+and subtracting the leaving one, so no window is rebuilt from raw rows.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+SOURCE_COLUMN = 'LeaderCountryOrIGO'
+TARGET_COLUMN = 'CountryVisited'
+YEAR_COLUMN = 'TripYear'
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-10
+MAX_ITERATIONS = 100
+
+
+def build_adjacency(df):
+    """Return (countries, years, {year: csr_matrix}) with visit counts source -> target"""
+    edges = df[[SOURCE_COLUMN, TARGET_COLUMN, YEAR_COLUMN]].dropna()
+    # Like the country pair view, a country "visiting itself" is not an edge
+    edges = edges[edges[SOURCE_COLUMN] != edges[TARGET_COLUMN]]
+    countries = np.array(sorted(set(edges[SOURCE_COLUMN]) | set(edges[TARGET_COLUMN])))
+    source = np.searchsorted(countries, edges[SOURCE_COLUMN].values)
+    target = np.searchsorted(countries, edges[TARGET_COLUMN].values)
+    year_values = edges[YEAR_COLUMN].astype(int).values
+    years = np.unique(year_values)
+
+    n = len(countries)
+    matrices = {}
+    order = np.argsort(year_values, kind='stable')
+    bounds = np.searchsorted(year_values[order], years, side='left').tolist() + [len(order)]
+    for i, year in enumerate(years):
+        rows = order[bounds[i]:bounds[i + 1]]
+        # Duplicate (source, target) entries are summed into visit counts
+        matrices[int(year)] = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float64), (source[rows], target[rows])), shape=(n, n)
+        )
+    return countries, [int(y) for y in years], matrices
+
+
+def rolling_windows(years, matrices, window):
+    """Yield (first_year, last_year, summed matrix) for each rolling window of `window` years"""
+    if window <= 1:
+        for year in years:
+            yield year, year, matrices[year]
+        return
+    n = matrices[years[0]].shape[0]
+    total = sparse.csr_matrix((n, n))
+    for year in range(years[0], years[-1] + 1):
+        if year in matrices:
+            total = total + matrices[year]
+        leaving = year - window
+        if leaving in matrices:
+            total = total - matrices[leaving]
+            total.eliminate_zeros()
+        if year - window + 1 >= years[0]:
+            yield year - window + 1, year, total
+
+
+def pagerank(adjacency, damping=PAGERANK_DAMPING):
+    """Weighted PageRank by power iteration on a sparse adjacency matrix.
+
+    Only countries with at least one visit in the matrix take part, so the
+    ranks of the active countries sum to 1; inactive countries get 0.
+    """
+    out_weight = np.asarray(adjacency.sum(axis=1)).ravel()
+    in_weight = np.asarray(adjacency.sum(axis=0)).ravel()
+    active = np.flatnonzero((out_weight > 0) | (in_weight > 0))
+    result = np.zeros(adjacency.shape[0])
+    n = len(active)
+    if n == 0:
+        return result
+    adjacency = adjacency.tocsr()[active][:, active]
+    out_weight = out_weight[active]
+    dangling = out_weight == 0
+    inverse = np.divide(1.0, out_weight, out=np.zeros(n), where=~dangling)
+    transition = sparse.diags(inverse) @ adjacency
+    transition_t = transition.T.tocsr()
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(MAX_ITERATIONS):
+        previous = rank
+        rank = damping * (transition_t @ rank + rank[dangling].sum() / n) + (1 - damping) / n
+        if np.abs(rank - previous).sum() < PAGERANK_TOLERANCE:
+            break
+    result[active] = rank
+    return result
+
+
+def label_propagation(adjacency):
+    """Community labels by weighted label propagation on the undirected visit graph"""
+    n = adjacency.shape[0]
+    weights = (adjacency + adjacency.T).tocsr()
+    labels = np.arange(n)
+    for _ in range(MAX_ITERATIONS):
+        one_hot = sparse.csr_matrix((np.ones(n), (np.arange(n), labels)), shape=(n, n))
+        # A small bonus for the current label keeps ties from oscillating
+        scores = weights @ one_hot + one_hot * 1e-6
+        new_labels = np.asarray(scores.argmax(axis=1)).ravel()
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+    # Renumber communities by size, largest first
+    unique, inverse, counts = np.unique(labels, return_inverse=True, return_counts=True)
+    rank = np.empty(len(unique), dtype=int)
+    rank[np.argsort(-counts, kind='stable')] = np.arange(len(unique))
+    return rank[inverse]
+
+
+def graph_metrics(adjacency):
+    """Per-node metrics of one adjacency matrix as a dict of arrays"""
+    out_degree = np.asarray(adjacency.sum(axis=1)).ravel()
+    in_degree = np.asarray(adjacency.sum(axis=0)).ravel()
+    # Reciprocated weight: visits i -> j matched by visits j -> i
+    mutual = np.asarray(adjacency.minimum(adjacency.T).sum(axis=1)).ravel()
+    reciprocity = np.divide(mutual, out_degree, out=np.zeros_like(mutual), where=out_degree > 0)
+    return {
+        'OutDegree': out_degree,
+        'InDegree': in_degree,
+        'Reciprocity': reciprocity,
+        'PageRank': pagerank(adjacency),
+        'Community': label_propagation(adjacency),
+    }
+
+
+def compute_network_metrics(df, windows=(1, 5)):
+    """Return a DataFrame of network metrics per country, period and window size"""
+    countries, years, matrices = build_adjacency(df)
+    frames = []
+    for window in windows:
+        for first_year, last_year, adjacency in rolling_windows(years, matrices, window):
+            metrics = graph_metrics(adjacency)
+            active = (metrics['OutDegree'] + metrics['InDegree']) > 0
+            frame = pd.DataFrame({name: values[active] for name, values in metrics.items()})
+            frame.insert(0, 'Country', countries[active])
+            frame.insert(0, 'Period', str(last_year) if window == 1 else f"{first_year}-{last_year}")
+            frame.insert(0, 'Window', window)
+            frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,243 @@
+"""Background rebuild service for the COLT dashboard.
+
+Watches the source CSV and the generator code. When either changes (and the
+change has settled for one poll interval), generate_visualizations.py runs in
+a low-priority subprocess outside the request path. The generator publishes
+its build by swapping builds/current.json, which app.py reads on every
+request, so the running app switches over only once the new build is
+complete and keeps serving the old artifacts until then.
+
+Only a successful build records the sources it was built from. A failed
+build is retried after COLT_REBUILD_RETRY seconds (default 300), waiting
+twice as long after every further failure of the same sources.
+
+Run inside the web process by setting COLT_REBUILD_WATCH=1, or standalone
+(e.g. as a separate worker dyno):
+    python rebuild_watcher.py          # watch forever
+    python rebuild_watcher.py --once   # build once if anything changed
+"""
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from build_output import BUILDS_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, run a single watcher
+    fcntl = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = os.environ.get('COLT_DATA_FILE', "Diplometrics_COLT_Travel_Dataset_Primary-HOGS-1990-2024_20250317.csv")
+POLL_INTERVAL = float(os.environ.get('COLT_REBUILD_INTERVAL', 60))
+BUILD_TIMEOUT = float(os.environ.get('COLT_REBUILD_TIMEOUT', 1800))
+RETRY_DELAY = float(os.environ.get('COLT_REBUILD_RETRY', 300))
+MAX_RETRY_DELAY = 24 * 3600
+
+GENERATOR = os.path.join(BASE_DIR, 'generate_visualizations.py')
+
+# Niceness added to the generator process so it never competes with requests
+BUILD_NICENESS = 10
+
+STATE_FILE = 'watch_state.json'
+LOCK_FILE = 'rebuild.lock'
+
+
+def code_version():
+    """Hash of the Python sources that make up the generator"""
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(BASE_DIR, '*.py'))):
+        with open(path, 'rb') as f:
+            digest.update(os.path.basename(path).encode())
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def source_fingerprint(data_file=None):
+    """Fingerprint of the input CSV (size and mtime) plus the code version"""
+    data_file = data_file or DATA_FILE
+    try:
+        stat = os.stat(data_file)
+    except OSError:
+        return None
+    return f"{stat.st_size}-{stat.st_mtime_ns}-{code_version()}"
+
+
+def read_state():
+    try:
+        with open(os.path.join(BUILDS_DIR, STATE_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_state(state):
+    os.makedirs(BUILDS_DIR, exist_ok=True)
+    path = os.path.join(BUILDS_DIR, STATE_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def retry_due(failure, fingerprint, now=None):
+    """False while a failed build of the same sources is waiting for its retry"""
+    if not failure or failure.get('fingerprint') != fingerprint:
+        return True
+    return (now or datetime.now()) >= datetime.fromisoformat(failure['retry_at'])
+
+
+def _lower_priority():
+    os.nice(BUILD_NICENESS)
+
+
+def run_generator(data_file=None):
+    """Run generate_visualizations.py in a low-priority subprocess; returns True on success"""
+    env = dict(os.environ)
+    env['COLT_DATA_FILE'] = data_file or DATA_FILE
+    env['MPLBACKEND'] = 'Agg'
+    # Keep numeric libraries to a single thread so a build uses at most one core
+    for var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        env[var] = '1'
+    kwargs = {'preexec_fn': _lower_priority} if hasattr(os, 'nice') else {}
+    try:
+        result = subprocess.run(
+            [sys.executable, GENERATOR],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            timeout=BUILD_TIMEOUT, **kwargs
+        )
+    except subprocess.TimeoutExpired:
+        print(f"Rebuild timed out after {BUILD_TIMEOUT:.0f}s")
+        return False
+    if result.returncode != 0:
+        print(f"Rebuild failed: {result.stderr.decode(errors='replace')[-2000:]}")
+    return result.returncode == 0
+
+
+class RebuildWatcher:
+    """Polls the sources and rebuilds the dashboard when they change"""
+
+    def __init__(self, data_file=None, interval=None):
+        self.data_file = data_file or DATA_FILE
+        self.interval = interval or POLL_INTERVAL
+        self.status = 'idle'
+        self.last_build = read_state().get('last_build')
+        self._pending = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def failure(self):
+        """The last failed build of sources that have not been built since, or None"""
+        return read_state().get('failure')
+
+    def check(self):
+        """Rebuild if the sources changed and stayed unchanged since the last poll"""
+        fingerprint = source_fingerprint(self.data_file)
+        state = read_state()
+        if fingerprint is None or fingerprint == state.get('fingerprint'):
+            self._pending = None
+            return False
+        if fingerprint != self._pending:
+            # Wait one more interval in case the CSV is still being copied
+            self._pending = fingerprint
+            return False
+        if not retry_due(state.get('failure'), fingerprint):
+            return False
+        return self.rebuild(fingerprint)
+
+    def rebuild(self, fingerprint=None):
+        fingerprint = fingerprint or source_fingerprint(self.data_file)
+        lock = self._acquire_lock()
+        if lock is False:
+            # Another process (e.g. a second gunicorn worker) is already building
+            return False
+        try:
+            # Another process may have finished the same build while we waited for the lock
+            if fingerprint == read_state().get('fingerprint'):
+                self._pending = None
+                return False
+            self.status = 'building'
+            started = time.time()
+            ok = run_generator(self.data_file)
+            self.last_build = {
+                'finished_at': datetime.now().isoformat(timespec='seconds'),
+                'seconds': round(time.time() - started, 1),
+                'ok': ok,
+            }
+            state = read_state()
+            state['last_build'] = self.last_build
+            if ok:
+                state['fingerprint'] = fingerprint
+                state.pop('failure', None)
+            else:
+                # Retry the same sources later, waiting twice as long after every failure
+                failure = state.get('failure') or {}
+                attempts = failure.get('attempts', 0) + 1 if failure.get('fingerprint') == fingerprint else 1
+                failed_at = datetime.now()
+                delay = min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+                state['failure'] = {
+                    'fingerprint': fingerprint,
+                    'attempts': attempts,
+                    'failed_at': failed_at.isoformat(timespec='seconds'),
+                    'retry_at': (failed_at + timedelta(seconds=delay)).isoformat(timespec='seconds'),
+                }
+            write_state(state)
+            self._pending = None
+            return ok
+        finally:
+            self.status = 'idle'
+            if lock:
+                lock.close()
+
+    def _acquire_lock(self):
+        if fcntl is None:
+            return None
+        os.makedirs(BUILDS_DIR, exist_ok=True)
+        lock = open(os.path.join(BUILDS_DIR, LOCK_FILE), 'w')
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            return False
+        return lock
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Rebuild watcher error: {str(e)}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start watching in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name='rebuild-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+if __name__ == '__main__':
+    watcher = RebuildWatcher()
+    if '--once' in sys.argv:
+        fingerprint = source_fingerprint(watcher.data_file)
+        if fingerprint is None:
+            print(f"Data file not found: {watcher.data_file}")
+            sys.exit(1)
+        if fingerprint == read_state().get('fingerprint'):
+            print("Sources unchanged, nothing to rebuild")
+        else:
+            sys.exit(0 if watcher.rebuild(fingerprint) else 1)
+    else:
+        print(f"Watching {watcher.data_file} every {watcher.interval:.0f}s")
+        watcher.run()
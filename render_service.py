@@ -0,0 +1,239 @@
+"""On-demand rendering of the static matplotlib charts with custom parameters.
+
+/render/<chart>.png?n=20&start=2000&end=2010&w=800 re-runs one of the plot
+functions from generate_visualizations.py on the current build's trips (read
+from its colt.sqlite store). Rendering happens in a bounded process pool, off
+the request thread, because matplotlib is neither thread-safe nor fast.
+Identical concurrent requests share one render. Results are kept in a
+size-bounded LRU memory cache backed by a size-bounded disk cache.
+"""
+import hashlib
+import io
+import multiprocessing
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from build_output import BUILDS_DIR
+
+RENDER_WORKERS = int(os.environ.get('COLT_RENDER_WORKERS', 2))
+# Renders waiting or running at once; further requests are turned away
+MAX_PENDING = int(os.environ.get('COLT_RENDER_MAX_PENDING', 16))
+RENDER_TIMEOUT = float(os.environ.get('COLT_RENDER_TIMEOUT', 60))
+MEMORY_CACHE_BYTES = int(os.environ.get('COLT_RENDER_MEMORY_CACHE_MB', 32)) * 1024 * 1024
+DISK_CACHE_BYTES = int(os.environ.get('COLT_RENDER_DISK_CACHE_MB', 256)) * 1024 * 1024
+DISK_CACHE_DIR = os.environ.get('COLT_RENDER_CACHE_DIR', os.path.join(BUILDS_DIR, 'render_cache'))
+
+# chart name -> (plot function, figure width in inches, default top-n or None)
+CHARTS = {
+    'trips_per_year': ('plot_trips_per_year', 14, None),
+    'top_destinations': ('plot_top_destinations', 14, 10),
+    'region_distribution': ('plot_region_visits', 12, None),
+    'trip_duration': ('plot_trip_duration', 14, None),
+    'region_flow_heatmap': ('plot_region_heatmap', 16, None),
+    'top_leaders': ('plot_top_leaders', 14, 15),
+    'country_sparklines': ('plot_country_sparklines', 14, None),
+}
+
+MAX_N = 50
+MIN_WIDTH, MAX_WIDTH = 200, 4000
+DEFAULT_DPI = 300
+
+
+class RenderBusy(Exception):
+    """Raised when too many renders are already queued"""
+
+
+class RenderFailed(Exception):
+    """Raised when a chart cannot be drawn from a build's data"""
+
+
+def parse_params(chart, args):
+    """Validate query parameters into a canonical dict; raises KeyError/ValueError"""
+    _, inches, default_n = CHARTS[chart]
+    params = {}
+    if default_n is not None:
+        n = int(args.get('n', default_n))
+        if not 1 <= n <= MAX_N:
+            raise ValueError(f"n must be between 1 and {MAX_N}")
+        params['n'] = n
+    for name in ('start', 'end'):
+        if args.get(name) not in (None, ''):
+            params[name] = int(args[name])
+    if 'start' in params and 'end' in params and params['start'] > params['end']:
+        raise ValueError("start must not be after end")
+    if args.get('w') not in (None, ''):
+        width = int(args['w'])
+        if not MIN_WIDTH <= width <= MAX_WIDTH:
+            raise ValueError(f"w must be between {MIN_WIDTH} and {MAX_WIDTH}")
+        params['dpi'] = width / inches
+    else:
+        params['dpi'] = DEFAULT_DPI
+    return params
+
+
+# Worker process side -------------------------------------------------------
+
+_worker_data = {}
+
+
+def _load_trips(store_path):
+    """Trips of a build, cached per worker process (only the latest build is kept)"""
+    if store_path not in _worker_data:
+        import pandas as pd
+        conn = sqlite3.connect(f'file:{store_path}?mode=ro', uri=True)
+        try:
+            trips = pd.read_sql_query('SELECT * FROM trips', conn)
+        finally:
+            conn.close()
+        _worker_data.clear()
+        _worker_data[store_path] = trips
+    return _worker_data[store_path]
+
+
+def _render(store_path, chart, params):
+    import matplotlib
+    matplotlib.use('Agg')
+    import generate_visualizations as gv
+
+    trips = _load_trips(store_path)
+    if 'start' in params:
+        trips = trips[trips['TripYear'] >= params['start']]
+    if 'end' in params:
+        trips = trips[trips['TripYear'] <= params['end']]
+    if len(trips) == 0:
+        raise ValueError("No trips in the selected years")
+
+    kwargs = {k: v for k, v in params.items() if k not in ('start', 'end')}
+    buffer = io.BytesIO()
+    getattr(gv, CHARTS[chart][0])(data=trips, path=buffer, **kwargs)
+    # Plot functions skip charts whose columns are missing instead of raising
+    if not buffer.getvalue():
+        raise RenderFailed(f"{chart} cannot be drawn from this build's data (missing columns)")
+    return buffer.getvalue()
+
+
+# Request side ----------------------------------------------------------------
+
+class RenderService:
+    """Process pool plus memory/disk caches, shared by all request threads"""
+
+    def __init__(self, workers=RENDER_WORKERS, cache_dir=DISK_CACHE_DIR,
+                 memory_bytes=MEMORY_CACHE_BYTES, disk_bytes=DISK_CACHE_BYTES):
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.memory = OrderedDict()
+        self.memory_size = 0
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.pool = None
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'renders': 0, 'coalesced': 0, 'rejected': 0}
+
+    def _executor(self):
+        if self.pool is None:
+            # spawn: never fork a process that is already running server threads
+            self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        return self.pool
+
+    @staticmethod
+    def cache_key(store_path, chart, params):
+        # Each build (of each dataset) has its own store, so its path identifies the data
+        canonical = '&'.join(f'{k}={params[k]}' for k in sorted(params))
+        return hashlib.sha1(f'{store_path}/{chart}?{canonical}'.encode()).hexdigest()
+
+    def render(self, store_path, chart, params):
+        """Return PNG bytes for a chart, from cache or a (shared) render"""
+        key = self.cache_key(store_path, chart, params)
+        with self.lock:
+            png = self._memory_get(key)
+            if png is not None:
+                self.stats['memory_hits'] += 1
+                return png
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.stats['coalesced'] += 1
+            else:
+                png = self._disk_get(key)
+                if png is not None:
+                    self.stats['disk_hits'] += 1
+                    self._memory_put(key, png)
+                    return png
+                if len(self.in_flight) >= MAX_PENDING:
+                    self.stats['rejected'] += 1
+                    raise RenderBusy("Too many renders in progress")
+                self.stats['renders'] += 1
+                future = self._executor().submit(_render, store_path, chart, params)
+                self.in_flight[key] = future
+                future.add_done_callback(lambda f, key=key: self._finish(key, f))
+        return future.result(timeout=RENDER_TIMEOUT)
+
+    def _finish(self, key, future):
+        png = None if future.cancelled() or future.exception() else future.result()
+        if png is not None:
+            self._disk_put(key, png)
+        with self.lock:
+            if png is not None:
+                self._memory_put(key, png)
+            self.in_flight.pop(key, None)
+
+    def _memory_get(self, key):
+        png = self.memory.get(key)
+        if png is not None:
+            self.memory.move_to_end(key)
+        return png
+
+    def _memory_put(self, key, png):
+        if key in self.memory or len(png) > self.memory_bytes:
+            return
+        self.memory[key] = png
+        self.memory_size += len(png)
+        while self.memory_size > self.memory_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_size -= len(evicted)
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.png')
+
+    def _disk_get(self, key):
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                png = f.read()
+        except OSError:
+            return None
+        # mtime doubles as the last-used time for LRU eviction
+        os.utime(path)
+        return png
+
+    def _disk_put(self, key, png):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._disk_path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(png)
+        os.replace(tmp_path, path)
+        self._evict_disk()
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.png'):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,59 @@
+"""Stratified samples of the trips for fast preview builds.
+
+Trips are grouped into strata by year, leader region and leader country,
+where every country outside the `top_countries` most travelling ones shares
+one "other" stratum. Each stratum keeps its share of the sample
+(largest-remainder rounding, so the sample has exactly round(fraction * n)
+rows), which preserves the year, region and top-country distributions far
+better than a plain random sample of the same size.
+"""
+import numpy as np
+import pandas as pd
+
+STRATA_COLUMNS = ('TripYear', 'LeaderRegion', 'LeaderCountryOrIGO')
+OTHER = '(other)'
+
+
+def strata_keys(df, top_countries=20):
+    """Stratum label of every trip (missing strata columns are ignored)"""
+    keys = []
+    for column in STRATA_COLUMNS:
+        if column not in df.columns:
+            continue
+        values = df[column].astype(str)
+        if column == 'LeaderCountryOrIGO':
+            top = df[column].value_counts().index[:top_countries].astype(str)
+            values = values.where(values.isin(top), OTHER)
+        keys.append(values.values)
+    if not keys:
+        return pd.Series(0, index=df.index)
+    return pd.Series(pd.MultiIndex.from_arrays(keys).factorize()[0], index=df.index)
+
+
+def stratum_quotas(sizes, total):
+    """Split `total` rows across strata proportionally to their sizes"""
+    shares = sizes * (total / sizes.sum())
+    quotas = np.floor(shares).astype(np.int64)
+    remainder = int(total - quotas.sum())
+    if remainder > 0:
+        quotas[np.argsort(-(shares - quotas), kind='stable')[:remainder]] += 1
+    return quotas
+
+
+def stratified_sample(df, fraction=0.1, top_countries=20, seed=0):
+    """Return a stratified sample of `fraction` of the trips, in their original order"""
+    if not 0 < fraction <= 1:
+        raise ValueError(f"Sample fraction must be in (0, 1], got {fraction}")
+    if fraction == 1 or df.empty:
+        return df
+
+    strata = strata_keys(df, top_countries).values
+    sizes = np.bincount(strata)
+    quotas = stratum_quotas(sizes, round(fraction * len(df)))
+
+    # A random order per stratum: keep the first `quota` trips of each
+    order = np.random.default_rng(seed).permutation(len(df))
+    shuffled = pd.Series(strata[order])
+    rank = shuffled.groupby(shuffled).cumcount().values
+    keep = np.sort(order[rank < quotas[strata[order]]])
+    return df.iloc[keep]
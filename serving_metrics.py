@@ -0,0 +1,161 @@
+"""Request metrics for app.py in the Prometheus text exposition format.
+
+Every response is recorded under its route pattern (e.g. /v/<version>/<path:filename>)
+and, for file and chart routes, the requested asset name, so label cardinality
+stays bounded by the set of build artifacts. Recorded per route and asset:
+
+- colt_http_requests_total: responses by status code
+- colt_http_request_duration_seconds: latency histogram, until the response is handed
+  to the WSGI server (file bodies are then streamed by the server, e.g. via sendfile)
+- colt_http_response_bytes: histogram of response body sizes (its _sum is bytes sent)
+
+Cache hit ratios come from count_cache() calls or, for caches that keep
+their own counters, from callables registered with add_cache(). Metrics are
+kept per process; with several gunicorn workers each worker reports its own
+numbers, identified by the pid label.
+"""
+import bisect
+import os
+import threading
+import time
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES_BUCKETS = (1024, 10 * 1024, 100 * 1024, 512 * 1024, 1024 ** 2, 5 * 1024 ** 2, 20 * 1024 ** 2)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram; observe() is a bisect and two additions"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class ServingMetrics:
+    """Thread-safe registry of per-route request metrics"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.latency = {}
+        self.sizes = {}
+        self.caches = {}
+        self.cache_counts = {}
+        self.started = time.time()
+
+    def observe(self, route, asset, status, seconds, size):
+        key = (route, asset)
+        with self.lock:
+            status_key = (route, asset, status)
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.sizes[key] = Histogram(BYTES_BUCKETS)
+            histogram.observe(seconds)
+            self.sizes[key].observe(size)
+
+    def count_cache(self, name, hit):
+        """Record one lookup of a cache tracked here"""
+        with self.lock:
+            counts = self.cache_counts.setdefault(name, [0, 0])
+            counts[0] += bool(hit)
+            counts[1] += 1
+
+    def add_cache(self, name, stats):
+        """Register a callable returning (hits, lookups) for a cache with its own counters"""
+        self.caches[name] = stats
+
+    def render(self):
+        """Return all metrics in the Prometheus text format"""
+        pid = f'pid="{os.getpid()}"'
+        with self.lock:
+            requests = sorted(self.requests.items())
+            cache_stats = {name: tuple(counts) for name, counts in self.cache_counts.items()}
+            histograms = [
+                ('colt_http_request_duration_seconds', 'Time to produce the response',
+                 sorted((k, self._copy(h)) for k, h in self.latency.items())),
+                ('colt_http_response_bytes', 'Size of response bodies in bytes',
+                 sorted((k, self._copy(h)) for k, h in self.sizes.items())),
+            ]
+
+        lines = [
+            '# HELP colt_process_start_time_seconds Start time of the serving process',
+            '# TYPE colt_process_start_time_seconds gauge',
+            f'colt_process_start_time_seconds{{{pid}}} {self.started:.3f}',
+            '# HELP colt_http_requests_total Responses by route, asset and status code',
+            '# TYPE colt_http_requests_total counter',
+        ]
+        for (route, asset, status), count in requests:
+            lines.append(f'colt_http_requests_total'
+                         f'{_labels(("route", "asset", "status"), (route, asset, status), pid)} {count}')
+
+        for name, help_text, items in histograms:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for (route, asset), (buckets, counts, total, count) in items:
+                label_values = (route, asset)
+                cumulative = 0
+                for bound, bucket_count in zip(list(buckets) + ['+Inf'], counts):
+                    cumulative += bucket_count
+                    le = f'le="{_format_number(bound) if bound != "+Inf" else bound}"'
+                    lines.append(f'{name}_bucket{_labels(("route", "asset"), label_values, f"{pid},{le}")} '
+                                 f'{cumulative}')
+                lines.append(f'{name}_sum{_labels(("route", "asset"), label_values, pid)} '
+                             f'{_format_number(total)}')
+                lines.append(f'{name}_count{_labels(("route", "asset"), label_values, pid)} {count}')
+
+        lines += [
+            '# HELP colt_cache_hits_total Cache lookups answered from the cache',
+            '# TYPE colt_cache_hits_total counter',
+        ]
+        cache_stats.update((name, stats()) for name, stats in self.caches.items())
+        cache_stats = dict(sorted(cache_stats.items()))
+        for name, (hits, _) in cache_stats.items():
+            lines.append(f'colt_cache_hits_total{_labels(("cache",), (name,), pid)} {hits}')
+        lines += [
+            '# HELP colt_cache_lookups_total Cache lookups',
+            '# TYPE colt_cache_lookups_total counter',
+        ]
+        for name, (_, lookups) in cache_stats.items():
+            lines.append(f'colt_cache_lookups_total{_labels(("cache",), (name,), pid)} {lookups}')
+        lines += [
+            '# HELP colt_cache_hit_ratio Share of cache lookups answered from the cache',
+            '# TYPE colt_cache_hit_ratio gauge',
+        ]
+        for name, (hits, lookups) in cache_stats.items():
+            ratio = hits / lookups if lookups else 0
+            lines.append(f'colt_cache_hit_ratio{_labels(("cache",), (name,), pid)} {ratio:.6f}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _copy(histogram):
+        return histogram.buckets, list(histogram.counts), histogram.sum, histogram.count
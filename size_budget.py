@@ -0,0 +1,251 @@
+"""Artifact size report and page-weight budgets for a dashboard build.
+
+After a build is generated, check_build() writes size_manifest.json into it:
+every artifact's raw and compressed (gzip, and brotli when installed) size,
+plus the total weight of a first dashboard view (the dashboard, every iframe
+page and everything they load) and of each iframe view on its own. Sizes are
+compared with the previous build's manifest, and the budgets in
+size_budgets.json decide whether the build may be published:
+
+    {
+      "artifacts": {"*.png": {"raw": 1048576}, "*.html": {"raw": 6291456, "gzip": 2097152}},
+      "first_view": {"raw": 25165824, "gzip": 8388608},
+      "view": {"raw": 6291456},
+      "max_growth_percent": 10
+    }
+
+Artifact budgets use the first matching file pattern; max_growth_percent
+limits how much the raw first-view weight may grow over the previous build.
+Growth is always measured against the published build, so an intended
+increase is accepted once with accept_growth (generate_visualizations.py
+--accept-growth); publishing that build makes it the new baseline.
+
+Usage:
+    python size_budget.py [build directory]   # defaults to the current build
+"""
+import fnmatch
+import gzip
+import json
+import os
+import re
+import sys
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+try:
+    import brotli
+except ImportError:  # brotli sizes are only reported when the package is installed
+    brotli = None
+
+MANIFEST_FILE = 'size_manifest.json'
+BUDGET_FILE = os.environ.get('COLT_SIZE_BUDGETS',
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), 'size_budgets.json'))
+DASHBOARD_FILE = 'colt_complete_dashboard.html'
+
+# Build bookkeeping, not part of what browsers download
+EXCLUDED_FILES = {MANIFEST_FILE, 'build_info.json'}
+
+FETCH_PATTERN = re.compile(r'''fetch\(\s*['"]([^'"]+)['"]''')
+
+
+class AssetParser(HTMLParser):
+    """Collect the URLs a browser loads from an HTML page"""
+
+    def __init__(self):
+        super().__init__()
+        self.pages = []
+        self.assets = []
+        self.scripts = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'iframe' and attrs.get('src'):
+            self.pages.append(attrs['src'])
+        elif tag in ('img', 'script') and attrs.get('src'):
+            self.assets.append(attrs['src'])
+        elif tag == 'link' and attrs.get('href') and 'stylesheet' in (attrs.get('rel') or ''):
+            self.assets.append(attrs['href'])
+
+    def handle_data(self, data):
+        self.scripts.append(data)
+
+
+def page_urls(html):
+    """Return (iframe URLs, other asset URLs) referenced by an HTML page, in document order"""
+    parser = AssetParser()
+    parser.feed(html)
+    assets = list(parser.assets)
+    for script in parser.scripts:
+        assets.extend(FETCH_PATTERN.findall(script))
+    return parser.pages, assets
+
+
+def artifact_sizes(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    sizes = {'raw': len(data), 'gzip': len(gzip.compress(data, compresslevel=6, mtime=0))}
+    if brotli is not None:
+        sizes['brotli'] = len(brotli.compress(data))
+    return sizes
+
+
+def view_files(build_dir, page):
+    """Files of a build loaded by a page and everything it embeds, plus external URLs"""
+    files, external = [page], []
+    queue = [page]
+    while queue:
+        current = queue.pop(0)
+        with open(os.path.join(build_dir, current), encoding='utf-8', errors='replace') as f:
+            pages, assets = page_urls(f.read())
+        for url in pages + assets:
+            absolute = urljoin(current, url)
+            if urlsplit(absolute).netloc:
+                if absolute not in external:
+                    external.append(absolute)
+                continue
+            name = urlsplit(absolute).path.lstrip('/')
+            if name in files or not os.path.isfile(os.path.join(build_dir, name)):
+                continue
+            files.append(name)
+            if url in pages:
+                queue.append(name)
+    return files, external
+
+
+def build_manifest(build_dir):
+    """Sizes of every artifact and of the first dashboard view and each iframe view"""
+    artifacts = {}
+    for name in sorted(os.listdir(build_dir)):
+        path = os.path.join(build_dir, name)
+        if os.path.isfile(path) and name not in EXCLUDED_FILES:
+            artifacts[name] = artifact_sizes(path)
+
+    def view_totals(files, external):
+        totals = {kind: sum(artifacts[name].get(kind, 0) for name in files) for kind in artifacts[files[0]]}
+        return dict(totals, files=files, external=external)
+
+    views = {}
+    if DASHBOARD_FILE in artifacts:
+        files, external = view_files(build_dir, DASHBOARD_FILE)
+        views['first_view'] = view_totals(files, external)
+        with open(os.path.join(build_dir, DASHBOARD_FILE), encoding='utf-8') as f:
+            iframes, _ = page_urls(f.read())
+        for page in iframes:
+            if page in artifacts:
+                views[page] = view_totals(*view_files(build_dir, page))
+    return {'artifacts': artifacts, 'views': views}
+
+
+def read_manifest(build_dir):
+    try:
+        with open(os.path.join(build_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_budgets(path=BUDGET_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except OSError:
+        return {}
+
+
+def first_view_growth(manifest, previous):
+    """Raw first-view growth over the previous build in percent, or None without a baseline"""
+    old_view = (previous or {}).get('views', {}).get('first_view')
+    new_view = manifest['views'].get('first_view')
+    if not old_view or not new_view or not old_view['raw']:
+        return None
+    return (new_view['raw'] - old_view['raw']) / old_view['raw'] * 100
+
+
+def check_budgets(manifest, budgets, previous=None, accept_growth=False):
+    """Return a list of budget violations (empty if the build is within budget)"""
+    violations = []
+    for name, sizes in manifest['artifacts'].items():
+        for pattern, limits in budgets.get('artifacts', {}).items():
+            if fnmatch.fnmatch(name, pattern):
+                for kind, limit in (limits or {}).items():
+                    if sizes.get(kind, 0) > limit:
+                        violations.append(f"{name}: {kind} {sizes[kind]:,} B > budget {limit:,} B ({pattern})")
+                break
+
+    for view, totals in manifest['views'].items():
+        limits = budgets.get('first_view' if view == 'first_view' else 'view', {})
+        for kind, limit in limits.items():
+            if totals.get(kind, 0) > limit:
+                violations.append(f"{view}: {kind} total {totals[kind]:,} B > budget {limit:,} B")
+
+    max_growth = budgets.get('max_growth_percent')
+    growth = first_view_growth(manifest, previous)
+    if max_growth is not None and growth is not None and growth > max_growth and not accept_growth:
+        violations.append(f"first_view: raw size grew {growth:.1f}% > allowed {max_growth}% "
+                          f"(rebuild with --accept-growth if intended)")
+    return violations
+
+
+def format_change(new, old):
+    if old is None:
+        return 'new'
+    if new == old:
+        return '='
+    return f"{new - old:+,} ({(new - old) / old * 100:+.1f}%)" if old else f"{new - old:+,}"
+
+
+def format_report(manifest, previous=None):
+    """Human-readable size report with changes against the previous build"""
+    old_artifacts = (previous or {}).get('artifacts', {})
+    old_views = (previous or {}).get('views', {})
+    lines = [f"{'artifact':<34} {'raw':>12} {'gzip':>12}  change (raw)"]
+    for name, sizes in sorted(manifest['artifacts'].items(), key=lambda item: -item[1]['raw']):
+        old = old_artifacts.get(name, {}).get('raw')
+        lines.append(f"{name:<34} {sizes['raw']:>12,} {sizes['gzip']:>12,}  {format_change(sizes['raw'], old)}")
+    for name in sorted(set(old_artifacts) - set(manifest['artifacts'])):
+        lines.append(f"{name:<34} {'removed':>12}")
+    lines.append('')
+    lines.append(f"{'view':<34} {'raw':>12} {'gzip':>12}  change (raw)")
+    for view, totals in manifest['views'].items():
+        old = old_views.get(view, {}).get('raw')
+        lines.append(f"{view:<34} {totals['raw']:>12,} {totals['gzip']:>12,}  {format_change(totals['raw'], old)}")
+    external = manifest['views'].get('first_view', {}).get('external')
+    if external:
+        lines.append(f"(not counted, loaded from other hosts: {', '.join(external)})")
+    return '\n'.join(lines)
+
+
+def check_build(build_dir, previous_dir=None, budgets=None, accept_growth=False):
+    """Write the manifest of a build, print the report and return the budget violations"""
+    budgets = load_budgets() if budgets is None else budgets
+    manifest = build_manifest(build_dir)
+    previous = read_manifest(previous_dir) if previous_dir else None
+    growth = first_view_growth(manifest, previous)
+    max_growth = budgets.get('max_growth_percent')
+    if accept_growth and growth is not None and max_growth is not None and growth > max_growth:
+        # Recorded so the manifest shows why this build passed
+        manifest['accepted_growth_percent'] = round(growth, 1)
+        print(f"First-view growth of {growth:.1f}% accepted (allowed {max_growth}%)")
+    with open(os.path.join(build_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=1)
+    print(format_report(manifest, previous))
+    violations = check_budgets(manifest, budgets, previous, accept_growth)
+    for violation in violations:
+        print(f"✗ Size budget exceeded: {violation}")
+    return violations
+
+
+if __name__ == '__main__':
+    from build_output import build_path, current_version, read_pointer
+
+    if len(sys.argv) > 1:
+        build_dir, previous_dir = sys.argv[1], None
+    else:
+        version = current_version()
+        if not version:
+            print("No published build")
+            sys.exit(1)
+        build_dir = build_path(version)
+        previous = read_pointer().get('previous')
+        previous_dir = build_path(previous) if previous else None
+    sys.exit(1 if check_build(build_dir, previous_dir) else 0)
@@ -0,0 +1,207 @@
+"""Export a dashboard build as a self-contained static site with offline caching.
+
+The exported site needs no Python process: any static host (GitHub Pages,
+Netlify, S3, nginx) can serve it. Starting from the dashboard, every page,
+image and data file it loads is copied under a fingerprinted name
+(trips_per_year.3f2a9c1e0b.png) and the references are rewritten, so all
+files except index.html and sw.js can be cached forever. plotly.js is
+written once as a local file and replaces both the CDN script tags and the
+copies inlined into standalone figure pages.
+
+precache-manifest.json lists every file of the site, and the generated
+service worker (sw.js) precaches them on the first visit. Afterwards the
+dashboard, its iframes, images and data blobs load from the local cache.
+A new export changes sw.js, the browser installs the new cache in the
+background and drops the old one.
+
+Usage:
+    python static_export.py [build directory] [--dataset NAME] [--out site]
+"""
+import argparse
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+from urllib.parse import urljoin, urlsplit
+
+from figure_io import plotly_js
+from size_budget import DASHBOARD_FILE, page_urls, view_files
+
+INDEX_FILE = 'index.html'
+MANIFEST_FILE = 'precache-manifest.json'
+SERVICE_WORKER_FILE = 'sw.js'
+PLOTLY_FILE = 'plotly.min.js'
+
+# CDN copies of plotly.js are replaced with the bundled one
+PLOTLY_CDN_PATTERN = re.compile(r'^https://cdn\.plot\.ly/plotly-[\w.-]*\.js$')
+
+FINGERPRINT_LENGTH = 10
+
+SERVICE_WORKER_TEMPLATE = """// Generated by static_export.py; precaches the whole dashboard for offline use
+const CACHE_PREFIX = 'colt-' + self.registration.scope + '-';
+const CACHE = CACHE_PREFIX + '{{ VERSION }}';
+const PRECACHE = {{ PRECACHE }};
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(CACHE).then(cache => cache.addAll(PRECACHE)).then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    // Drop the caches of previous exports of this site
+    event.waitUntil(
+        caches.keys().then(keys => Promise.all(
+            keys.filter(key => key.startsWith(CACHE_PREFIX) && key !== CACHE).map(key => caches.delete(key))
+        )).then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const url = new URL(event.request.url);
+    if (event.request.method !== 'GET' || url.origin !== self.location.origin) {
+        return;
+    }
+    // The site root is served by index.html
+    const scope = new URL(self.registration.scope);
+    const target = url.pathname === scope.pathname ? new URL('{{ INDEX }}', scope).href : event.request;
+    event.respondWith(
+        caches.open(CACHE)
+            .then(cache => cache.match(target, { ignoreSearch: true }))
+            .then(cached => cached || fetch(event.request))
+    );
+});
+"""
+
+REGISTER_SCRIPT = """
+    <script>
+        // Precache the whole dashboard once the first view has loaded
+        if ('serviceWorker' in navigator) {
+            window.addEventListener('load', () => navigator.serviceWorker.register('{{ SERVICE_WORKER }}'));
+        }
+    </script>
+"""
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+def fingerprinted_name(name, data):
+    """trips_per_year.png -> trips_per_year.<hash>.png"""
+    stem, ext = posixpath.splitext(name)
+    return f"{stem}.{content_hash(data)}{ext}"
+
+
+def replace_reference(html, url, new_url):
+    """Replace a quoted URL (attribute value or fetch() argument) in a page"""
+    return re.sub(r'''(?<=["'])''' + re.escape(url) + r'''(?=["'])''', lambda match: new_url, html)
+
+
+def rewrite_page(html, page, names, plotly_name):
+    """Point a page's references at the exported names and share plotly.js"""
+    inline_plotly = f'<script type="text/javascript">{plotly_js()}</script>'
+    if inline_plotly in html:
+        html = html.replace(inline_plotly, f'<script src="{plotly_name}"></script>')
+
+    pages, assets = page_urls(html)
+    directory = posixpath.dirname(page) or '.'
+    for url in dict.fromkeys(pages + assets):
+        absolute = urljoin(page, url)
+        if urlsplit(absolute).netloc:
+            target = plotly_name if PLOTLY_CDN_PATTERN.match(absolute) else None
+        else:
+            target = names.get(urlsplit(absolute).path.lstrip('/'))
+        if target:
+            html = replace_reference(html, url, posixpath.relpath(target, directory))
+    return html
+
+
+def prepare_output(out_dir):
+    """Empty the output directory, refusing to clear anything that is not a previous export"""
+    if os.path.isdir(out_dir) and os.listdir(out_dir):
+        if not os.path.isfile(os.path.join(out_dir, MANIFEST_FILE)):
+            raise RuntimeError(f"{out_dir} is not empty and is not a previous export")
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+
+
+def export_site(build_dir, out_dir):
+    """Write the static site of a build to out_dir and return its precache manifest"""
+    files, _ = view_files(build_dir, DASHBOARD_FILE)
+    prepare_output(out_dir)
+    manifest = {}
+
+    def write(name, data):
+        with open(os.path.join(out_dir, name), 'wb') as f:
+            f.write(data)
+        manifest[name] = {'revision': content_hash(data), 'bytes': len(data)}
+
+    plotly_data = plotly_js().encode('utf-8')
+    plotly_name = fingerprinted_name(PLOTLY_FILE, plotly_data)
+    write(plotly_name, plotly_data)
+
+    # Images and data files first, then pages from the innermost iframe out,
+    # so every page is fingerprinted after the files it references
+    names = {}
+    pages = [name for name in files if name.endswith('.html')]
+    for name in files:
+        if name not in pages:
+            with open(os.path.join(build_dir, name), 'rb') as f:
+                data = f.read()
+            names[name] = fingerprinted_name(name, data)
+            write(names[name], data)
+
+    for page in reversed(pages):
+        with open(os.path.join(build_dir, page), encoding='utf-8') as f:
+            html = rewrite_page(f.read(), page, names, plotly_name)
+        if page == DASHBOARD_FILE:
+            html = html.replace('</body>', REGISTER_SCRIPT.replace('{{ SERVICE_WORKER }}', SERVICE_WORKER_FILE)
+                                + '</body>', 1)
+            write(INDEX_FILE, html.encode('utf-8'))
+        else:
+            data = html.encode('utf-8')
+            names[page] = fingerprinted_name(page, data)
+            write(names[page], data)
+
+    # The cache version changes whenever any file of the site does
+    version = content_hash(json.dumps(manifest, sort_keys=True).encode('utf-8'))
+    precache = [INDEX_FILE] + sorted(name for name in manifest if name != INDEX_FILE)
+    service_worker = SERVICE_WORKER_TEMPLATE
+    service_worker = service_worker.replace('{{ VERSION }}', version)
+    service_worker = service_worker.replace('{{ PRECACHE }}', json.dumps(precache, indent=4))
+    service_worker = service_worker.replace('{{ INDEX }}', INDEX_FILE)
+    with open(os.path.join(out_dir, SERVICE_WORKER_FILE), 'w', encoding='utf-8') as f:
+        f.write(service_worker)
+
+    result = {'version': version, 'files': {name: manifest[name] for name in precache}}
+    with open(os.path.join(out_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(result, f, indent=1)
+    return result
+
+
+if __name__ == '__main__':
+    from build_output import build_path, current_version, dataset_builds_dir
+
+    parser = argparse.ArgumentParser(description="Export a dashboard build as a static site")
+    parser.add_argument('build_dir', nargs='?', help="build directory (default: the current build)")
+    parser.add_argument('--dataset', help="export the current build of a dataset namespace")
+    parser.add_argument('--out', default='site', help="output directory (default: site)")
+    args = parser.parse_args()
+
+    build_dir = args.build_dir
+    if build_dir is None:
+        builds_dir = dataset_builds_dir(args.dataset) if args.dataset else None
+        version = current_version(builds_dir)
+        if not version:
+            print("No published build")
+            sys.exit(1)
+        build_dir = build_path(version, builds_dir)
+
+    result = export_site(build_dir, args.out)
+    total = sum(entry['bytes'] for entry in result['files'].values())
+    print(f"✓ Exported {build_dir} to {args.out}: {len(result['files'])} files, {total:,} bytes "
+          f"(service worker cache {result['version']})")
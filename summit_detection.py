@@ -0,0 +1,195 @@
+"""Co-travel and summit detection: leaders who were in the same country at the same time.
+
+Each trip becomes an inclusive interval of days at its destination: from the
+trip start date to the end date when the data has one, otherwise to start +
+TripDuration - 1 (one day when the duration is unknown). Intervals are
+sorted per destination once, and two sweeps run over each destination:
+
+- find_gatherings: a sweep over start/end events. Right before the first end
+  that follows a run of starts, the active intervals all share a day and
+  form a maximal gathering (a maximal clique of the interval graph)
+- find_co_travel: a sweep with a min-heap of active end days, pairing each
+  visit with the visits still active when it starts
+
+Both are O(n log n) plus the size of their output, instead of the quadratic
+self-join of all trips to the same destination.
+"""
+import heapq
+
+import numpy as np
+import pandas as pd
+
+LEADER_COLUMN = 'LeaderFullName'
+LEADER_COUNTRY_COLUMN = 'LeaderCountryOrIGO'
+DESTINATION_COLUMN = 'CountryVisited'
+YEAR_COLUMN = 'TripYear'
+DURATION_COLUMN = 'TripDuration'
+
+# Date fields, by the names used across COLT exports (first one present is used)
+START_DATE_COLUMNS = ('TripStartDate', 'StartDate', 'TripBeginDate')
+END_DATE_COLUMNS = ('TripEndDate', 'EndDate')
+
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def _first_column(df, candidates):
+    return next((column for column in candidates if column in df.columns), None)
+
+
+def has_trip_dates(df):
+    """True if the data has a trip start date column, which summit detection needs"""
+    return _first_column(df, START_DATE_COLUMNS) is not None
+
+
+def trip_intervals(df):
+    """Trips with a known start date as [Leader, LeaderCountry, Destination, Year, Start, End] (day numbers)"""
+    start_column = _first_column(df, START_DATE_COLUMNS)
+    if start_column is None:
+        raise ValueError(f"No trip start date column (expected one of {', '.join(START_DATE_COLUMNS)})")
+    starts = pd.to_datetime(df[start_column], errors='coerce')
+
+    durations = pd.to_numeric(df[DURATION_COLUMN], errors='coerce') if DURATION_COLUMN in df.columns \
+        else pd.Series(np.nan, index=df.index)
+    days = durations.fillna(1).clip(lower=1).round().astype(np.int64)
+    start_days = (starts.values.astype('datetime64[D]') - EPOCH).astype(np.int64)
+    end_days = start_days + days.values - 1
+
+    end_column = _first_column(df, END_DATE_COLUMNS)
+    if end_column is not None:
+        ends = pd.to_datetime(df[end_column], errors='coerce')
+        recorded = (ends.values.astype('datetime64[D]') - EPOCH).astype(np.int64)
+        use_recorded = ends.notna().values & (recorded >= start_days)
+        end_days = np.where(use_recorded, recorded, end_days)
+
+    # The trip year is the reported one; fall back to the start date's year
+    years = pd.to_numeric(df[YEAR_COLUMN], errors='coerce') if YEAR_COLUMN in df.columns \
+        else pd.Series(np.nan, index=df.index)
+    years = years.fillna(starts.dt.year)
+
+    intervals = pd.DataFrame({
+        'Leader': df[LEADER_COLUMN].values,
+        'LeaderCountry': df[LEADER_COUNTRY_COLUMN].values,
+        'Destination': df[DESTINATION_COLUMN].values,
+        'Year': years.values,
+        'Start': start_days,
+        'End': end_days,
+    })
+    valid = starts.notna().values & intervals['Destination'].notna().values & intervals['Leader'].notna().values
+    intervals = intervals[valid]
+    intervals['Year'] = intervals['Year'].astype(int)
+    return intervals.sort_values(['Destination', 'Start', 'End'], kind='stable').reset_index(drop=True)
+
+
+def _destination_slices(intervals):
+    """(destination, start row, stop row) of each destination in sorted intervals"""
+    destinations = intervals['Destination'].values
+    if len(destinations) == 0:
+        return []
+    bounds = np.flatnonzero(destinations[1:] != destinations[:-1]) + 1
+    starts = np.concatenate([[0], bounds])
+    stops = np.concatenate([bounds, [len(destinations)]])
+    return [(destinations[a], a, b) for a, b in zip(starts, stops)]
+
+
+def maximal_overlaps(starts, ends):
+    """Maximal groups of inclusive intervals sharing at least one day.
+
+    Returns (member positions, first shared day, last shared day) per group.
+    """
+    n = len(starts)
+    # Starts sort before ends on the same day because intervals are inclusive
+    days = np.concatenate([starts, ends])
+    kinds = np.concatenate([np.zeros(n, dtype=np.int8), np.ones(n, dtype=np.int8)])
+    order = np.lexsort((kinds, days))
+
+    groups = []
+    active = {}
+    last_start = None
+    adding = False
+    for event in order.tolist():
+        if event < n:
+            active[event] = None
+            last_start = starts[event]
+            adding = True
+        else:
+            if adding:
+                groups.append((list(active), last_start, ends[event - n]))
+                adding = False
+            del active[event - n]
+    return groups
+
+
+def overlapping_pairs(starts, ends):
+    """All pairs (i, j) of intervals sharing at least one day; starts must be sorted"""
+    pairs = []
+    heap = []
+    for i in range(len(starts)):
+        while heap and heap[0][0] < starts[i]:
+            heapq.heappop(heap)
+        pairs.extend((j, i) for _, j in heap)
+        heapq.heappush(heap, (ends[i], i))
+    return pairs
+
+
+def _day_to_date(days):
+    return (EPOCH + np.asarray(days, dtype='timedelta64[D]')).astype('datetime64[ns]')
+
+
+def find_gatherings(intervals, min_leaders=2):
+    """Maximal gatherings of at least `min_leaders` distinct leaders, largest first"""
+    leaders = intervals['Leader'].values
+    countries = intervals['LeaderCountry'].values
+    years = intervals['Year'].values
+    starts = intervals['Start'].values
+    ends = intervals['End'].values
+
+    rows = []
+    for destination, a, b in _destination_slices(intervals):
+        if b - a < min_leaders:
+            continue
+        for members, first_day, last_day in maximal_overlaps(starts[a:b], ends[a:b]):
+            if len(members) < min_leaders:
+                continue
+            present = {}
+            for m in members:
+                present.setdefault(leaders[a + m], countries[a + m])
+            if len(present) < min_leaders:
+                continue
+            rows.append((destination, int(years[a + min(members)]), first_day, last_day,
+                         len(present), len(set(present.values())),
+                         list(present.keys()), list(present.values())))
+
+    gatherings = pd.DataFrame(rows, columns=['Destination', 'Year', 'Start', 'End', 'Leaders',
+                                             'Countries', 'LeaderNames', 'LeaderCountries'])
+    gatherings['Start'] = _day_to_date(gatherings['Start'].values)
+    gatherings['End'] = _day_to_date(gatherings['End'].values)
+    return gatherings.sort_values(['Leaders', 'Start'], ascending=[False, True],
+                                  kind='stable').reset_index(drop=True)
+
+
+def find_co_travel(intervals):
+    """Pairs of different leaders present in the same country on at least one common day"""
+    leaders = intervals['Leader'].values
+    starts = intervals['Start'].values
+    ends = intervals['End'].values
+
+    first, second = [], []
+    for _, a, b in _destination_slices(intervals):
+        for i, j in overlapping_pairs(starts[a:b], ends[a:b]):
+            if leaders[a + i] != leaders[a + j]:
+                first.append(a + i)
+                second.append(a + j)
+    first, second = np.array(first, dtype=np.int64), np.array(second, dtype=np.int64)
+
+    pairs = pd.DataFrame({
+        'Destination': intervals['Destination'].values[first],
+        'Year': intervals['Year'].values[first],
+        'LeaderA': leaders[first],
+        'CountryA': intervals['LeaderCountry'].values[first],
+        'LeaderB': leaders[second],
+        'CountryB': intervals['LeaderCountry'].values[second],
+        'Start': _day_to_date(np.maximum(starts[first], starts[second])),
+        'End': _day_to_date(np.minimum(ends[first], ends[second])),
+    })
+    pairs['OverlapDays'] = (pairs['End'] - pairs['Start']).dt.days + 1
+    return pairs
@@ -0,0 +1,23 @@
+"""Shared fixtures; the modules under test live at the repository root."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from golden_outputs import synthetic_dataset
+
+
+@pytest.fixture(scope='session')
+def trips(tmp_path_factory):
+    """A small synthetic COLT-like dataset, loaded and cleaned like the real CSV"""
+    import generate_visualizations as gv
+
+    path = tmp_path_factory.mktemp('data') / 'trips.csv'
+    synthetic_dataset(3000, seed=1).to_csv(path, index=False)
+    previous = gv.df
+    try:
+        return gv.load_data(str(path))
+    finally:
+        gv.df = previous
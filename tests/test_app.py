@@ -0,0 +1,117 @@
+import os
+
+import pytest
+
+import build_output
+from build_output import private_path, publish_build, start_build
+from colt_store import STORE_FILENAME, materialize
+
+
+@pytest.fixture
+def builds_dir(tmp_path, monkeypatch):
+    path = str(tmp_path / 'builds')
+    monkeypatch.setattr(build_output, 'BUILDS_DIR', path)
+    return path
+
+
+@pytest.fixture
+def client():
+    import app
+    app.app.testing = True
+    return app.app.test_client()
+
+
+def publish(builds_dir, trips=None):
+    """Publish a build with a dashboard page and, given trips, an analytical store"""
+    version, path = start_build(builds_dir)
+    with open(os.path.join(path, 'colt_complete_dashboard.html'), 'w') as f:
+        f.write('<html>dashboard</html>')
+    if trips is not None:
+        materialize(trips, os.path.join(private_path(version, builds_dir), STORE_FILENAME))
+    publish_build(version, builds_dir)
+    return version
+
+
+def test_query(client, builds_dir, trips):
+    version = publish(builds_dir, trips)
+    response = client.get('/api/query?region=Europe&start=2005&end=2010&group_by=year')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['version'] == version and body['source'] == 'dyad_year'
+    europe = trips[(trips['RegionVisited'] == 'Europe') & trips['TripYear'].between(2005, 2010)]
+    assert {row['year']: row['trips'] for row in body['rows']} == europe['TripYear'].value_counts().to_dict()
+
+
+def test_query_repeated_filters(client, builds_dir, trips):
+    publish(builds_dir, trips)
+    leaders = trips['LeaderFullName'].value_counts().index[:2].tolist()
+    response = client.get('/api/query', query_string=[('leader', leader) for leader in leaders])
+    body = response.get_json()
+    assert response.status_code == 200 and body['source'] == 'trips'
+    assert body['rows'][0]['trips'] == trips['LeaderFullName'].isin(leaders).sum()
+
+
+@pytest.mark.parametrize('query, message', [
+    ('start=2010&end=2005', 'start must not be after end'),
+    ('group_by=year,bogus', "Unknown field 'bogus'"),
+])
+def test_query_rejects_bad_parameters(client, builds_dir, trips, query, message):
+    publish(builds_dir, trips)
+    response = client.get(f'/api/query?{query}')
+    assert response.status_code == 400
+    assert message in response.get_json()['error']
+
+
+def test_query_without_store(client, builds_dir):
+    assert client.get('/api/query').status_code == 503
+    # A published build without a store (e.g. from before the store existed)
+    publish(builds_dir)
+    assert client.get('/api/query').status_code == 503
+
+
+def test_store_is_never_served(client, builds_dir, trips):
+    version = publish(builds_dir, trips)
+    assert os.path.exists(os.path.join(private_path(version, builds_dir), STORE_FILENAME))
+    assert client.get(f'/v/{version}/').status_code == 200
+    for url in [f'/{STORE_FILENAME}', f'/static/{STORE_FILENAME}', f'/v/{version}/{STORE_FILENAME}',
+                f'/private/{version}/{STORE_FILENAME}', f'/v/private/{version}/{STORE_FILENAME}',
+                f'/v/{version}/../private/{version}/{STORE_FILENAME}',
+                f'/v/{version}/..%2fprivate%2f{version}%2f{STORE_FILENAME}']:
+        assert client.get(url).status_code == 404, url
+
+
+def publish_dataset(name, trips=None):
+    builds_dir = build_output.dataset_builds_dir(name)
+    os.makedirs(builds_dir, exist_ok=True)
+    return publish(builds_dir, trips)
+
+
+def test_dataset_routing(client, builds_dir, trips):
+    version = publish_dataset('colt-primary', trips)
+    assert client.get('/datasets').get_json() == [
+        {'dataset': 'colt-primary', 'version': version, 'url': '/d/colt-primary/'}]
+
+    response = client.get('/d/colt-primary/')
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith(f'/d/colt-primary/v/{version}/')
+    response = client.get(f'/d/colt-primary/v/{version}/')
+    assert response.status_code == 200 and b'dashboard' in response.data
+
+    body = client.get('/api/query?dataset=colt-primary').get_json()
+    assert body['version'] == version and body['rows'][0]['trips'] == len(trips)
+    # Nothing was published outside the dataset namespace
+    assert client.get('/api/query').status_code == 503
+
+
+@pytest.mark.parametrize('url', [
+    '/d/colt-secondary/',
+    '/d/COLT_Primary/',
+    '/d/colt-secondary/v/{version}/',
+    '/d/colt-primary/v/20250101-120000-1/',
+    '/api/query?dataset=colt-secondary',
+    '/api/query?dataset=../colt-primary',
+    '/render/top_destinations.png?dataset=colt-secondary',
+])
+def test_unknown_dataset_is_not_found(client, builds_dir, trips, url):
+    version = publish_dataset('colt-primary', trips)
+    assert client.get(url.format(version=version)).status_code == 404
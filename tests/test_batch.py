@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+import build_output
+import generate_visualizations as gv
+from build_output import (build_path, current_version, dataset_builds_dir, list_datasets, publish_build,
+                          read_build_info, write_build_info)
+from rebuild_watcher import source_fingerprint
+
+
+@pytest.fixture
+def builds(tmp_path, monkeypatch):
+    """Batch builds into tmp_path, with build_dataset replaced by a quick publish of an empty build"""
+    monkeypatch.setattr(build_output, 'BUILDS_DIR', str(tmp_path / 'builds'))
+    built = []
+
+    def build_dataset(data_file, builds_dir=None, accept_growth=False):
+        version = f"20250101-1200{len(built):02d}-1"
+        os.makedirs(build_path(version, builds_dir))
+        write_build_info(build_path(version, builds_dir), {'data_file': os.path.abspath(data_file),
+                                                           'fingerprint': source_fingerprint(data_file)})
+        publish_build(version, builds_dir)
+        built.append(os.path.basename(data_file))
+        return []
+
+    monkeypatch.setattr(gv, 'build_dataset', build_dataset)
+    return built
+
+
+@pytest.fixture
+def data_files(tmp_path):
+    paths = []
+    for name in ('COLT_Primary.csv', 'COLT_Secondary.csv'):
+        path = tmp_path / name
+        path.write_text('LeaderFullName,TripYear\nA,2000\n')
+        paths.append(str(path))
+    return paths
+
+
+def test_each_dataset_is_published_in_its_namespace(builds, data_files):
+    assert gv.build_batch(data_files) == {'colt-primary': [], 'colt-secondary': []}
+    assert list_datasets() == ['colt-primary', 'colt-secondary']
+    for name, data_file in zip(['colt-primary', 'colt-secondary'], data_files):
+        version = current_version(dataset_builds_dir(name))
+        assert read_build_info(version, dataset_builds_dir(name))['data_file'] == data_file
+    # The default (non-batch) build is untouched
+    assert current_version() is None
+
+
+def test_unchanged_datasets_are_skipped(builds, data_files):
+    gv.build_batch(data_files)
+    assert gv.build_batch(data_files) == {'colt-primary': None, 'colt-secondary': None}
+    assert builds == ['COLT_Primary.csv', 'COLT_Secondary.csv']
+
+    # A changed file is rebuilt, the other one is still skipped
+    os.utime(data_files[1], (1_000_000, 1_000_000))
+    assert gv.build_batch(data_files) == {'colt-primary': None, 'colt-secondary': []}
+    assert builds[2:] == ['COLT_Secondary.csv']
+
+    assert gv.build_batch(data_files, force=True) == {'colt-primary': [], 'colt-secondary': []}
+    assert builds[3:] == ['COLT_Primary.csv', 'COLT_Secondary.csv']
+
+
+def test_is_unchanged(builds, data_files):
+    builds_dir = dataset_builds_dir('colt-primary')
+    assert not gv.is_unchanged(data_files[0], builds_dir)
+    gv.build_batch(data_files[:1])
+    assert gv.is_unchanged(data_files[0], builds_dir)
+    # The published build of another file does not count
+    assert not gv.is_unchanged(data_files[1], builds_dir)
+
+
+def test_dataset_names_must_be_unique(builds, tmp_path, data_files):
+    other = tmp_path / 'other'
+    other.mkdir()
+    (other / 'colt primary.CSV').write_text('x\n')
+    with pytest.raises(ValueError, match="same dataset name 'colt-primary'"):
+        gv.build_batch([data_files[0], str(other / 'colt primary.CSV')])
+    assert builds == []
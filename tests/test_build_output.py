@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+from build_output import (current_version, dataset_name, is_valid_dataset, list_builds, private_path,
+                          prune_builds, publish_build, read_pointer, rollback, start_build)
+
+
+def make_build(builds_dir, version):
+    """A finished build, named like start_build's versions but without waiting a second per build"""
+    os.makedirs(os.path.join(builds_dir, version))
+    os.makedirs(private_path(version, str(builds_dir)))
+    return version
+
+
+def versions(count):
+    return [f"20250101-1200{i:02d}-1" for i in range(count)]
+
+
+def test_start_build(tmp_path):
+    version, path = start_build(str(tmp_path))
+    assert os.path.isdir(path) and os.path.isdir(private_path(version, str(tmp_path)))
+    assert list_builds(str(tmp_path)) == [version]
+    # Nothing is served until the build is published
+    assert current_version(str(tmp_path)) is None
+
+
+def test_publish_and_rollback(tmp_path):
+    builds_dir = str(tmp_path)
+    first, second = (make_build(builds_dir, v) for v in versions(2))
+
+    assert publish_build(first, builds_dir) is None
+    assert publish_build(second, builds_dir) == first
+    assert current_version(builds_dir) == second
+
+    assert rollback(builds_dir) == first
+    assert read_pointer(builds_dir)['current'] == first
+    assert read_pointer(builds_dir)['previous'] == second
+    # Rolling back again swaps forward
+    assert rollback(builds_dir) == second
+
+
+def test_republishing_keeps_previous(tmp_path):
+    builds_dir = str(tmp_path)
+    first, second = (make_build(builds_dir, v) for v in versions(2))
+    publish_build(first, builds_dir)
+    publish_build(second, builds_dir)
+    publish_build(second, builds_dir)
+    assert read_pointer(builds_dir)['previous'] == first
+
+
+def test_rollback_without_previous(tmp_path):
+    builds_dir = str(tmp_path)
+    publish_build(make_build(builds_dir, versions(1)[0]), builds_dir)
+    with pytest.raises(RuntimeError):
+        rollback(builds_dir)
+
+
+def test_prune_keeps_current_previous_and_unpublished(tmp_path):
+    builds_dir = str(tmp_path)
+    all_versions = [make_build(builds_dir, v) for v in versions(6)]
+    for version in all_versions[:5]:
+        publish_build(version, builds_dir)
+    # Roll back so that the previous build is the newest one
+    rollback(builds_dir)
+
+    prune_builds(builds_dir, keep=2)
+    # Two builds up to the current one, the newer previous one and the unpublished one
+    kept = all_versions[2:]
+    assert list_builds(builds_dir) == kept
+    # The store of a pruned build goes with it
+    assert sorted(os.listdir(os.path.join(builds_dir, 'private'))) == kept
+
+
+def test_prune_keeps_rolled_back_build(tmp_path):
+    builds_dir = str(tmp_path)
+    all_versions = [make_build(builds_dir, v) for v in versions(3)]
+    for version in all_versions:
+        publish_build(version, builds_dir)
+    rollback(builds_dir)
+    prune_builds(builds_dir, keep=1)
+    assert list_builds(builds_dir) == all_versions[1:]
+
+
+def test_dataset_name_examples():
+    # The names used in the README and in dataset_name's docstring
+    assert dataset_name('COLT_Primary.csv') == 'colt-primary'
+    assert dataset_name('data/COLT_Secondary.csv') == 'colt-secondary'
+    assert dataset_name('Diplometrics_COLT_Travel_Dataset_Primary-HOGS-1990-2024_20250317.csv') == \
+        'diplometrics-colt-travel-dataset-primary-hogs-1990-2024-20250317'
+    assert is_valid_dataset(dataset_name('COLT_Primary.csv'))
+
+
+def test_dataset_name_normalization():
+    assert dataset_name('/data/COLT  Primary (2025).v2.csv') == 'colt-primary-2025-v2'
+    assert dataset_name('Côte_dIvoire.csv') == 'c-te-divoire'
+    assert dataset_name('__.csv') == 'dataset'
+    assert len(dataset_name('x' * 200 + '.csv')) == 80
+    for name in ('colt-primary', 'dataset', 'c-te-divoire'):
+        assert is_valid_dataset(name)
+    for name in ('', 'COLT-Primary', '-colt', '../colt', 'colt/primary', 'x' * 81):
+        assert not is_valid_dataset(name)
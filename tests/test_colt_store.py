@@ -0,0 +1,99 @@
+import sqlite3
+
+import pytest
+
+import colt_store
+from colt_store import connect, materialize, query_trips
+
+
+@pytest.fixture(scope='module')
+def store(trips, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('store') / colt_store.STORE_FILENAME)
+    materialize(trips, path)
+    return path
+
+
+@pytest.fixture
+def conn(store):
+    conn = sqlite3.connect(f'file:{store}?mode=ro', uri=True)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+def test_table_choice(conn):
+    # Country-level questions are answered by the aggregate, leader questions by the trips
+    assert query_trips(conn, group_by=['region', 'year'])[1] == 'dyad_year'
+    assert query_trips(conn, {'leader_country': ['Country000']}, group_by=['country'])[1] == 'dyad_year'
+    assert query_trips(conn, {'leader': ['Leader 1']})[1] == 'trips'
+    assert query_trips(conn, group_by=['leader'])[1] == 'trips'
+
+
+def test_totals_match_both_tables(conn, trips):
+    (total,), _ = query_trips(conn)
+    assert total['trips'] == len(trips)
+    assert total['avg_duration'] == pytest.approx(trips['TripDuration'].mean())
+
+    leaders = trips['LeaderFullName'].unique().tolist()
+    (total,), table = query_trips(conn, {'leader': leaders})
+    assert table == 'trips' and total['trips'] == len(trips)
+
+
+def test_in_filters_and_grouping(conn, trips):
+    regions = sorted(trips['RegionVisited'].unique())[:2]
+    rows, _ = query_trips(conn, {'region': regions}, group_by=['region'])
+    expected = trips[trips['RegionVisited'].isin(regions)]['RegionVisited'].value_counts()
+    assert {row['region']: row['trips'] for row in rows} == expected.to_dict()
+    assert [row['trips'] for row in rows] == sorted((row['trips'] for row in rows), reverse=True)
+
+    leaders = trips['LeaderFullName'].value_counts().index[:3].tolist()
+    rows, table = query_trips(conn, {'leader': leaders}, group_by=['leader', 'year'], limit=1000)
+    expected = trips[trips['LeaderFullName'].isin(leaders)].groupby(['LeaderFullName', 'TripYear']).size()
+    assert table == 'trips'
+    assert {(row['leader'], row['year']): row['trips'] for row in rows} == expected.to_dict()
+
+
+@pytest.mark.parametrize('filters', [{}, {'leader': ['Leader 1', 'Leader 2', 'Leader 100']}])
+def test_year_bounds_are_inclusive(conn, trips, filters):
+    selected = trips[trips['LeaderFullName'].isin(filters['leader'])] if filters else trips
+    for start, end in [(2000, 2004), (2010, 2010), (None, 1995), (2020, None)]:
+        (total,), _ = query_trips(conn, filters, start=start, end=end)
+        years = selected['TripYear']
+        expected = ((years >= (start or 0)) & (years <= (end or 9999))).sum()
+        assert total['trips'] == expected
+
+
+def test_start_after_end_is_rejected(conn):
+    with pytest.raises(ValueError, match='start must not be after end'):
+        query_trips(conn, start=2010, end=2005)
+
+
+def test_unknown_fields_are_rejected(conn):
+    with pytest.raises(ValueError, match="Unknown field 'bogus'"):
+        query_trips(conn, group_by=['bogus'])
+    with pytest.raises(ValueError, match="Unknown field 'TripYear'"):
+        query_trips(conn, {'TripYear': ['2000']})
+
+
+def test_limit_is_clamped(conn, monkeypatch):
+    assert len(query_trips(conn, group_by=['country'], limit=0)[0]) == 1
+    assert len(query_trips(conn, group_by=['country'], limit=-5)[0]) == 1
+    assert len(query_trips(conn, group_by=['country'], limit=7)[0]) == 7
+    monkeypatch.setattr(colt_store, 'MAX_LIMIT', 10)
+    assert len(query_trips(conn, group_by=['country'], limit=10 ** 9)[0]) == 10
+
+
+def test_connect_reuses_and_replaces_connections(store, tmp_path, trips):
+    first = connect(store, namespace='test')
+    assert connect(store, namespace='test') is first
+    with pytest.raises(sqlite3.OperationalError):
+        first.execute('DELETE FROM trips')
+
+    # A newly published store replaces (and closes) the old connection of the namespace
+    other = str(tmp_path / colt_store.STORE_FILENAME)
+    materialize(trips.head(10), other)
+    second = connect(other, namespace='test')
+    assert second is not first
+    with pytest.raises(sqlite3.ProgrammingError):
+        first.execute('SELECT 1')
+    assert query_trips(second)[0][0]['trips'] == 10
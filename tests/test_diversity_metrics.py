@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from diversity_metrics import compute_rolling_diversity
+
+REGIONS = ['Africa', 'Americas', 'Asia', 'Europe']
+
+
+def random_trips(seed):
+    """Random trips with a year without any trips, a country that stops travelling and missing values"""
+    rng = np.random.default_rng(seed)
+    n = 400
+    destinations = rng.integers(0, 15, n)
+    trips = pd.DataFrame({
+        'LeaderCountryOrIGO': [f"C{i}" for i in rng.integers(0, 6, n)],
+        'CountryVisited': [f"D{i:02d}" for i in destinations],
+        'RegionVisited': [REGIONS[i % len(REGIONS)] for i in destinations],
+        'TripYear': rng.choice([y for y in range(2000, 2013) if y != 2005], n),
+    })
+    trips.loc[trips['LeaderCountryOrIGO'] == 'C5', 'TripYear'] = 2000
+    trips.loc[:4, 'CountryVisited'] = np.nan
+    trips.loc[5:9, 'TripYear'] = np.nan
+    # Only seen with a missing destination: never has a row
+    trips.loc[10, 'LeaderCountryOrIGO'] = 'C9'
+    trips.loc[10, 'CountryVisited'] = np.nan
+    return trips
+
+
+def naive_rolling_diversity(df, window):
+    """Every window recomputed from the raw rows"""
+    trips = df.dropna(subset=['LeaderCountryOrIGO', 'CountryVisited', 'TripYear'])
+    first_visit = trips.groupby(['LeaderCountryOrIGO', 'CountryVisited'])['TripYear'].min()
+    region = trips.groupby('CountryVisited')['RegionVisited'].first()
+    years = trips['TripYear'].astype(int)
+    rows = []
+    for end in range(years.min() + window - 1, years.max() + 1):
+        start = end - window + 1
+        for country, group in trips[years.between(start, end)].groupby('LeaderCountryOrIGO'):
+            counts = group['CountryVisited'].value_counts()
+            shares = counts / counts.sum()
+            new = sum(first_visit[(country, destination)] >= start for destination in counts.index)
+            rows.append({
+                'Window': window,
+                'Period': f"{start}-{end}",
+                'Country': country,
+                'Trips': counts.sum(),
+                'UniqueDestinations': len(counts),
+                'Entropy': -(shares * np.log2(shares)).sum(),
+                'HHI': (shares ** 2).sum(),
+                'NewDestinationRate': new / len(counts),
+                'RegionalSpread': region[counts.index].nunique(),
+            })
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_rolling_windows_match_recomputed_windows(seed):
+    trips = random_trips(seed)
+    windows = (1, 3, 5, 13)
+    expected = pd.concat([naive_rolling_diversity(trips, window) for window in windows], ignore_index=True)
+    result = compute_rolling_diversity(trips, windows)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    # Edges: the first window ends window - 1 years after the first year, the last one at the last year
+    periods = result.groupby('Window')['Period'].agg(['first', 'last'])
+    assert periods.loc[5].tolist() == ['2000-2004', '2008-2012']
+    assert periods.loc[13].tolist() == ['2000-2012', '2000-2012']
+    # Countries appear only in windows in which they travelled
+    assert set(result[result['Country'] == 'C5']['Period']) == {'2000-2000', '2000-2002', '2000-2004', '2000-2012'}
+    assert 'C9' not in set(result['Country'])
+    assert '2005-2005' not in set(result['Period'])
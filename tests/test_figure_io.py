@@ -0,0 +1,75 @@
+import base64
+import json
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from figure_io import DECODE_JS, encode_array, encode_figure, smallest_dtype, to_json
+
+ARRAYS = [
+    np.arange(1990, 2025),                    # years: int16
+    np.array([0, 3, 255, 7, 1, 9, 2, 4]),     # counts: uint8
+    np.array([-5, 3, 100, 7, 1, 9, 2, 4]),    # int8
+    np.array([0, 70000, 5, 7, 1, 9, 2, 4]),   # int32
+    np.array([0.5, 1.25, np.nan, 3, 4, 5, 6, 7]),  # float32 with a gap
+    np.array([0.1, 0.2, 0.3, 4, 5, 6, 7, 8]),      # float64
+    np.array([1.0, 2.0, 3.0, 4, 5, 6, 7, 8]),      # whole floats: int8
+]
+
+
+def decode_array(encoded):
+    """Python counterpart of decodeTypedArrays for one array"""
+    return np.frombuffer(base64.b64decode(encoded['bdata']), dtype=np.dtype(encoded['dtype']).newbyteorder('<'))
+
+
+def test_smallest_dtype():
+    assert [smallest_dtype(values)[0] for values in ARRAYS] == ['i2', 'u1', 'i1', 'i4', 'f4', 'f8', 'i1']
+    assert smallest_dtype(np.array([True, False])) is None
+    assert smallest_dtype(np.array(['a', 'b'])) is None
+    assert smallest_dtype(np.array([], dtype=int)) is None
+    assert smallest_dtype(np.array([0, 2 ** 32]))[0] == 'f8'
+
+
+@pytest.mark.parametrize('values', ARRAYS)
+def test_encode_array_round_trip(values):
+    encoded = encode_array(values)
+    decoded = decode_array(encoded)
+    assert np.array_equal(decoded, values, equal_nan=True)
+
+
+def test_short_and_non_numeric_arrays_stay_plain():
+    assert encode_array([1, 2, 3]) == [1, 2, 3]
+    names = ['a'] * 10
+    assert encode_array(names) is names
+    assert encode_array('abcdefghij') == 'abcdefghij'
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason="node is not installed")
+def test_decode_js_round_trip():
+    figure = encode_figure({
+        'data': [{'type': 'scatter', 'x': ARRAYS[0], 'y': np.arange(35) * 0.5,
+                  'marker': {'size': ARRAYS[1]}, 'text': ['t'] * 35}],
+        'layout': {'title': {'text': 'Trips'}},
+    })
+    script = DECODE_JS + f"""
+        const figure = decodeTypedArrays({to_json(figure)});
+        const trace = figure.data[0];
+        console.log(JSON.stringify({{x: Array.from(trace.x), y: Array.from(trace.y),
+                                    size: Array.from(trace.marker.size), text: trace.text,
+                                    title: figure.layout.title.text}}));
+    """
+    result = subprocess.run(['node', '-e', script], capture_output=True, text=True, check=True)
+    decoded = json.loads(result.stdout)
+    assert decoded['x'] == ARRAYS[0].tolist()
+    assert decoded['y'] == (np.arange(35) * 0.5).tolist()
+    assert decoded['size'] == ARRAYS[1].tolist()
+    assert decoded['text'] == ['t'] * 35
+    assert decoded['title'] == 'Trips'
+
+
+def test_to_json_can_be_inlined_in_script():
+    text = to_json({'name': '</script><script>alert(1)</script>', 'hover': 'a<br>b & c'})
+    assert '<' not in text and '>' not in text and '&' not in text
+    assert json.loads(text) == {'name': '</script><script>alert(1)</script>', 'hover': 'a<br>b & c'}
@@ -0,0 +1,122 @@
+"""Equivalence of the rewritten aggregations with reference copies of the code they replaced"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import generate_visualizations as gv
+from figure_io import PLOTLY_CDN_URL
+
+
+@pytest.fixture
+def visits(tmp_path, monkeypatch):
+    """Skewed random trips between 40 countries, set as the data of a build into tmp_path"""
+    rng = np.random.default_rng(1)
+    countries = np.array([f"Country {i:02d}" for i in range(40)])
+    weights = 1 / np.arange(1, 41)
+    n = 3000
+    data = pd.DataFrame({
+        'LeaderCountryOrIGO': rng.choice(countries, n, p=weights / weights.sum()),
+        'CountryVisited': rng.choice(countries, n, p=weights[::-1] / weights.sum()),
+        'TripYear': rng.integers(1990, 2025, n),
+    })
+    monkeypatch.setattr(gv, 'df', data)
+    monkeypatch.setattr(gv, 'OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setattr(gv, 'ENCODE_TYPED_ARRAYS', False)
+    return data
+
+
+def filtered_yearly_counts(data, column, country):
+    """Pre-user-038 comprehensive view: one dataframe filter per country"""
+    return data[data[column] == country].groupby('TripYear').size().reset_index(name='Trips')
+
+
+def filtered_dyads(data, top_visiting, top_visited):
+    """Pre-user-038 country pair view: one dataframe filter per candidate dyad"""
+    dyads = {}
+    for visiting in top_visiting[:5]:
+        for visited in top_visited[:5]:
+            if visiting == visited:
+                continue
+            pair_df = data[(data['LeaderCountryOrIGO'] == visiting) & (data['CountryVisited'] == visited)]
+            if len(pair_df) > 0:
+                dyads[(visiting, visited)] = pair_df.groupby('TripYear').size().reset_index(name='Visits')
+    return dyads
+
+
+def test_comprehensive_view_matches_per_country_filters(visits):
+    top_visited = visits['CountryVisited'].value_counts().head(15).index
+    top_visiting = visits['LeaderCountryOrIGO'].value_counts().head(15).index
+    diverse = visits.groupby('LeaderCountryOrIGO')['CountryVisited'].nunique() \
+        .sort_values(ascending=False).head(15).index
+    expected = [(country, filtered_yearly_counts(visits, 'CountryVisited', country)) for country in top_visited] + \
+        [(country, filtered_yearly_counts(visits, 'LeaderCountryOrIGO', country))
+         for country in list(top_visiting) + list(diverse)]
+
+    traces = gv.create_comprehensive_interactive_viz()['data']
+    assert len(traces) == len(expected) == 45
+    for trace, (country, yearly) in zip(traces, expected):
+        assert trace['name'].startswith(f"{country} (")
+        np.testing.assert_array_equal(trace['x'], yearly['TripYear'].values)
+        np.testing.assert_array_equal(trace['y'], yearly['Trips'].values)
+
+
+def test_country_pair_view_matches_per_pair_filters(visits):
+    top_visiting = visits['LeaderCountryOrIGO'].value_counts().head(15).index.tolist()
+    top_visited = visits['CountryVisited'].value_counts().head(15).index.tolist()
+    expected = list(filtered_dyads(visits, top_visiting, top_visited).items())[:5]
+    assert len(expected) == 5
+
+    initial = gv.create_country_pair_viz()
+    assert [trace['name'] for trace in initial] == [f"{a} → {b}" for (a, b), _ in expected]
+    for trace, (_, yearly) in zip(initial, expected):
+        assert trace['x'] == yearly['TripYear'].tolist()
+        assert trace['y'] == yearly['Visits'].tolist()
+
+
+def test_country_pair_view_uses_pinned_plotly(visits, tmp_path):
+    gv.create_country_pair_viz()
+    html = (tmp_path / 'country_pair_viz.html').read_text(encoding='utf-8')
+    assert f'<script src="{PLOTLY_CDN_URL}"></script>' in html
+    assert '{{' not in html
+
+
+def test_summits_view_skipped_without_valid_dates(trips, tmp_path, monkeypatch):
+    undated = trips.assign(TripStartDate='not a date')
+    monkeypatch.setattr(gv, 'df', undated)
+    monkeypatch.setattr(gv, 'OUTPUT_DIR', str(tmp_path))
+    assert gv.create_summits_viz() is None
+    assert not (tmp_path / 'summits_viz.html').exists()
+
+
+def test_summits_view_ships_only_what_the_page_reads(trips, tmp_path, monkeypatch):
+    monkeypatch.setattr(gv, 'df', trips)
+    monkeypatch.setattr(gv, 'OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setattr(gv, 'ENCODE_TYPED_ARRAYS', False)
+    assert gv.create_summits_viz() is not None
+    html = (tmp_path / 'summits_viz.html').read_text(encoding='utf-8')
+    assert '"pairs"' not in html
+    assert '"years"' in html and '"byYear"' in html
+
+
+def test_preview_replaces_only_a_previous_preview(tmp_path):
+    preview_dir = tmp_path / 'preview'
+    gv.prepare_preview(str(preview_dir))
+    (preview_dir / 'old_chart.png').write_bytes(b'old')
+    gv.prepare_preview(str(preview_dir))
+    assert sorted(p.name for p in preview_dir.iterdir()) == [gv.PREVIEW_MARKER]
+
+    # An empty directory is fine, anything else is refused and kept
+    gv.prepare_preview(str(tmp_path / 'empty'))
+    (tmp_path / 'notes.txt').write_text('keep me')
+    with pytest.raises(RuntimeError, match='not a previous preview'):
+        gv.prepare_preview(str(tmp_path))
+    assert (tmp_path / 'notes.txt').read_text() == 'keep me'
+
+
+def test_build_preview_refuses_other_directories(trips, tmp_path, monkeypatch):
+    for name in ('df', 'BUILD_VERSION', 'OUTPUT_DIR'):
+        monkeypatch.setattr(gv, name, getattr(gv, name))
+    data_file = tmp_path / 'trips.csv'
+    trips.to_csv(data_file, index=False)
+    assert gv.build_preview(str(data_file), 0.5, str(tmp_path)) == ["Preview output"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['trips.csv']
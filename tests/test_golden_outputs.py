@@ -0,0 +1,31 @@
+import csv
+import os
+
+import golden_outputs
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), golden_outputs.GOLDEN_DIR)
+
+
+def test_aggregates_match_committed_goldens():
+    # Every chart aggregate of the seeded synthetic dataset, against golden/synthetic-20000/
+    for name, data_file in golden_outputs.datasets([], golden_outputs.DEFAULT_SYNTHETIC_SIZES):
+        assert golden_outputs.check(name, data_file, list(golden_outputs.AGGREGATES), GOLDEN_DIR) == []
+
+
+def test_check_compares_the_parsed_input_not_its_bytes(tmp_path, capsys):
+    golden_dir = tmp_path / 'golden'
+    data = golden_outputs.synthetic_dataset(500, seed=3)
+    data_file = tmp_path / 'trips.csv'
+    data.to_csv(data_file, index=False)
+    golden_outputs.capture('trips', str(data_file), ['trips_per_year', 'top_destinations'], str(golden_dir))
+
+    # The same trips written differently still match
+    data.to_csv(data_file, index=False, quoting=csv.QUOTE_ALL, lineterminator='\r\n')
+    assert golden_outputs.check('trips', str(data_file), ['trips_per_year', 'top_destinations'],
+                                str(golden_dir)) == []
+
+    # Different trips are reported before any aggregate is compared
+    data.assign(TripYear=data['TripYear'].where(data.index != 0, 1985)).to_csv(data_file, index=False)
+    assert golden_outputs.check('trips', str(data_file), ['trips_per_year'], str(golden_dir)) == ['trips']
+    output = capsys.readouterr().out
+    assert 'differs from the data' in output and 'Sum: 1 values differ' in output
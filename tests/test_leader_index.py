@@ -0,0 +1,32 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from leader_index import NORMALIZE_QUERY_JS, normalize
+
+NAMES = [
+    'Nguyễn Tấn Dũng',
+    'Recep Tayyip Erdoğan',
+    'Luiz Inácio Lula da Silva',
+    'Ashraf Ghani Ahmadzai',
+    # Combining marks outside U+0300-U+036F: U+1DC4, a Devanagari vowel sign and a Hebrew point
+    'Ma᷄rta',
+    'Narendra Modि',
+    'Benְjamin',
+    "Côte d'Ivoire / Ø",
+]
+
+
+def test_normalize_strips_all_combining_marks():
+    assert normalize('Nguyễn Tấn Dũng') == 'nguyen tan dung'
+    assert normalize('Ma᷄rta') == 'marta'
+    assert normalize('Narendra Modि') == 'narendra mod'
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason="node is not installed")
+def test_query_normalization_matches_index():
+    script = NORMALIZE_QUERY_JS + f"console.log(JSON.stringify({json.dumps(NAMES)}.map(normalizeQuery)));"
+    result = subprocess.run(['node', '-e', script], capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout) == [normalize(name) for name in NAMES]
@@ -0,0 +1,115 @@
+import sys
+import time
+
+import pytest
+
+import load_test
+from load_test import discover_assets, percentile, start_server, stop_server
+
+DASHBOARD = """<html><head>
+<link rel="stylesheet" href="style.css">
+<script src="https://cdn.plot.ly/plotly-2.20.0.min.js"></script>
+</head><body>
+<iframe src="page.html"></iframe>
+<img src="chart.png"><img src="chart.png">
+<iframe src="missing.html"></iframe>
+</body></html>"""
+
+PAGE = """<html><body>
+<img src="chart.png">
+<img src="/v/1/images/map.png">
+<script>fetch('data/index.json').then(r => r.json());</script>
+</body></html>"""
+
+
+class StaticClient:
+    """Serves fixed pages like Client.get, with / redirecting to the build"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def get(self, path, headers=None):
+        self.requested.append(path)
+        if path == '/':
+            return 302, {'Location': '/v/1/'}, b'', 0.0
+        if path in self.pages:
+            return 200, {}, self.pages[path].encode(), 0.0
+        return 404, {}, b'', 0.0
+
+
+def test_percentile():
+    values = list(range(1, 11))
+    assert percentile(values, 50) == 5
+    assert percentile(values, 90) == 9
+    assert percentile(values, 95) == 10
+    assert percentile(values, 99) == 10
+    assert percentile(values, 0) == 1
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) == 0.0
+
+
+def test_discover_assets():
+    client = StaticClient({'/v/1/': DASHBOARD, '/v/1/page.html': PAGE})
+    dashboard, assets, external = discover_assets(client)
+    assert dashboard == '/v/1/'
+    # Document order, iframes first, each asset once, including those of embedded pages
+    assert assets == ['/v/1/page.html', '/v/1/missing.html', '/v/1/style.css', '/v/1/chart.png',
+                      '/v/1/images/map.png', '/v/1/data/index.json']
+    assert external == ['https://cdn.plot.ly/plotly-2.20.0.min.js']
+    # Embedded pages are fetched once to find their assets, other assets are not
+    assert client.requested == ['/', '/v/1/', '/v/1/page.html', '/v/1/missing.html']
+
+
+def test_discover_assets_fails_on_error():
+    with pytest.raises(RuntimeError, match='returned 404'):
+        discover_assets(StaticClient({}))
+
+
+# A server that answers /health with 503 until it has been up for STARTUP seconds
+SLOW_SERVER = """
+import http.server, os, sys, time
+started = time.time()
+class Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        ready = time.time() - started > float(sys.argv[2])
+        with open(sys.argv[1], 'a') as f:
+            f.write('200\\n' if ready else '503\\n')
+        self.send_response(200 if ready else 503)
+        self.end_headers()
+    def log_message(self, *args):
+        pass
+http.server.HTTPServer(('127.0.0.1', int(os.environ['PORT'])), Handler).serve_forever()
+"""
+
+
+@pytest.fixture
+def slow_server(tmp_path):
+    script = tmp_path / 'server.py'
+    script.write_text(SLOW_SERVER)
+    log = tmp_path / 'requests.log'
+    return lambda startup: f"{sys.executable} {script} {log} {startup}", log
+
+
+def test_start_server_waits_for_health(slow_server):
+    command, log = slow_server
+    started = time.time()
+    process = start_server(command(1), load_test.free_port())
+    try:
+        assert time.time() - started > 1
+        answers = log.read_text().split()
+        assert answers[-1] == '200'
+        # Polls are spaced out instead of hammering the starting server
+        assert len(answers) <= 1 / 0.2 + 2
+    finally:
+        stop_server(process)
+    assert process.poll() is not None
+
+
+def test_start_server_gives_up(slow_server, monkeypatch):
+    command, _ = slow_server
+    monkeypatch.setattr(load_test, 'STARTUP_TIMEOUT', 1)
+    with pytest.raises(RuntimeError, match='did not answer'):
+        start_server(command(60), load_test.free_port())
+    with pytest.raises(RuntimeError, match='exited with status'):
+        start_server(f"{sys.executable} -c 'raise SystemExit(3)'", load_test.free_port())
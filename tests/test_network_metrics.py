@@ -0,0 +1,29 @@
+import numpy as np
+from scipy import sparse
+
+from network_metrics import compute_network_metrics, label_propagation, pagerank
+
+
+def test_pagerank_sums_to_one_per_period(trips):
+    metrics = compute_network_metrics(trips)
+    totals = metrics.groupby(['Window', 'Period'])['PageRank'].sum()
+    assert len(totals) > 0
+    np.testing.assert_allclose(totals.values, 1.0, atol=1e-8)
+
+
+def test_pagerank_ignores_inactive_nodes():
+    # 0 -> 1 -> 2 -> 0 cycle plus two countries without visits in this period
+    adjacency = sparse.csr_matrix(([1.0, 1.0, 1.0], ([0, 1, 2], [1, 2, 0])), shape=(5, 5))
+    rank = pagerank(adjacency)
+    np.testing.assert_allclose(rank, [1 / 3, 1 / 3, 1 / 3, 0, 0])
+
+
+def test_pagerank_of_empty_graph():
+    assert not pagerank(sparse.csr_matrix((3, 3))).any()
+
+
+def test_label_propagation_finds_disconnected_groups():
+    # Visits within {0, 1, 2, 3} and within {4, 5, 6}, none between the groups
+    rows, cols = [0, 1, 2, 3, 0, 4, 5, 6], [1, 2, 3, 0, 2, 5, 6, 4]
+    adjacency = sparse.csr_matrix((np.ones(8), (rows, cols)), shape=(7, 7))
+    np.testing.assert_array_equal(label_propagation(adjacency), [0, 0, 0, 0, 1, 1, 1])
@@ -0,0 +1,135 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import rebuild_watcher
+from rebuild_watcher import RebuildWatcher, read_state, retry_due, source_fingerprint, write_state
+
+# Stands in for generate_visualizations.py: records the data file it was run for
+STUB_GENERATOR = """
+import os, sys
+with open(os.environ['STUB_LOG'], 'a') as f:
+    f.write(os.environ['COLT_DATA_FILE'] + '\\n')
+sys.exit(int(os.environ.get('STUB_EXIT', '0')))
+"""
+
+
+@pytest.fixture
+def data_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(rebuild_watcher, 'BUILDS_DIR', str(tmp_path / 'builds'))
+    generator = tmp_path / 'generator.py'
+    generator.write_text(STUB_GENERATOR)
+    monkeypatch.setattr(rebuild_watcher, 'GENERATOR', str(generator))
+    monkeypatch.setenv('STUB_LOG', str(tmp_path / 'runs.log'))
+    path = tmp_path / 'trips.csv'
+    path.write_text('a,b\n1,2\n')
+    return str(path)
+
+
+def runs(data_file):
+    log = os.path.join(os.path.dirname(data_file), 'runs.log')
+    if not os.path.exists(log):
+        return 0
+    with open(log) as f:
+        return len(f.read().splitlines())
+
+
+def touch(path, mtime):
+    os.utime(path, (mtime, mtime))
+
+
+def test_state_round_trip(data_file):
+    assert read_state() == {}
+    write_state({'fingerprint': 'abc', 'last_build': {'ok': True}})
+    assert read_state() == {'fingerprint': 'abc', 'last_build': {'ok': True}}
+    with open(os.path.join(rebuild_watcher.BUILDS_DIR, rebuild_watcher.STATE_FILE), 'w') as f:
+        f.write('{not json')
+    assert read_state() == {}
+
+
+def test_rebuilds_once_the_change_has_settled(data_file):
+    watcher = RebuildWatcher(data_file)
+    assert not watcher.check() and runs(data_file) == 0
+    assert watcher.check() and runs(data_file) == 1
+    assert read_state()['fingerprint'] == source_fingerprint(data_file)
+    # Built sources are not built again
+    assert not watcher.check() and not watcher.check()
+    assert runs(data_file) == 1
+
+
+def test_change_during_debounce_restarts_it(data_file):
+    watcher = RebuildWatcher(data_file)
+    touch(data_file, 1_000_000)
+    assert not watcher.check()
+    touch(data_file, 2_000_000)
+    assert not watcher.check()
+    assert watcher.check() and runs(data_file) == 1
+
+
+def test_skips_fingerprint_built_by_another_process(data_file):
+    fingerprint = source_fingerprint(data_file)
+    write_state({'fingerprint': fingerprint})
+    assert not RebuildWatcher(data_file).rebuild(fingerprint)
+    assert runs(data_file) == 0
+
+
+@pytest.mark.skipif(rebuild_watcher.fcntl is None, reason="no cross-process lock on this platform")
+def test_lock_held_by_another_process(data_file):
+    os.makedirs(rebuild_watcher.BUILDS_DIR)
+    with open(os.path.join(rebuild_watcher.BUILDS_DIR, rebuild_watcher.LOCK_FILE), 'w') as lock:
+        rebuild_watcher.fcntl.flock(lock, rebuild_watcher.fcntl.LOCK_EX | rebuild_watcher.fcntl.LOCK_NB)
+        assert not RebuildWatcher(data_file).rebuild()
+    assert runs(data_file) == 0
+    assert RebuildWatcher(data_file).rebuild() and runs(data_file) == 1
+
+
+def test_failed_build_is_retried(data_file, monkeypatch):
+    monkeypatch.setenv('STUB_EXIT', '1')
+    watcher = RebuildWatcher(data_file)
+    watcher.check()
+    assert not watcher.check() and runs(data_file) == 1
+    state = read_state()
+    assert 'fingerprint' not in state and not state['last_build']['ok']
+    assert watcher.failure['attempts'] == 1
+    assert watcher.failure['fingerprint'] == source_fingerprint(data_file)
+
+    # Not before the retry delay has passed
+    assert not watcher.check() and not watcher.check()
+    assert runs(data_file) == 1
+
+    state['failure']['retry_at'] = (datetime.now() - timedelta(seconds=1)).isoformat(timespec='seconds')
+    write_state(state)
+    assert not watcher.check() and runs(data_file) == 2
+    assert watcher.failure['attempts'] == 2
+
+    state = read_state()
+    state['failure']['retry_at'] = (datetime.now() - timedelta(seconds=1)).isoformat(timespec='seconds')
+    write_state(state)
+
+    monkeypatch.setenv('STUB_EXIT', '0')
+    watcher.check()
+    assert watcher.check() and runs(data_file) == 3
+    assert watcher.failure is None
+    assert read_state()['fingerprint'] == source_fingerprint(data_file)
+
+
+def test_retry_delay_doubles(data_file, monkeypatch):
+    monkeypatch.setenv('STUB_EXIT', '1')
+    watcher = RebuildWatcher(data_file)
+    delays = []
+    for _ in range(3):
+        watcher.rebuild()
+        failure = watcher.failure
+        delays.append(datetime.fromisoformat(failure['retry_at']) - datetime.fromisoformat(failure['failed_at']))
+    assert delays == [timedelta(seconds=rebuild_watcher.RETRY_DELAY * 2 ** i) for i in range(3)]
+
+
+def test_retry_due():
+    now = datetime(2025, 1, 1, 12)
+    failure = {'fingerprint': 'a', 'attempts': 1, 'retry_at': '2025-01-01T12:05:00'}
+    assert not retry_due(failure, 'a', now)
+    assert retry_due(failure, 'a', now + timedelta(minutes=5))
+    # Other sources (e.g. a fixed CSV) are built right away
+    assert retry_due(failure, 'b', now)
+    assert retry_due(None, 'a', now)
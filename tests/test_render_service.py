@@ -0,0 +1,33 @@
+import pytest
+
+from colt_store import materialize
+from render_service import RenderFailed, _render, parse_params
+
+
+@pytest.fixture
+def store(tmp_path, trips):
+    path = str(tmp_path / 'colt.sqlite')
+    materialize(trips, path)
+    return path
+
+
+@pytest.fixture
+def store_without_regions(tmp_path, trips):
+    path = str(tmp_path / 'no_regions.sqlite')
+    materialize(trips.drop(columns=['LeaderRegion', 'RegionVisited']), path)
+    return path
+
+
+def test_render_png(store):
+    png = _render(store, 'trips_per_year', parse_params('trips_per_year', {'w': '400'}))
+    assert png.startswith(b'\x89PNG')
+
+
+def test_render_missing_columns_fails(store_without_regions):
+    with pytest.raises(RenderFailed):
+        _render(store_without_regions, 'region_flow_heatmap', parse_params('region_flow_heatmap', {'w': '400'}))
+
+
+def test_parse_params_rejects_reversed_years():
+    with pytest.raises(ValueError):
+        parse_params('top_destinations', {'start': '2010', 'end': '2000'})
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sampling import stratified_sample, strata_keys, stratum_quotas
+
+
+def test_quotas_are_exact_and_proportional():
+    sizes = np.array([50, 30, 15, 4, 1])
+    quotas = stratum_quotas(sizes, 10)
+    assert quotas.sum() == 10
+    # Largest remainders first: 5, 3, 1.5 -> 2, 0.4, 0.1
+    assert quotas.tolist() == [5, 3, 2, 0, 0]
+    assert (np.abs(quotas - sizes * 10 / sizes.sum()) < 1).all()
+
+
+@pytest.mark.parametrize('fraction', [0.05, 0.1, 0.25, 0.5])
+def test_sample_size_and_order(trips, fraction):
+    sample = stratified_sample(trips, fraction)
+    assert len(sample) == round(fraction * len(trips))
+    assert sample.index.is_unique and sample.index.isin(trips.index).all()
+    # Trips keep their original order
+    assert (trips.index.get_indexer(sample.index) == np.sort(trips.index.get_indexer(sample.index))).all()
+
+
+def test_sample_follows_strata(trips):
+    fraction = 0.2
+    sample = stratified_sample(trips, fraction)
+    strata = strata_keys(trips)
+    sizes = strata.value_counts()
+    counts = strata[trips.index.get_indexer(sample.index)].value_counts().reindex(sizes.index, fill_value=0)
+    assert (np.abs(counts - sizes * len(sample) / len(trips)) < 1).all()
+
+
+def test_sample_is_reproducible(trips):
+    assert stratified_sample(trips, 0.1, seed=3).index.equals(stratified_sample(trips, 0.1, seed=3).index)
+    assert not stratified_sample(trips, 0.1, seed=3).index.equals(stratified_sample(trips, 0.1, seed=4).index)
+
+
+def test_strata_pool_smaller_countries():
+    df = pd.DataFrame({'TripYear': [2000] * 6,
+                       'LeaderCountryOrIGO': ['A', 'A', 'A', 'B', 'B', 'C'],
+                       'LeaderRegion': ['X'] * 6})
+    keys = strata_keys(df, top_countries=1)
+    # A on its own, B and C pooled into the "other" stratum
+    assert keys.tolist() == [0, 0, 0, 1, 1, 1]
+
+
+def test_full_fraction_and_invalid_fractions(trips):
+    assert stratified_sample(trips, 1) is trips
+    for fraction in (0, -0.1, 1.5):
+        with pytest.raises(ValueError):
+            stratified_sample(trips, fraction)
@@ -0,0 +1,99 @@
+import re
+
+from serving_metrics import BYTES_BUCKETS, LATENCY_BUCKETS, ServingMetrics
+
+SAMPLE = re.compile(r'^([a-z_]+)\{(.*)\} (\S+)$')
+LABEL = re.compile(r'([a-z]+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse(text):
+    """Samples of a Prometheus text exposition as {(name, labels without pid): value}"""
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith('#'):
+            continue
+        match = SAMPLE.match(line)
+        assert match, f"not a sample line: {line!r}"
+        name, labels, value = match.groups()
+        labels = dict(LABEL.findall(labels))
+        assert 'pid' in labels
+        del labels['pid']
+        samples[(name, tuple(sorted(labels.items())))] = float(value)
+    return samples
+
+
+def recorded_metrics():
+    metrics = ServingMetrics()
+    route = '/v/<version>/<path:filename>'
+    metrics.observe(route, 'dashboard.html', 200, 0.004, 50_000)
+    metrics.observe(route, 'dashboard.html', 200, 0.02, 60_000)
+    metrics.observe(route, 'dashboard.html', 304, 0.001, 0)
+    metrics.observe('/render/<chart>', 'top_destinations.png', 503, 3.0, 2_000_000)
+    metrics.count_cache('http_conditional', True)
+    metrics.count_cache('http_conditional', False)
+    metrics.add_cache('render_memory', lambda: (3, 4))
+    metrics.add_cache('render_disk', lambda: (0, 0))
+    return metrics
+
+
+def test_request_counts_by_status():
+    samples = parse(recorded_metrics().render())
+    dashboard = (('asset', 'dashboard.html'), ('route', '/v/<version>/<path:filename>'))
+    assert samples[('colt_http_requests_total', dashboard + (('status', '200'),))] == 2
+    assert samples[('colt_http_requests_total', dashboard + (('status', '304'),))] == 1
+    render = (('asset', 'top_destinations.png'), ('route', '/render/<chart>'), ('status', '503'))
+    assert samples[('colt_http_requests_total', render)] == 1
+
+
+def bound(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def histogram(samples, name, labels, buckets):
+    counts = [samples[(f'{name}_bucket', tuple(sorted(labels + (('le', le),))))]
+              for le in [bound(b) for b in buckets] + ['+Inf']]
+    return counts, samples[(f'{name}_sum', labels)], samples[(f'{name}_count', labels)]
+
+
+def test_histograms_are_cumulative():
+    samples = parse(recorded_metrics().render())
+    labels = (('asset', 'dashboard.html'), ('route', '/v/<version>/<path:filename>'))
+
+    counts, total, count = histogram(samples, 'colt_http_request_duration_seconds', labels, LATENCY_BUCKETS)
+    assert counts == sorted(counts) and counts[-1] == count == 3
+    # 0.001 falls into the le="0.001" bucket, 0.004 into le="0.005", 0.02 into le="0.025"
+    assert counts[LATENCY_BUCKETS.index(0.001)] == 1
+    assert counts[LATENCY_BUCKETS.index(0.005)] == 2
+    assert counts[LATENCY_BUCKETS.index(0.025)] == 3
+    assert abs(total - 0.025) < 1e-9
+
+    counts, total, count = histogram(samples, 'colt_http_response_bytes', labels, BYTES_BUCKETS)
+    assert counts[0] == 1 and counts[BYTES_BUCKETS.index(100 * 1024)] == 3
+    assert total == 110_000 and count == 3
+
+
+def test_cache_ratios():
+    samples = parse(recorded_metrics().render())
+    assert samples[('colt_cache_hits_total', (('cache', 'http_conditional'),))] == 1
+    assert samples[('colt_cache_lookups_total', (('cache', 'http_conditional'),))] == 2
+    assert samples[('colt_cache_hit_ratio', (('cache', 'http_conditional'),))] == 0.5
+    assert samples[('colt_cache_hit_ratio', (('cache', 'render_memory'),))] == 0.75
+    # No lookups yet: a ratio of 0 rather than a division error
+    assert samples[('colt_cache_hit_ratio', (('cache', 'render_disk'),))] == 0
+
+
+def test_every_metric_has_help_and_type():
+    text = recorded_metrics().render()
+    declared = set(re.findall(r'^# TYPE (\S+) \S+$', text, re.M))
+    assert declared == set(re.findall(r'^# HELP (\S+) ', text, re.M))
+    for name, _ in parse(text):
+        assert re.sub(r'_(bucket|sum|count)$', '', name) in declared
+
+
+def test_label_values_are_escaped():
+    metrics = ServingMetrics()
+    metrics.observe('/v/<version>/<path:filename>', 'a"b\\c\nd.html', 200, 0.01, 10)
+    text = metrics.render()
+    assert 'asset="a\\"b\\\\c\\nd.html"' in text
+    # The newline in the asset name does not break the sample onto two lines
+    parse(text)
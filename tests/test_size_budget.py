@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from size_budget import MANIFEST_FILE, build_manifest, check_budgets, check_build, first_view_growth
+
+DASHBOARD = '<html><body><iframe src="page.html"></iframe><img src="chart.png"></body></html>'
+PAGE = '<html><body><script>fetch("data.json")</script></body></html>'
+
+
+def write_build(directory, data_bytes):
+    directory.mkdir()
+    (directory / 'colt_complete_dashboard.html').write_text(DASHBOARD)
+    (directory / 'page.html').write_text(PAGE)
+    (directory / 'chart.png').write_bytes(b'\x89PNG' + b'\0' * 100)
+    (directory / 'data.json').write_text(json.dumps(['x' * data_bytes]))
+    return str(directory)
+
+
+@pytest.fixture
+def previous(tmp_path):
+    build_dir = write_build(tmp_path / 'previous', 1000)
+    check_build(build_dir, budgets={})
+    return build_dir
+
+
+def test_manifest_views(tmp_path):
+    manifest = build_manifest(write_build(tmp_path / 'build', 1000))
+    first_view = manifest['views']['first_view']
+    assert sorted(first_view['files']) == ['chart.png', 'colt_complete_dashboard.html', 'data.json', 'page.html']
+    assert first_view['raw'] == sum(sizes['raw'] for sizes in manifest['artifacts'].values())
+    assert manifest['views']['page.html']['files'] == ['page.html', 'data.json']
+
+
+def test_artifact_and_view_budgets(tmp_path):
+    manifest = build_manifest(write_build(tmp_path / 'build', 1000))
+    assert check_budgets(manifest, {'artifacts': {'*.json': {'raw': 10000}}, 'view': {'raw': 10000}}) == []
+    violations = check_budgets(manifest, {'artifacts': {'*.json': {'raw': 500}, '*': {'raw': 100000}},
+                                          'first_view': {'raw': 100}})
+    assert [v.split(':')[0] for v in violations] == ['data.json', 'first_view']
+
+
+def test_growth_blocks_until_accepted(tmp_path, previous):
+    budgets = {'max_growth_percent': 10}
+    grown = write_build(tmp_path / 'grown', 2000)
+    assert first_view_growth(build_manifest(grown), json.load(open(f'{previous}/{MANIFEST_FILE}'))) > 10
+    assert check_build(grown, previous, budgets)
+    assert check_build(grown, previous, budgets, accept_growth=True) == []
+    assert json.load(open(f'{grown}/{MANIFEST_FILE}'))['accepted_growth_percent'] > 10
+
+    # Once the grown build is published it is the baseline for the next one
+    assert check_build(write_build(tmp_path / 'next', 2000), grown, budgets) == []
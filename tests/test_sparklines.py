@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+import generate_visualizations as gv
+
+
+def test_countries_without_region_are_unknown():
+    data = pd.DataFrame({
+        'LeaderCountryOrIGO': ['France', 'France', 'Atlantis', 'Germany'],
+        'LeaderRegion': ['Europe', 'Europe', np.nan, 'Europe'],
+        'CountryVisited': ['Germany', 'Atlantis', 'France', 'Lemuria'],
+        'RegionVisited': ['Europe', np.nan, 'Europe', np.nan],
+        'TripYear': [2000, 2001, 2001, 2002],
+    })
+    regions, years, made, received = gv.country_sparkline_data(data)
+    assert regions.to_dict() == {'Atlantis': 'Unknown', 'France': 'Europe', 'Germany': 'Europe',
+                                 'Lemuria': 'Unknown'}
+    assert list(years) == [2000, 2001, 2002]
+    assert made.sum() == received.sum() == 4
+    assert list(received[list(regions.index).index('Atlantis')]) == [0, 1, 0]
+
+
+def test_sparkline_totals_match_trips(trips):
+    regions, years, made, received = gv.country_sparkline_data(trips)
+    assert made.sum() == trips['LeaderCountryOrIGO'].notna().sum()
+    assert received.sum() == trips['CountryVisited'].notna().sum()
@@ -0,0 +1,130 @@
+import json
+import re
+
+import pytest
+
+from figure_io import PLOTLY_CDN_URL, plotly_js
+from size_budget import DASHBOARD_FILE
+from static_export import (INDEX_FILE, MANIFEST_FILE, PLOTLY_FILE, SERVICE_WORKER_FILE, content_hash,
+                           export_site, fingerprinted_name, prepare_output)
+
+IMAGE = b'\x89PNG fake image'
+INDEX_DATA = b'{"leaders": []}'
+
+
+@pytest.fixture
+def build_dir(tmp_path):
+    """A tiny build: a dashboard with a CDN script, an image and two chart pages inlining plotly.js"""
+    build = tmp_path / 'build'
+    build.mkdir()
+    (build / DASHBOARD_FILE).write_text(f"""<html><head><script src="{PLOTLY_CDN_URL}"></script></head>
+<body>
+    <img src="trips_per_year.png">
+    <iframe src="leader_viz.html"></iframe>
+    <iframe src="figure_viz.html"></iframe>
+</body></html>""", encoding='utf-8')
+    (build / 'leader_viz.html').write_text(f"""<html><body>
+    <script type="text/javascript">{plotly_js()}</script>
+    <script>fetch('leader_index.json').then(response => response.json());</script>
+</body></html>""", encoding='utf-8')
+    (build / 'figure_viz.html').write_text(f"""<html><body>
+    <script type="text/javascript">{plotly_js()}</script>
+    <img src='trips_per_year.png'>
+</body></html>""", encoding='utf-8')
+    (build / 'trips_per_year.png').write_bytes(IMAGE)
+    (build / 'leader_index.json').write_bytes(INDEX_DATA)
+    (build / 'unused.png').write_bytes(b'not referenced')
+    return build
+
+
+def page_names(out_dir, prefix):
+    return [path.name for path in out_dir.iterdir() if re.fullmatch(prefix + r'\.[0-9a-f]{10}\.html', path.name)]
+
+
+def test_fingerprinted_name():
+    assert fingerprinted_name('trips_per_year.png', IMAGE) == f'trips_per_year.{content_hash(IMAGE)}.png'
+    assert fingerprinted_name('trips_per_year.png', IMAGE + b'!') != fingerprinted_name('trips_per_year.png', IMAGE)
+
+
+def test_export_renames_and_rewrites_references(build_dir, tmp_path):
+    out_dir = tmp_path / 'site'
+    export_site(str(build_dir), str(out_dir))
+    image = fingerprinted_name('trips_per_year.png', IMAGE)
+    data = fingerprinted_name('leader_index.json', INDEX_DATA)
+    plotly_name = fingerprinted_name(PLOTLY_FILE, plotly_js().encode('utf-8'))
+    assert (out_dir / image).read_bytes() == IMAGE
+    assert (out_dir / data).read_bytes() == INDEX_DATA
+    assert not list(out_dir.glob('unused*'))
+
+    [leader_page] = page_names(out_dir, 'leader_viz')
+    [figure_page] = page_names(out_dir, 'figure_viz')
+    index = (out_dir / INDEX_FILE).read_text(encoding='utf-8')
+    assert f'<script src="{plotly_name}"></script>' in index
+    assert f'<img src="{image}">' in index
+    assert f'<iframe src="{leader_page}">' in index and f'<iframe src="{figure_page}">' in index
+    assert PLOTLY_CDN_URL not in index
+    assert f"register('{SERVICE_WORKER_FILE}')" in index
+
+    leader_html = (out_dir / leader_page).read_text(encoding='utf-8')
+    assert f"fetch('{data}')" in leader_html
+    assert f"<img src='{image}'>" in (out_dir / figure_page).read_text(encoding='utf-8')
+    assert fingerprinted_name('leader_viz.html', leader_html.encode('utf-8')) == leader_page
+
+
+def test_export_shares_one_plotly_copy(build_dir, tmp_path):
+    out_dir = tmp_path / 'site'
+    export_site(str(build_dir), str(out_dir))
+    plotly_files = list(out_dir.glob('plotly.*.js'))
+    assert len(plotly_files) == 1
+    assert plotly_files[0].read_text(encoding='utf-8') == plotly_js()
+    for page in out_dir.glob('*.html'):
+        html = page.read_text(encoding='utf-8')
+        assert plotly_js() not in html
+        assert html.count(f'<script src="{plotly_files[0].name}"></script>') == 1
+
+
+def test_service_worker_precaches_every_file(build_dir, tmp_path):
+    out_dir = tmp_path / 'site'
+    result = export_site(str(build_dir), str(out_dir))
+    site_files = sorted(path.name for path in out_dir.iterdir()
+                        if path.name not in (SERVICE_WORKER_FILE, MANIFEST_FILE))
+    assert sorted(result['files']) == site_files
+    assert list(result['files'])[0] == INDEX_FILE
+    for name, entry in result['files'].items():
+        data = (out_dir / name).read_bytes()
+        assert entry == {'revision': content_hash(data), 'bytes': len(data)}
+    assert json.loads((out_dir / MANIFEST_FILE).read_text()) == result
+
+    service_worker = (out_dir / SERVICE_WORKER_FILE).read_text(encoding='utf-8')
+    precache = json.loads(re.search(r'const PRECACHE = (\[.*?\]);', service_worker, re.S).group(1))
+    assert precache == list(result['files'])
+    assert f"const CACHE = CACHE_PREFIX + '{result['version']}';" in service_worker
+    assert '{{' not in service_worker
+
+
+def test_changed_file_changes_names_and_cache_version(build_dir, tmp_path):
+    first = export_site(str(build_dir), str(tmp_path / 'first'))
+    (build_dir / 'trips_per_year.png').write_bytes(IMAGE + b' updated')
+    second = export_site(str(build_dir), str(tmp_path / 'second'))
+    assert second['version'] != first['version']
+    # The image and the chart page showing it get new names; index.html, the other page,
+    # the data file and plotly.js keep theirs
+    assert {name.split('.')[0] for name in set(second['files']) - set(first['files'])} == \
+        {'trips_per_year', 'figure_viz'}
+    assert len(set(first['files']) - set(second['files'])) == 2
+
+
+def test_prepare_output_refuses_other_directories(build_dir, tmp_path):
+    out_dir = tmp_path / 'site'
+    out_dir.mkdir()
+    (out_dir / 'notes.txt').write_text('keep me')
+    with pytest.raises(RuntimeError, match='not a previous export'):
+        export_site(str(build_dir), str(out_dir))
+    assert [path.name for path in out_dir.iterdir()] == ['notes.txt']
+
+    # An empty directory or a previous export is replaced
+    prepare_output(str(tmp_path / 'empty'))
+    export_site(str(build_dir), str(tmp_path / 'export'))
+    (tmp_path / 'export' / 'stale.png').write_bytes(b'old')
+    export_site(str(build_dir), str(tmp_path / 'export'))
+    assert not (tmp_path / 'export' / 'stale.png').exists()
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from summit_detection import (find_co_travel, find_gatherings, has_trip_dates, maximal_overlaps,
+                              overlapping_pairs, trip_intervals)
+
+
+def random_intervals(seed, n=60, days=120):
+    rng = np.random.default_rng(seed)
+    starts = np.sort(rng.integers(0, days, n))
+    ends = starts + rng.integers(0, 6, n)
+    return starts, ends
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_overlapping_pairs_match_brute_force(seed):
+    starts, ends = random_intervals(seed)
+    expected = {(i, j) for j in range(len(starts)) for i in range(j)
+                if max(starts[i], starts[j]) <= min(ends[i], ends[j])}
+    pairs = overlapping_pairs(starts, ends)
+    assert len(pairs) == len(expected)
+    assert {tuple(sorted(pair)) for pair in pairs} == expected
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_maximal_overlaps_match_brute_force(seed):
+    starts, ends = random_intervals(seed)
+    # Intervals active on each day; the maximal ones are the maximal gatherings
+    by_day = {frozenset(np.flatnonzero((starts <= day) & (day <= ends)))
+              for day in range(starts.min(), ends.max() + 1)}
+    by_day.discard(frozenset())
+    expected = {group for group in by_day if not any(group < other for other in by_day)}
+
+    groups = maximal_overlaps(starts, ends)
+    assert {frozenset(members) for members, _, _ in groups} == expected
+    for members, first_day, last_day in groups:
+        assert first_day == max(starts[members]) and last_day == min(ends[members])
+
+
+def trips_frame(rows):
+    return pd.DataFrame(rows, columns=['LeaderFullName', 'LeaderCountryOrIGO', 'CountryVisited',
+                                       'TripYear', 'TripStartDate', 'TripDuration'])
+
+
+def test_trip_intervals_days_and_missing_dates():
+    intervals = trip_intervals(trips_frame([
+        ('A', 'X', 'France', 2000, '2000-01-10', 3),
+        ('B', 'Y', 'France', 2000, '2000-01-12', np.nan),
+        ('C', 'Z', 'France', 2000, None, 2),
+    ]))
+    assert list(intervals['Leader']) == ['A', 'B']
+    assert list(intervals['End'] - intervals['Start']) == [2, 0]
+
+
+def test_summit_of_three_leaders():
+    intervals = trip_intervals(trips_frame([
+        ('A', 'X', 'France', 2000, '2000-01-10', 3),
+        ('B', 'Y', 'France', 2000, '2000-01-11', 1),
+        ('C', 'Z', 'France', 2000, '2000-01-11', 2),
+        ('D', 'W', 'France', 2000, '2000-01-20', 1),
+        ('E', 'V', 'Spain', 2000, '2000-01-11', 1),
+    ]))
+    gatherings = find_gatherings(intervals, min_leaders=3)
+    assert len(gatherings) == 1
+    assert sorted(gatherings.loc[0, 'LeaderNames']) == ['A', 'B', 'C']
+    assert gatherings.loc[0, 'Start'] == gatherings.loc[0, 'End'] == pd.Timestamp('2000-01-11')
+    assert len(find_co_travel(intervals)) == 3
+
+
+def test_missing_start_date_column():
+    frame = trips_frame([('A', 'X', 'France', 2000, '2000-01-10', 3)]).drop(columns='TripStartDate')
+    assert not has_trip_dates(frame)
+    with pytest.raises(ValueError):
+        trip_intervals(frame)